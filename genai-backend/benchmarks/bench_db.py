@@ -0,0 +1,132 @@
+"""
+Benchmark per-project query latency on a large deck before and after the
+schema migrations (indexes) and SQLite pragmas.
+
+Builds a throwaway database with the pre-migration layout (no secondary
+indexes, default journal settings), measures the hot router queries, then
+applies the migrations and pragmas to the same data and measures again.
+
+Usage (from genai-backend/):
+    python -m benchmarks.bench_db
+    python -m benchmarks.bench_db --cards 100000 --projects 200 --repeat 50
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, func, insert, select
+
+from models.db import Base, apply_sqlite_pragmas
+from models.migrations import run_migrations
+from models.tables import Project, Flashcard
+
+
+def build_database(url: str, num_projects: int, num_cards: int) -> list:
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        # Back to the old layout: only primary keys
+        for (name,) in conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'ix_%'"
+        ).fetchall():
+            conn.exec_driver_sql(f"DROP INDEX {name}")
+
+        now = datetime.utcnow()
+        project_ids = [str(uuid.uuid4()) for _ in range(num_projects)]
+        conn.execute(insert(Project), [
+            {"id": pid, "title": f"Project {i}", "created_at": now, "updated_at": now - timedelta(minutes=i)}
+            for i, pid in enumerate(project_ids)
+        ])
+        rng = random.Random(42)
+        rows = []
+        for i in range(num_cards):
+            ts = now - timedelta(seconds=num_cards - i)
+            rows.append({
+                "id": str(uuid.uuid4()),
+                "question": f"Question {i}?",
+                "answer": f"Answer {i}",
+                "level": rng.randint(0, 2),
+                "important": 0,
+                "review_count": 0,
+                "project_id": rng.choice(project_ids),
+                "created_at": ts,
+                "updated_at": ts,
+            })
+            if len(rows) == 5000:
+                conn.execute(insert(Flashcard), rows)
+                rows = []
+        if rows:
+            conn.execute(insert(Flashcard), rows)
+    engine.dispose()
+    return project_ids
+
+
+def queries(project_id: str) -> dict:
+    """The per-project statements issued by the routers."""
+    return {
+        "list cards (keyset page)": select(Flashcard.id, Flashcard.level)
+            .where(Flashcard.project_id == project_id)
+            .order_by(Flashcard.created_at, Flashcard.id).limit(100),
+        "count cards": select(func.count(Flashcard.id)).where(Flashcard.project_id == project_id),
+        "etag aggregate": select(func.max(Flashcard.updated_at), func.count(Flashcard.id))
+            .where(Flashcard.project_id == project_id),
+        "cards by level": select(Flashcard.id)
+            .where(Flashcard.project_id == project_id, Flashcard.level == 1),
+        "project listing": select(
+            Project.id,
+            select(func.count(Flashcard.id)).where(Flashcard.project_id == Project.id)
+            .correlate(Project).scalar_subquery()
+        ).order_by(Project.updated_at.desc()).limit(50),
+    }
+
+
+def measure(engine, project_ids: list, repeat: int) -> dict:
+    rng = random.Random(7)
+    results = {}
+    with engine.connect() as conn:
+        for name in queries(project_ids[0]):
+            samples = []
+            for _ in range(repeat):
+                stmt = queries(rng.choice(project_ids))[name]
+                start = time.perf_counter()
+                conn.execute(stmt).fetchall()
+                samples.append((time.perf_counter() - start) * 1000)
+            results[name] = statistics.median(samples)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=100_000)
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        print(f"Building database with {args.cards} cards in {args.projects} projects ...")
+        project_ids = build_database(url, args.projects, args.cards)
+
+        before_engine = create_engine(url)
+        before = measure(before_engine, project_ids, args.repeat)
+        before_engine.dispose()
+
+        after_engine = create_engine(url)
+        event.listen(after_engine, "connect", apply_sqlite_pragmas)
+        run_migrations(after_engine)
+        after = measure(after_engine, project_ids, args.repeat)
+        after_engine.dispose()
+
+    print(f"\n{'query':<28} {'before ms':>10} {'after ms':>10} {'speedup':>8}   (median of {args.repeat})")
+    for name in before:
+        speedup = before[name] / after[name] if after[name] else float("inf")
+        print(f"{name:<28} {before[name]:>10.3f} {after[name]:>10.3f} {speedup:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
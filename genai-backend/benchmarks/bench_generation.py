@@ -0,0 +1,88 @@
+"""
+Compare card generation modes (fused vs two_step) against a real provider.
+
+Extracts the PDFs once, then runs the same pages through each mode with the
+LLM cache disabled and reports LLM calls, cards/sec and tokens/card. Token
+counts come from the provider's `usage` (estimated when it sends none).
+
+Usage (from genai-backend/):
+    python -m benchmarks.bench_generation --pages 30
+    python -m benchmarks.bench_generation --provider openai --api-key $OPENAI_API_KEY --modes fused two_step
+"""
+import argparse
+import glob
+import os
+import time
+
+from services.card_generator import CardGenerator
+from services.extractor import ContentExtractor
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data", "set1")
+
+
+def load_pages(data_dir: str, max_pages: int) -> list:
+    extractor = ContentExtractor()
+    pages = []
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.pdf"))):
+        for chunk in extractor.iter_chunks(path, os.path.basename(path)):
+            pages.append(chunk)
+            if len(pages) >= max_pages:
+                return pages
+    return pages
+
+
+def run_mode(args, mode: str, pages: list) -> dict:
+    generator = CardGenerator(
+        provider=args.provider,
+        lmstudio_url=args.url,
+        openai_api_key=args.api_key,
+        openai_model=args.model,
+        use_cache=False,
+        mode=mode,
+    )
+    chunks = 0
+    cards = 0
+    start = time.perf_counter()
+    for _, chunk_cards in generator.iter_cards_from_chunks(pages):
+        chunks += 1
+        cards += len(chunk_cards)
+    elapsed = time.perf_counter() - start
+    tokens = generator.usage["prompt_tokens"] + generator.usage["completion_tokens"]
+    return {
+        "chunks": chunks,
+        "calls": generator.usage["calls"],
+        "cards": cards,
+        "seconds": elapsed,
+        "cards_per_sec": cards / elapsed if elapsed else 0.0,
+        "prompt_tokens": generator.usage["prompt_tokens"],
+        "completion_tokens": generator.usage["completion_tokens"],
+        "tokens_per_card": tokens / cards if cards else float("inf"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=DEFAULT_DATA_DIR, help="Directory with PDFs")
+    parser.add_argument("--pages", type=int, default=30, help="Number of extracted pages to generate from")
+    parser.add_argument("--modes", nargs="+", default=["fused", "two_step"])
+    parser.add_argument("--provider", default="lmstudio", choices=["lmstudio", "openai"])
+    parser.add_argument("--url", default="http://127.0.0.1:1234/v1", help="LMStudio base URL")
+    parser.add_argument("--api-key", default=os.getenv("OPENAI_API_KEY"))
+    parser.add_argument("--model", default="gpt-4.1-nano", help="OpenAI model")
+    args = parser.parse_args()
+
+    pages = load_pages(args.data, args.pages)
+    print(f"{len(pages)} pages from {args.data}, provider {args.provider}\n")
+
+    results = {mode: run_mode(args, mode, pages) for mode in args.modes}
+
+    print(f"{'mode':<10} {'chunks':>6} {'calls':>6} {'cards':>6} {'sec':>8} {'cards/s':>8} "
+          f"{'prompt tok':>11} {'compl tok':>10} {'tok/card':>9}")
+    for mode, r in results.items():
+        print(f"{mode:<10} {r['chunks']:>6} {r['calls']:>6} {r['cards']:>6} {r['seconds']:>8.1f} "
+              f"{r['cards_per_sec']:>8.2f} {r['prompt_tokens']:>11} {r['completion_tokens']:>10} "
+              f"{r['tokens_per_card']:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
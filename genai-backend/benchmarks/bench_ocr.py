@@ -0,0 +1,105 @@
+"""
+Benchmark the OCR engines on scanned pages.
+
+Turns the first pages of the PDFs in data/set1 into scanned pages (rendered
+and embedded as images, no text layer), then renders them for OCR at each
+`--dpi` and recognizes them with each engine and batch size:
+  - pytesseract, batch 1: one tesseract process per page
+  - pytesseract, batch N: one tesseract process per N pages (list file)
+  - tesserocr: warm in-process API (if the tesserocr package is installed)
+
+Usage (from genai-backend/):
+    python -m benchmarks.bench_ocr
+    python -m benchmarks.bench_ocr --pages 40 --dpi 72 150 300 --batch 1 8 --lang deu+eng
+"""
+import argparse
+import glob
+import os
+import statistics
+import time
+
+import fitz  # PyMuPDF
+import pytesseract
+
+from services import ocr
+from services.ocr import OCR_DPI, OCR_LANG, PytesseractEngine, TesserocrEngine, render_page
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data", "set1")
+
+
+def make_scanned(pdfs, num_pages: int, scan_dpi: int) -> fitz.Document:
+    """Image-only copies of the first `num_pages` pages (spread over the files)."""
+    scanned = fitz.open()
+    per_file = max(1, -(-num_pages // len(pdfs)))
+    for path in pdfs:
+        with fitz.open(path) as doc:
+            for page in list(doc)[:per_file]:
+                if len(scanned) >= num_pages:
+                    return scanned
+                pix = page.get_pixmap(dpi=scan_dpi)
+                target = scanned.new_page(width=page.rect.width, height=page.rect.height)
+                target.insert_image(target.rect, pixmap=pix)
+    return scanned
+
+
+def run_engine(engine, images, batch: int) -> dict:
+    samples = []
+    chars = 0
+    start = time.perf_counter()
+    for i in range(0, len(images), batch):
+        run = images[i:i + batch]
+        started = time.perf_counter()
+        texts = engine.images_to_strings(run)
+        samples.extend([(time.perf_counter() - started) / len(run)] * len(run))
+        chars += sum(len(t.strip()) for t in texts)
+    elapsed = time.perf_counter() - start
+    return {
+        "pages_per_sec": len(images) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(samples) * 1000,
+        "first_ms": samples[0] * 1000,
+        "chars": chars,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=DEFAULT_DATA_DIR, help="Directory with PDFs")
+    parser.add_argument("--pages", type=int, default=24, help="Scanned pages to recognize")
+    parser.add_argument("--scan-dpi", type=int, default=150, help="Resolution of the simulated scans")
+    parser.add_argument("--dpi", type=int, nargs="+", default=[OCR_DPI], help="OCR render resolutions")
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 8], help="pytesseract batch sizes")
+    parser.add_argument("--lang", default=OCR_LANG, help="Tesseract language(s)")
+    args = parser.parse_args()
+
+    try:
+        print(f"tesseract {pytesseract.get_tesseract_version()}, "
+              f"tesserocr {'installed' if ocr.tesserocr is not None else 'not installed'}")
+    except pytesseract.TesseractNotFoundError:
+        raise SystemExit("tesseract is not installed (see README, Requirements)")
+
+    pdfs = sorted(glob.glob(os.path.join(args.data, "*.pdf")))
+    if not pdfs:
+        raise SystemExit(f"No PDFs found in {args.data}")
+    scanned = make_scanned(pdfs, args.pages, args.scan_dpi)
+    print(f"{len(scanned)} scanned pages from {len(pdfs)} PDFs (scanned at {args.scan_dpi} dpi), lang {args.lang}")
+
+    engines = [(f"pytesseract batch {b}", PytesseractEngine(args.lang), b) for b in args.batch]
+    if ocr.tesserocr is not None:
+        engines.append(("tesserocr", TesserocrEngine(args.lang), 1))
+
+    print(f"\n{'dpi':>4} {'engine':<22} {'pages/s':>8} {'p50 ms':>9} {'first ms':>9} {'chars':>8}")
+    for dpi in args.dpi:
+        start = time.perf_counter()
+        images = [render_page(page, dpi) for page in scanned]
+        render_ms = (time.perf_counter() - start) / len(images) * 1000
+        print(f"{dpi:>4} {'render (grayscale)':<22} {'':>8} {render_ms:>9.2f}")
+        for name, engine, batch in engines:
+            r = run_engine(engine, images, batch)
+            print(f"{dpi:>4} {name:<22} {r['pages_per_sec']:>8.2f} {r['p50_ms']:>9.1f} {r['first_ms']:>9.1f} {r['chars']:>8}")
+    for _, engine, _ in engines:
+        engine.close()
+    scanned.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+End-to-end extraction + generation benchmark over data/set1 with a deterministic stub LLM.
+
+Two phases per run:
+  1. extraction: ContentExtractor over every PDF (pages/sec, OCR share, per-page p50/p95)
+  2. pipeline: extraction -> chunk planning -> CardGenerator, as an ingestion job
+     runs it, with the LLM replaced by benchmarks/stub_llm.py (pages/sec, LLM calls
+     per page, tokens, per-stage p50/p95)
+plus the peak RSS of the process and of its children (tesseract, extraction workers).
+
+Results can be written as JSON and compared between commits:
+    python -m benchmarks.bench_pipeline --output before.json
+    python -m benchmarks.bench_pipeline --output after.json --baseline before.json
+    python -m benchmarks.bench_pipeline --compare before.json after.json
+
+Usage (from genai-backend/):
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --mode two_step --llm-latency-ms 200 --decode-tps 60
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from benchmarks.stub_llm import StubLLM, StubLLMClient
+from services.card_generator import CardGenerator
+from services.chunk_planner import chunk_pages
+from services.extractor import ContentExtractor
+from services.metrics import extraction_page_seconds, llm_request_seconds
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data", "set1")
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile (0 for no samples)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def summarize_ms(samples: List[float]) -> dict:
+    return {
+        "count": len(samples),
+        "p50_ms": percentile(samples, 0.50) * 1000,
+        "p95_ms": percentile(samples, 0.95) * 1000,
+    }
+
+
+@contextmanager
+def tap(histogram, label: str):
+    """Collect the raw samples of a metrics histogram, grouped by one of its labels."""
+    samples: Dict[str, List[float]] = defaultdict(list)
+    original = histogram.observe
+
+    def observe(value, **labels):
+        samples[labels.get(label, "")].append(value)
+        original(value, **labels)
+
+    histogram.observe = observe
+    try:
+        yield samples
+    finally:
+        del histogram.observe
+
+
+def peak_rss_mb() -> dict:
+    # ru_maxrss is in KiB on Linux, in bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_extraction(pdfs: List[str], workers: int) -> dict:
+    extractor = ContentExtractor(workers=workers)
+    pages = 0
+    try:
+        with tap(extraction_page_seconds, "method") as samples:
+            start = time.perf_counter()
+            for path in pdfs:
+                pages += extractor.page_count(path, os.path.basename(path))
+                for _ in extractor.iter_chunks(path, os.path.basename(path)):
+                    pass
+            elapsed = time.perf_counter() - start
+    finally:
+        extractor.close()
+    ocr_pages = len(samples.get("ocr", []))
+    return {
+        "pages": pages,
+        "seconds": elapsed,
+        "pages_per_sec": pages / elapsed if elapsed else 0.0,
+        "ocr_pages": ocr_pages,
+        "ocr_share": ocr_pages / pages if pages else 0.0,
+        "page": {method: summarize_ms(values) for method, values in sorted(samples.items())},
+    }
+
+
+def run_pipeline(pdfs: List[str], args) -> dict:
+    extractor = ContentExtractor(workers=args.workers)
+    generator = CardGenerator(
+        use_cache=False,
+        mode=args.mode,
+        max_concurrency=args.concurrency,
+    )
+    generator.client = StubLLMClient(StubLLM(
+        latency=args.llm_latency_ms / 1000,
+        prefill_tps=args.prefill_tps,
+        decode_tps=args.decode_tps,
+    ))
+    pages = chunks = cards = 0
+    chunk_sizes = []
+    try:
+        with tap(llm_request_seconds, "stage") as samples:
+            start = time.perf_counter()
+            for path in pdfs:
+                pages += extractor.page_count(path, os.path.basename(path))
+                chunk_iter = extractor.iter_chunks(path, os.path.basename(path))
+                for chunk, chunk_cards in generator.iter_cards_from_chunks(chunk_iter):
+                    chunks += 1
+                    cards += len(chunk_cards)
+                    chunk_sizes.append(len(chunk_pages(chunk)))
+            elapsed = time.perf_counter() - start
+    finally:
+        extractor.close()
+    usage = generator.usage
+    return {
+        "mode": args.mode,
+        "pages": pages,
+        "chunks": chunks,
+        "pages_per_chunk": sum(chunk_sizes) / chunks if chunks else 0.0,
+        "cards": cards,
+        "seconds": elapsed,
+        "pages_per_sec": pages / elapsed if elapsed else 0.0,
+        "llm_calls": usage["calls"],
+        "calls_per_page": usage["calls"] / pages if pages else 0.0,
+        "prompt_tokens": usage["prompt_tokens"],
+        "completion_tokens": usage["completion_tokens"],
+        "llm": {stage: summarize_ms(values) for stage, values in sorted(samples.items())},
+    }
+
+
+def flatten(data: dict, prefix: str = "") -> Dict[str, float]:
+    """Numeric leaves of a result dict as dotted keys."""
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(old: dict, new: dict) -> None:
+    print(f"\n{'metric':<40} {'baseline':>12} {'current':>12} {'change':>9}")
+    print(f"  baseline {old['meta'].get('commit') or '?'} ({old['meta']['timestamp']}), "
+          f"current {new['meta'].get('commit') or '?'} ({new['meta']['timestamp']})")
+    old_flat = flatten({k: v for k, v in old.items() if k != "meta"})
+    new_flat = flatten({k: v for k, v in new.items() if k != "meta"})
+    for key in sorted(set(old_flat) | set(new_flat)):
+        a, b = old_flat.get(key), new_flat.get(key)
+        if a is None or b is None:
+            change = "new" if a is None else "gone"
+        elif a == 0:
+            change = "" if b == 0 else "n/a"
+        else:
+            change = f"{(b - a) / a * 100:+.1f}%"
+        fmt = lambda v: "-" if v is None else f"{v:.3f}" if isinstance(v, float) else str(v)
+        print(f"{key:<40} {fmt(a):>12} {fmt(b):>12} {change:>9}")
+
+
+def print_report(result: dict) -> None:
+    ext, pipe = result["extraction"], result["pipeline"]
+    print(f"\nExtraction: {ext['pages']} pages in {ext['seconds']:.2f}s = {ext['pages_per_sec']:.1f} pages/s, "
+          f"OCR share {ext['ocr_share']:.1%}")
+    for method, s in ext["page"].items():
+        print(f"  page [{method:<4}] n={s['count']:<5} p50 {s['p50_ms']:8.2f} ms   p95 {s['p95_ms']:8.2f} ms")
+    print(f"\nPipeline ({pipe['mode']}): {pipe['pages']} pages -> {pipe['chunks']} chunks -> {pipe['cards']} cards "
+          f"in {pipe['seconds']:.2f}s = {pipe['pages_per_sec']:.1f} pages/s")
+    print(f"  LLM calls {pipe['llm_calls']} ({pipe['calls_per_page']:.2f}/page), "
+          f"tokens {pipe['prompt_tokens']} prompt + {pipe['completion_tokens']} completion")
+    for stage, s in pipe["llm"].items():
+        print(f"  llm  [{stage:<8}] n={s['count']:<5} p50 {s['p50_ms']:8.2f} ms   p95 {s['p95_ms']:8.2f} ms")
+    rss = result["peak_rss_mb"]
+    print(f"\nPeak RSS: {rss['self']:.0f} MB (child processes, e.g. tesseract or extraction workers: {rss['children']:.0f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=DEFAULT_DATA_DIR, help="Directory with PDFs")
+    parser.add_argument("--workers", type=int, default=0, help="Extraction processes (0 = in-process)")
+    parser.add_argument("--mode", default="fused", choices=["fused", "two_step", "direct"])
+    parser.add_argument("--concurrency", type=int, default=None, help="Chunks in flight (default: per provider)")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Stub LLM time to first token")
+    parser.add_argument("--prefill-tps", type=float, default=0.0, help="Stub LLM prompt tokens/sec (0 = free)")
+    parser.add_argument("--decode-tps", type=float, default=0.0, help="Stub LLM completion tokens/sec (0 = instant)")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--baseline", help="Compare the results with an earlier --output file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f_old, open(args.compare[1]) as f_new:
+            compare(json.load(f_old), json.load(f_new))
+        return
+
+    pdfs = sorted(glob.glob(os.path.join(args.data, "*.pdf")))
+    if not pdfs:
+        raise SystemExit(f"No PDFs found in {args.data}")
+    print(f"{len(pdfs)} PDFs from {args.data}")
+
+    result = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "files": [os.path.basename(p) for p in pdfs],
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "compare")},
+        },
+        "extraction": run_extraction(pdfs, args.workers),
+        "pipeline": run_pipeline(pdfs, args),
+    }
+    result["peak_rss_mb"] = peak_rss_mb()
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(json.load(f), result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark the BM25 passage index used to enrich lecture prompts.
+
+Builds a PassageIndex over synthetic extended_info documents (pages of
+random vocabulary text, Zipf-like word distribution), adds one more document
+incrementally, and measures queries with slide-sized texts.
+
+Usage (from genai-backend/):
+    python -m benchmarks.bench_retrieval
+    python -m benchmarks.bench_retrieval --docs 40 --pages 200 --query-words 300 --repeat 200
+"""
+import argparse
+import random
+import statistics
+import time
+
+from models.schemas import TextChunk
+from services.retrieval import RETRIEVAL_TOKEN_BUDGET, RETRIEVAL_TOP_K, PassageIndex
+
+WORDS_PER_PAGE = 350
+
+
+def make_pages(rng: random.Random, vocabulary: list, weights: list, pages: int):
+    return [
+        TextChunk(
+            text="\n\n".join(" ".join(rng.choices(vocabulary, weights, k=WORDS_PER_PAGE // 5)) for _ in range(5)),
+            page_number=p + 1,
+            source_file="",
+        )
+        for p in range(pages)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=20, help="extended_info documents")
+    parser.add_argument("--pages", type=int, default=100, help="Pages per document")
+    parser.add_argument("--query-words", type=int, default=200, help="Words per query (slide text)")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    vocabulary = [f"term{i}" for i in range(20_000)]
+    weights = [1.0 / (rank + 1) for rank in range(len(vocabulary))]
+    rng = random.Random(42)
+    documents = [make_pages(rng, vocabulary, weights, args.pages) for _ in range(args.docs + 1)]
+
+    index = PassageIndex()
+    start = time.perf_counter()
+    for d, pages in enumerate(documents[:-1]):
+        index.add_document(f"doc{d}", pages)
+    build = time.perf_counter() - start
+    print(f"Indexed {args.docs} documents x {args.pages} pages = {len(index)} passages in {build:.2f}s")
+
+    start = time.perf_counter()
+    added = index.add_document("incremental", documents[-1])
+    print(f"Incremental add of one {args.pages}-page document ({added} passages): "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    samples, context_samples = [], []
+    hits = 0
+    for _ in range(args.repeat):
+        query = " ".join(rng.choices(vocabulary, weights, k=args.query_words))
+        start = time.perf_counter()
+        hits = len(index.search(query))
+        samples.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        index.context(query)
+        context_samples.append((time.perf_counter() - start) * 1000)
+
+    print(f"\n{'operation':<28} {'p50 ms':>8} {'p95 ms':>8}   ({args.repeat} queries of {args.query_words} words)")
+    for name, values in (
+        (f"search top-{RETRIEVAL_TOP_K}", samples),
+        (f"context ({RETRIEVAL_TOKEN_BUDGET} token budget)", context_samples),
+    ):
+        values.sort()
+        p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+        print(f"{name:<28} {statistics.median(values):>8.2f} {p95:>8.2f}")
+    print(f"\nHits per query: {hits}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark full-text search latency on a synthetic library.
+
+Builds a throwaway database with the given number of documents (pages of
+random vocabulary text, shared Zipf-like word distribution) and cards, then
+measures `search_project` for frequent, medium and rare terms.
+
+Usage (from genai-backend/):
+    python -m benchmarks.bench_search
+    python -m benchmarks.bench_search --docs 300 --pages 40 --cards 50000 --repeat 30
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from models.db import apply_sqlite_pragmas
+from models.migrations import init_db
+from models.tables import Project, File, Flashcard, PageText
+from services.search import search_project
+
+WORDS_PER_PAGE = 350
+
+
+def build_database(url: str, num_docs: int, pages_per_doc: int, num_cards: int, num_projects: int, vocabulary: list):
+    engine = create_engine(url)
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+    init_db(engine)
+    rng = random.Random(42)
+    # Zipf-like weights: a few very frequent words, a long tail of rare ones
+    weights = [1.0 / (rank + 1) for rank in range(len(vocabulary))]
+    now = datetime.utcnow()
+    project_ids = [str(uuid.uuid4()) for _ in range(num_projects)]
+    with engine.begin() as conn:
+        conn.execute(insert(Project), [{"id": pid, "title": pid, "created_at": now, "updated_at": now} for pid in project_ids])
+        for d in range(num_docs):
+            doc_key = f"{d:064x}"
+            conn.execute(insert(File), [{
+                "id": str(uuid.uuid4()),
+                "original_filename": f"doc{d}.pdf",
+                "stored_path": "",
+                "content_hash": doc_key,
+                "project_id": project_ids[d % num_projects],
+            }])
+            conn.execute(insert(PageText), [
+                {"doc_key": doc_key, "page_number": p + 1, "text": " ".join(rng.choices(vocabulary, weights, k=WORDS_PER_PAGE))}
+                for p in range(pages_per_doc)
+            ])
+        rows = []
+        for i in range(num_cards):
+            rows.append({
+                "id": str(uuid.uuid4()),
+                "question": " ".join(rng.choices(vocabulary, weights, k=12)) + "?",
+                "answer": " ".join(rng.choices(vocabulary, weights, k=25)),
+                "level": 0,
+                "project_id": rng.choice(project_ids),
+                "created_at": now,
+                "updated_at": now,
+                "due_at": now,
+            })
+            if len(rows) == 5000:
+                conn.execute(insert(Flashcard), rows)
+                rows = []
+        if rows:
+            conn.execute(insert(Flashcard), rows)
+    return engine, project_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=300)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--cards", type=int, default=50_000)
+    parser.add_argument("--projects", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    vocabulary = [f"term{i}" for i in range(20_000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        print(f"Building library: {args.docs} documents x {args.pages} pages, {args.cards} cards ...")
+        engine, project_ids = build_database(url, args.docs, args.pages, args.cards, args.projects, vocabulary)
+        Session = sessionmaker(bind=engine)
+        db = Session()
+        rng = random.Random(7)
+        cases = {
+            "frequent term": "term0",
+            "medium term": "term200",
+            "rare term": "term15000",
+            "two terms": "term3 term40",
+        }
+        print(f"\n{'query':<16} {'p50 ms':>8} {'p95 ms':>8} {'hits':>6}   ({args.repeat} runs, random project)")
+        for name, q in cases.items():
+            samples = []
+            hits = 0
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                result = search_project(db, rng.choice(project_ids), q)
+                samples.append((time.perf_counter() - start) * 1000)
+                hits = len(result["cards"]) + len(result["pages"])
+            samples.sort()
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+            print(f"{name:<16} {statistics.median(samples):>8.2f} {p95:>8.2f} {hits:>6}")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
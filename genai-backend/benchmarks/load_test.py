@@ -0,0 +1,239 @@
+"""
+Load test of the running backend: concurrent uploads, deck fetches and level updates.
+
+Creates a project, seeds it with one ingested PDF, then lets `--clients`
+threads issue a weighted mix of requests for `--duration` seconds and reports
+throughput and latency percentiles per operation, plus the end-to-end time of
+the ingestion jobs started by the uploads. Every upload is a freshly generated
+PDF, so content deduplication does not skip the work.
+
+Start the backend and the stub LLM first:
+    python -m benchmarks.stub_server --port 1235 --latency-ms 200 --decode-tps 80 --max-concurrency 2
+    python -m uvicorn main:app --port 8000
+
+Usage (from genai-backend/):
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --clients 32 --duration 60 --mix upload=1 deck=10 level=30 --output load.json
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import fitz  # PyMuPDF
+import requests
+
+from benchmarks.bench_pipeline import percentile
+
+OPERATIONS = ("upload", "deck", "level")
+WORDS = (
+    "gradient descent updates parameters along the negative gradient of the loss "
+    "a policy maps states to actions and the value function estimates expected return "
+    "convolution layers share weights across spatial positions to detect local patterns "
+    "regularization penalizes model complexity to reduce overfitting on training data"
+).split()
+
+
+def make_pdf(pages: int, rng: random.Random, tag: str) -> bytes:
+    """A small text PDF with unique content (upload dedup keys on the file hash)."""
+    doc = fitz.open()
+    for page_number in range(pages):
+        page = doc.new_page()
+        sentences = [" ".join(rng.choices(WORDS, k=14)).capitalize() + "." for _ in range(12)]
+        text = f"Lecture {tag}, slide {page_number + 1}\n\n" + "\n".join(sentences)
+        page.insert_textbox(fitz.Rect(50, 50, 550, 800), text, fontsize=10)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class LoadTest:
+    def __init__(self, args):
+        self.args = args
+        self.api = args.api.rstrip("/")
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.jobs: List[tuple] = []  # (job_id, submitted_at)
+        self.card_ids: List[str] = []
+        self.project_id = None
+        self.upload_seq = 0
+
+    def record(self, op: str, elapsed: float, ok: bool) -> None:
+        with self.lock:
+            self.latencies[op].append(elapsed)
+            if not ok:
+                self.errors[op] += 1
+
+    def upload(self, session: requests.Session, rng: random.Random) -> str:
+        with self.lock:
+            self.upload_seq += 1
+            tag = f"{self.args.seed}-{self.upload_seq}"
+        pdf = make_pdf(self.args.pages, rng, tag)
+        response = session.post(
+            f"{self.api}/projects/{self.project_id}/files",
+            params={"provider": "lmstudio", "lmstudio_url": self.args.llm_url, "use_cache": "false"},
+            files=[("files", (f"load-{tag}.pdf", pdf, "application/pdf"))],
+            timeout=self.args.timeout,
+        )
+        response.raise_for_status()
+        job_id = response.json()[0]["job_id"]
+        with self.lock:
+            self.jobs.append((job_id, time.perf_counter()))
+        return job_id
+
+    def fetch_deck(self, session: requests.Session) -> None:
+        response = session.get(f"{self.api}/projects/{self.project_id}/flashcards", timeout=self.args.timeout)
+        response.raise_for_status()
+        ids = [card["id"] for card in response.json()]
+        with self.lock:
+            self.card_ids = ids
+
+    def update_level(self, session: requests.Session, rng: random.Random) -> None:
+        with self.lock:
+            card_id = rng.choice(self.card_ids)
+        response = session.post(
+            f"{self.api}/projects/{self.project_id}/flashcards/{card_id}/level",
+            json={"level": rng.randint(0, 2)},
+            timeout=self.args.timeout,
+        )
+        response.raise_for_status()
+
+    def wait_for_job(self, session: requests.Session, job_id: str, deadline: float) -> dict:
+        while time.perf_counter() < deadline:
+            job = session.get(f"{self.api}/jobs/{job_id}", timeout=self.args.timeout).json()
+            if job["status"] in ("done", "failed"):
+                return job
+            time.sleep(0.25)
+        return {"status": "timeout"}
+
+    def setup(self) -> None:
+        session = requests.Session()
+        project = session.post(f"{self.api}/projects", json={"title": f"load test {self.args.seed}"}, timeout=self.args.timeout)
+        project.raise_for_status()
+        self.project_id = project.json()["id"]
+        print(f"Project {self.project_id}: seeding one {self.args.pages}-page PDF ...")
+        job_id = self.upload(session, random.Random(self.args.seed))
+        job = self.wait_for_job(session, job_id, time.perf_counter() + self.args.job_timeout)
+        self.jobs.clear()
+        self.fetch_deck(session)
+        if job["status"] != "done" or not self.card_ids:
+            raise SystemExit(f"Seed job ended with {job['status']!r} and {len(self.card_ids)} cards; is the stub LLM at {self.args.llm_url} running?")
+        print(f"Seeded {len(self.card_ids)} cards\n")
+
+    def client(self, index: int, stop_at: float, weights: Dict[str, float]) -> None:
+        rng = random.Random(self.args.seed * 1000 + index)
+        session = requests.Session()
+        ops, op_weights = zip(*weights.items())
+        while time.perf_counter() < stop_at:
+            op = rng.choices(ops, op_weights)[0]
+            start = time.perf_counter()
+            ok = True
+            try:
+                if op == "upload":
+                    self.upload(session, rng)
+                elif op == "deck":
+                    self.fetch_deck(session)
+                else:
+                    self.update_level(session, rng)
+            except requests.RequestException:
+                ok = False
+            self.record(op, time.perf_counter() - start, ok)
+
+    def run(self) -> dict:
+        weights = {op: w for op, w in self.args.mix.items() if w > 0}
+        print(f"{self.args.clients} clients for {self.args.duration:.0f}s, mix {weights}")
+        start = time.perf_counter()
+        stop_at = start + self.args.duration
+        threads = [
+            threading.Thread(target=self.client, args=(i, stop_at, weights), daemon=True)
+            for i in range(self.args.clients)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        # End-to-end ingestion time of the jobs started during the run
+        session = requests.Session()
+        deadline = time.perf_counter() + self.args.job_timeout
+        job_seconds = []
+        job_status = defaultdict(int)
+        for job_id, submitted_at in self.jobs:
+            job = self.wait_for_job(session, job_id, deadline)
+            job_status[job["status"]] += 1
+            if job["status"] == "done":
+                job_seconds.append(time.perf_counter() - submitted_at)
+
+        operations = {}
+        for op, samples in sorted(self.latencies.items()):
+            operations[op] = {
+                "requests": len(samples),
+                "errors": self.errors[op],
+                "rps": len(samples) / elapsed,
+                "p50_ms": percentile(samples, 0.50) * 1000,
+                "p95_ms": percentile(samples, 0.95) * 1000,
+                "p99_ms": percentile(samples, 0.99) * 1000,
+                "max_ms": max(samples) * 1000,
+            }
+        return {
+            "args": {k: v for k, v in vars(self.args).items() if k != "output"},
+            "seconds": elapsed,
+            "operations": operations,
+            "jobs": {
+                "status": dict(job_status),
+                # Upper bound: polled after the load phase, so jobs finished during it count until now
+                "p50_s": percentile(job_seconds, 0.50),
+                "p95_s": percentile(job_seconds, 0.95),
+            },
+        }
+
+
+def parse_mix(values: List[str]) -> Dict[str, float]:
+    mix = {op: 0.0 for op in OPERATIONS}
+    for value in values:
+        op, _, weight = value.partition("=")
+        if op not in OPERATIONS:
+            raise SystemExit(f"Unknown operation {op!r}, expected one of {OPERATIONS}")
+        mix[op] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api", default="http://127.0.0.1:8000", help="Backend base URL")
+    parser.add_argument("--llm-url", default="http://127.0.0.1:1235/v1", help="LLM base URL passed with the uploads")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent client threads")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load")
+    parser.add_argument("--mix", nargs="+", default=["upload=1", "deck=10", "level=20"], help="Operation weights")
+    parser.add_argument("--pages", type=int, default=4, help="Pages per uploaded PDF")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Request timeout (seconds)")
+    parser.add_argument("--job-timeout", type=float, default=600.0, help="Wait for ingestion jobs at most this long")
+    parser.add_argument("--seed", type=int, default=int(time.time()), help="Seed (also tags the generated PDFs)")
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args()
+    args.mix = parse_mix(args.mix)
+
+    test = LoadTest(args)
+    test.setup()
+    result = test.run()
+
+    print(f"\n{'operation':<10} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for op, r in result["operations"].items():
+        print(f"{op:<10} {r['requests']:>9} {r['errors']:>7} {r['rps']:>8.1f} {r['p50_ms']:>9.1f} "
+              f"{r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['max_ms']:>9.1f}")
+    jobs = result["jobs"]
+    print(f"\nIngestion jobs: {jobs['status']}, end-to-end p50 {jobs['p50_s']:.1f}s p95 {jobs['p95_s']:.1f}s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Deterministic stand-in for an OpenAI-compatible LLM, for benchmarks.
+
+Recognises the generator's prompts (planner, two_step writer, fused, direct)
+and answers with well-formed JSON built from the slide text itself, so the
+same input always yields the same cards and token counts. Latency is
+simulated from the token counts (0 = answer instantly).
+
+    from benchmarks.stub_llm import StubLLM, StubLLMClient
+    generator.client = StubLLMClient(StubLLM(latency=0.2, decode_tps=50))
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from services.chunk_planner import estimate_tokens
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+_MAX_CONCEPTS_RE = re.compile(r"select up to (\d+)")
+_NUM_CARDS_RE = re.compile(r"create exactly (\d+) flashcards")
+# Minimum words for a sentence to become a concept
+MIN_CONCEPT_WORDS = 5
+
+
+def prompt_kind(prompt: str) -> str:
+    """Which generator prompt this is: "plan", "generate", "fused" or "direct"."""
+    if '"concepts": [' in prompt:
+        return "plan"
+    if '"results": [' in prompt:
+        return "generate"
+    if '"cards": [' in prompt:
+        return "fused"
+    return "direct"
+
+
+def _between(text: str, start: str, ends: Tuple[str, ...]) -> str:
+    i = text.find(start)
+    if i == -1:
+        return ""
+    i += len(start)
+    stops = [j for j in (text.find(end, i) for end in ends) if j != -1]
+    return text[i:min(stops)] if stops else text[i:]
+
+
+def _slide_text(prompt: str) -> str:
+    if "Slide text:\n" in prompt:
+        return _between(prompt, "Slide text:\n", ("\n\nConcepts:", "\n\nJSON:"))
+    return _between(prompt, "TEXT:\n", ("\n\nGenerate",))
+
+
+def _sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_RE.split(text) if len(s.split()) >= MIN_CONCEPT_WORDS]
+
+
+def _confidence(sentence: str) -> float:
+    """Stable pseudo-random confidence in [0.4, 1.0), so the hard filter drops some concepts."""
+    digest = hashlib.sha1(sentence.encode("utf-8")).digest()
+    return round(0.4 + (digest[0] % 60) / 100, 2)
+
+
+def _concepts(text: str, limit: int) -> List[dict]:
+    concepts = []
+    for i, sentence in enumerate(_sentences(text)[:limit]):
+        words = sentence.split()
+        label = " ".join(words[:4])
+        concepts.append({
+            "id": f"c{i + 1}",
+            "concept": label,
+            "question": f"What does the slide state about {label}?",
+            "evidence": " ".join(words[:25]),
+            "confidence": _confidence(sentence),
+            "should_generate": True,
+            "answer": sentence[:300],
+        })
+    return concepts
+
+
+def build_completion(prompt: str) -> str:
+    """The stub's answer to a generator prompt (deterministic)."""
+    kind = prompt_kind(prompt)
+    text = _slide_text(prompt)
+    if kind == "plan":
+        limit = int((_MAX_CONCEPTS_RE.search(prompt) or [0, 6])[1])
+        concepts = [{k: v for k, v in c.items() if k != "answer"} for c in _concepts(text, limit)]
+        return json.dumps({"concepts": concepts}, ensure_ascii=False)
+    if kind == "generate":
+        try:
+            planned = json.loads(_between(prompt, "Concepts:\n", ("\n\nJSON:",)))
+        except ValueError:
+            planned = []
+        results = [{
+            "concept_id": c.get("id", ""),
+            "status": "ok",
+            "question": c.get("question", ""),
+            "answer": c.get("evidence", ""),
+        } for c in planned]
+        return json.dumps({"results": results}, ensure_ascii=False)
+    if kind == "fused":
+        limit = int((_MAX_CONCEPTS_RE.search(prompt) or [0, 6])[1])
+        cards = [{k: v for k, v in c.items() if k != "id"} for c in _concepts(text, limit)]
+        return json.dumps({"cards": cards}, ensure_ascii=False)
+    limit = int((_NUM_CARDS_RE.search(prompt) or [0, 3])[1])
+    cards = [{"question": c["question"], "answer": c["answer"]} for c in _concepts(text, limit)]
+    return json.dumps({"flashcards": cards}, ensure_ascii=False)
+
+
+class StubLLM:
+    """
+    Response and latency model shared by the in-process client and the stub server.
+
+    Args:
+        latency: Fixed seconds per call (time to first token)
+        prefill_tps: Prompt tokens processed per second (0 = free)
+        decode_tps: Completion tokens generated per second (0 = instant)
+        canned: Fixed responses per prompt kind ("plan", "generate", "fused",
+            "direct"), replacing the generated JSON
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        prefill_tps: float = 0.0,
+        decode_tps: float = 0.0,
+        canned: Optional[Dict[str, str]] = None
+    ):
+        self.latency = latency
+        self.prefill_tps = prefill_tps
+        self.decode_tps = decode_tps
+        self.canned = canned or {}
+
+    def complete(self, payload: dict) -> Tuple[str, dict]:
+        """Return (content, usage) for a chat completion payload."""
+        prompt = "\n".join(str(m.get("content", "")) for m in payload.get("messages", []))
+        kind = prompt_kind(prompt)
+        content = self.canned[kind] if kind in self.canned else build_completion(prompt)
+        usage = {
+            "prompt_tokens": estimate_tokens(prompt),
+            "completion_tokens": estimate_tokens(content),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        return content, usage
+
+    def first_token_delay(self, usage: dict) -> float:
+        prefill = usage["prompt_tokens"] / self.prefill_tps if self.prefill_tps > 0 else 0.0
+        return self.latency + prefill
+
+    def decode_delay(self, tokens: int) -> float:
+        return tokens / self.decode_tps if self.decode_tps > 0 else 0.0
+
+
+def completion_response(content: str, usage: dict, model: str = "stub") -> dict:
+    """Non-streaming chat completion body."""
+    return {
+        "object": "chat.completion",
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": usage,
+    }
+
+
+def stream_chunks(content: str, usage: dict, chunk_chars: int = 16, model: str = "stub") -> Iterator[dict]:
+    """Streaming chat completion chunks: content deltas, then a usage-only chunk."""
+    for i in range(0, len(content), chunk_chars):
+        yield {
+            "object": "chat.completion.chunk",
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": content[i:i + chunk_chars]}, "finish_reason": None}],
+        }
+    yield {"object": "chat.completion.chunk", "model": model, "choices": [], "usage": usage}
+
+
+class StubLLMClient:
+    """In-process drop-in for ProviderClient (chat_completion / chat_completion_stream)."""
+
+    def __init__(self, llm: Optional[StubLLM] = None, chunk_chars: int = 16):
+        self.llm = llm or StubLLM()
+        self.chunk_chars = chunk_chars
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def chat_completion(self, payload: dict) -> dict:
+        with self._lock:
+            self.requests += 1
+        content, usage = self.llm.complete(payload)
+        time.sleep(self.llm.first_token_delay(usage) + self.llm.decode_delay(usage["completion_tokens"]))
+        return completion_response(content, usage)
+
+    def chat_completion_stream(self, payload: dict) -> Iterator[dict]:
+        with self._lock:
+            self.requests += 1
+        content, usage = self.llm.complete(payload)
+        time.sleep(self.llm.first_token_delay(usage))
+        for chunk in stream_chunks(content, usage, self.chunk_chars):
+            if chunk["choices"]:
+                time.sleep(self.llm.decode_delay(estimate_tokens(chunk["choices"][0]["delta"]["content"])))
+            yield chunk
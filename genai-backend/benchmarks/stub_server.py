@@ -0,0 +1,205 @@
+"""
+Local OpenAI-compatible stub LLM server (POST /v1/chat/completions, incl. streaming).
+
+Answers with the deterministic JSON of benchmarks/stub_llm.py, or with canned
+responses per prompt kind, and simulates a model server: time to first
+token, decode speed, a cap on concurrently processed requests (further
+requests queue, like a single GPU) and random errors.
+
+Point the backend at it with `lmstudio_url=http://127.0.0.1:1235/v1`.
+
+Usage (from genai-backend/):
+    python -m benchmarks.stub_server
+    python -m benchmarks.stub_server --port 1235 --latency-ms 300 --decode-tps 40 --max-concurrency 2
+    python -m benchmarks.stub_server --error-rate 0.05 --error-status 429 --retry-after 2
+    python -m benchmarks.stub_server --canned fused=cards.json --canned plan=concepts.json
+"""
+import argparse
+import json
+import random
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from benchmarks.stub_llm import StubLLM, completion_response, prompt_kind, stream_chunks
+from services.chunk_planner import estimate_tokens
+
+PROMPT_KINDS = ("plan", "generate", "fused", "direct")
+
+
+class StubServerState:
+    """Configuration and counters of a running stub server."""
+
+    def __init__(
+        self,
+        llm: StubLLM,
+        max_concurrency: int = 0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        retry_after: float = 0.0,
+        chunk_chars: int = 16,
+        seed: int = 0
+    ):
+        self.llm = llm
+        self.slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency > 0 else None
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.chunk_chars = chunk_chars
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.queued = 0
+        self.by_kind = {kind: 0 for kind in PROMPT_KINDS}
+
+    def admit(self, kind: str) -> bool:
+        """Count a request; False if it is picked for an injected error."""
+        with self._lock:
+            self.requests += 1
+            self.by_kind[kind] += 1
+            if self._rng.random() < self.error_rate:
+                self.errors += 1
+                return False
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "in_flight": self.in_flight,
+                "queued": self.queued,
+                "by_kind": dict(self.by_kind),
+            }
+
+    def begin(self) -> None:
+        """Wait for a processing slot (max_concurrency)."""
+        if self.slots is not None:
+            with self._lock:
+                self.queued += 1
+            self.slots.acquire()
+            with self._lock:
+                self.queued -= 1
+        with self._lock:
+            self.in_flight += 1
+
+    def end(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        if self.slots is not None:
+            self.slots.release()
+
+
+def create_app(state: StubServerState) -> FastAPI:
+    app = FastAPI(title="Stub LLM", description="OpenAI-compatible stand-in for benchmarks")
+
+    def error_response() -> JSONResponse:
+        headers = {"Retry-After": f"{state.retry_after:g}"} if state.retry_after > 0 else None
+        return JSONResponse(
+            status_code=state.error_status,
+            content={"error": {"message": "stub: injected error", "type": "server_error"}},
+            headers=headers,
+        )
+
+    @app.get("/v1/models")
+    def list_models():
+        return {"object": "list", "data": [{"id": "stub", "object": "model"}]}
+
+    @app.get("/stats")
+    def get_stats():
+        return state.stats()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        kind = prompt_kind("\n".join(str(m.get("content", "")) for m in payload.get("messages", [])))
+        if not state.admit(kind):
+            return error_response()
+
+        content, usage = state.llm.complete(payload)
+        model = payload.get("model") or "stub"
+        if payload.get("stream"):
+            return StreamingResponse(stream(content, usage, model), media_type="text/event-stream")
+        return await run_in_threadpool(complete, content, usage, model)
+
+    def complete(content: str, usage: dict, model: str) -> dict:
+        state.begin()
+        try:
+            time.sleep(state.llm.first_token_delay(usage) + state.llm.decode_delay(usage["completion_tokens"]))
+            return completion_response(content, usage, model)
+        finally:
+            state.end()
+
+    def stream(content: str, usage: dict, model: str):
+        # Sync generator: Starlette iterates it in a worker thread
+        state.begin()
+        try:
+            time.sleep(state.llm.first_token_delay(usage))
+            for chunk in stream_chunks(content, usage, state.chunk_chars, model):
+                if chunk["choices"]:
+                    time.sleep(state.llm.decode_delay(estimate_tokens(chunk["choices"][0]["delta"]["content"])))
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            yield "data: [DONE]\n\n"
+        finally:
+            state.end()
+
+    return app
+
+
+def parse_canned(values) -> dict:
+    canned = {}
+    for value in values or []:
+        kind, _, path = value.partition("=")
+        if kind not in PROMPT_KINDS or not path:
+            raise SystemExit(f"--canned expects KIND=FILE with KIND in {PROMPT_KINDS}, got {value!r}")
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        json.loads(text)  # fail early on invalid JSON
+        canned[kind] = text
+    return canned
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1235)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Time to first token")
+    parser.add_argument("--prefill-tps", type=float, default=0.0, help="Prompt tokens/sec (0 = free)")
+    parser.add_argument("--decode-tps", type=float, default=50.0, help="Completion tokens/sec per request (0 = instant)")
+    parser.add_argument("--max-concurrency", type=int, default=1,
+                        help="Requests processed at once, the rest queue (0 = unlimited); "
+                             "throughput cap = max-concurrency x decode-tps")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status of injected errors")
+    parser.add_argument("--retry-after", type=float, default=0.0, help="Retry-After seconds sent with errors")
+    parser.add_argument("--chunk-chars", type=int, default=16, help="Characters per streamed delta")
+    parser.add_argument("--canned", action="append", metavar="KIND=FILE",
+                        help=f"Fixed response for a prompt kind {PROMPT_KINDS} (repeatable)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the error injection")
+    args = parser.parse_args()
+
+    state = StubServerState(
+        StubLLM(
+            latency=args.latency_ms / 1000,
+            prefill_tps=args.prefill_tps,
+            decode_tps=args.decode_tps,
+            canned=parse_canned(args.canned),
+        ),
+        max_concurrency=args.max_concurrency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after=args.retry_after,
+        chunk_chars=args.chunk_chars,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(state), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
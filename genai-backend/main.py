@@ -1,18 +1,38 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 import os
-from models.db import Base, engine
-from routers import projects, flashcards, files
+from models.db import SessionLocal
+from models.migrations import init_db
+from routers import projects, flashcards, files, jobs, search, study, system
+from services.jobs import worker
+from services.metrics import track_commit_latency
+from services.search import backfill_page_index, rebuild_card_index
 
-# Initialize database
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create missing tables and apply pending schema migrations
+    init_db()
+    # Make extractions stored before the search index existed searchable
+    backfill_page_index()
+    # Card rowids may have been renumbered by a VACUUM since the last run
+    rebuild_card_index()
+    # Resume unfinished ingestion jobs and start processing new ones
+    worker.start()
+    yield
+    worker.stop()
+
+
+# DB commit latency for /api/metrics
+track_commit_latency(SessionLocal)
 
 app = FastAPI(
     title="GenAI Backend API",
     description="Backend for flashcard management with PDF/Image extraction",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -24,12 +44,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Total-Count"],
 )
 
 # Include routers
 app.include_router(projects.router)
 app.include_router(flashcards.router)
 app.include_router(files.router)
+app.include_router(jobs.router)
+app.include_router(study.router)
+app.include_router(search.router)
+app.include_router(system.router)
 
 # --- STATIC FILE SERVING ---
 
@@ -0,0 +1,157 @@
+"""
+Versioned schema migrations.
+
+`create_all` only creates missing tables; it never changes tables that already
+exist in an `app.db`. Every schema change to an existing table is therefore
+added here as a new, numbered migration. Migrations are idempotent, because
+fresh databases already get the current schema from `create_all`.
+"""
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from .db import Base, engine as default_engine
+from . import tables  # noqa: F401  (registers the ORM tables on Base)
+
+
+def _columns(conn: Connection, table: str) -> set:
+    return {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str) -> None:
+    if column not in _columns(conn, table):
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+def _create_index(conn: Connection, name: str, table: str, columns: str) -> None:
+    conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+def _001_content_hash_and_job_cache_flag(conn: Connection) -> None:
+    _add_column(conn, "files", "content_hash", "VARCHAR REFERENCES blobs (sha256)")
+    _create_index(conn, "ix_files_content_hash", "files", "content_hash")
+    _add_column(conn, "ingestion_jobs", "use_llm_cache", "INTEGER DEFAULT 1")
+
+
+def _002_per_project_indexes(conn: Connection) -> None:
+    _create_index(conn, "ix_flashcards_project_id_level", "flashcards", "project_id, level")
+    _create_index(conn, "ix_flashcards_project_id_updated_at", "flashcards", "project_id, updated_at")
+    _create_index(conn, "ix_flashcards_project_id_created_at_id", "flashcards", "project_id, created_at, id")
+    _create_index(conn, "ix_flashcards_updated_at", "flashcards", "updated_at")
+    _create_index(conn, "ix_files_project_id", "files", "project_id")
+    _create_index(conn, "ix_projects_updated_at", "projects", "updated_at")
+    _create_index(conn, "ix_ingestion_jobs_project_id", "ingestion_jobs", "project_id")
+    _create_index(conn, "ix_ingestion_jobs_file_id", "ingestion_jobs", "file_id")
+    conn.exec_driver_sql("ANALYZE")
+
+
+def _003_scheduler_columns(conn: Connection) -> None:
+    _add_column(conn, "flashcards", "due_at", "DATETIME")
+    _add_column(conn, "flashcards", "interval_days", "FLOAT DEFAULT 0.0")
+    _add_column(conn, "flashcards", "ease", "FLOAT DEFAULT 2.5")
+    _add_column(conn, "flashcards", "repetitions", "INTEGER DEFAULT 0")
+    # Existing cards become due right away, oldest first
+    conn.exec_driver_sql("UPDATE flashcards SET due_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE due_at IS NULL")
+    _create_index(conn, "ix_flashcards_project_id_due_at", "flashcards", "project_id, due_at")
+
+
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+
+
+def _004_full_text_search(conn: Connection) -> None:
+    # External-content FTS5 indexes: the text is stored once, in the base tables,
+    # and kept in sync by triggers. project_id / doc_key are indexed as well so a
+    # search is restricted to one project inside the index (weight 0 in bm25).
+    # flashcards_fts is keyed by the implicit rowid of flashcards, which a VACUUM
+    # may renumber: the index is rebuilt at startup (services.search.rebuild_card_index).
+    card_cols = "question, answer, project_id"
+    card_new = "new.question, new.answer, new.project_id"
+    card_old = "old.question, old.answer, old.project_id"
+    conn.exec_driver_sql(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS flashcards_fts USING fts5({card_cols},"
+        f" content='flashcards', tokenize='{FTS_TOKENIZER}')"
+    )
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS flashcards_fts_ai AFTER INSERT ON flashcards BEGIN"
+        f" INSERT INTO flashcards_fts(rowid, {card_cols}) VALUES (new.rowid, {card_new});"
+        " END"
+    )
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS flashcards_fts_ad AFTER DELETE ON flashcards BEGIN"
+        f" INSERT INTO flashcards_fts(flashcards_fts, rowid, {card_cols}) VALUES ('delete', old.rowid, {card_old});"
+        " END"
+    )
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS flashcards_fts_au AFTER UPDATE OF {card_cols} ON flashcards BEGIN"
+        f" INSERT INTO flashcards_fts(flashcards_fts, rowid, {card_cols}) VALUES ('delete', old.rowid, {card_old});"
+        f" INSERT INTO flashcards_fts(rowid, {card_cols}) VALUES (new.rowid, {card_new});"
+        " END"
+    )
+    conn.exec_driver_sql("INSERT INTO flashcards_fts(flashcards_fts) VALUES ('rebuild')")
+
+    conn.exec_driver_sql(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS page_texts_fts USING fts5(text, doc_key,"
+        f" content='page_texts', content_rowid='id', tokenize='{FTS_TOKENIZER}')"
+    )
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS page_texts_fts_ai AFTER INSERT ON page_texts BEGIN"
+        " INSERT INTO page_texts_fts(rowid, text, doc_key) VALUES (new.id, new.text, new.doc_key);"
+        " END"
+    )
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS page_texts_fts_ad AFTER DELETE ON page_texts BEGIN"
+        " INSERT INTO page_texts_fts(page_texts_fts, rowid, text, doc_key) VALUES ('delete', old.id, old.text, old.doc_key);"
+        " END"
+    )
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS page_texts_fts_au AFTER UPDATE OF text, doc_key ON page_texts BEGIN"
+        " INSERT INTO page_texts_fts(page_texts_fts, rowid, text, doc_key) VALUES ('delete', old.id, old.text, old.doc_key);"
+        " INSERT INTO page_texts_fts(rowid, text, doc_key) VALUES (new.id, new.text, new.doc_key);"
+        " END"
+    )
+    conn.exec_driver_sql("INSERT INTO page_texts_fts(page_texts_fts) VALUES ('rebuild')")
+
+
+# (version, description, upgrade) - append only, never renumber
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "files.content_hash and ingestion_jobs.use_llm_cache", _001_content_hash_and_job_cache_flag),
+    (2, "per-project indexes on flashcards, files, projects and jobs", _002_per_project_indexes),
+    (3, "spaced-repetition columns and due queue index", _003_scheduler_columns),
+    (4, "FTS5 search indexes for flashcards and extracted pages", _004_full_text_search),
+]
+
+
+def current_version(conn: Connection) -> int:
+    conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        " version INTEGER PRIMARY KEY,"
+        " description TEXT,"
+        " applied_at DATETIME)"
+    )
+    return conn.exec_driver_sql("SELECT COALESCE(MAX(version), 0) FROM schema_version").scalar()
+
+
+def run_migrations(engine: Engine = default_engine) -> int:
+    """Apply all pending migrations, each in its own transaction. Returns the schema version."""
+    with engine.begin() as conn:
+        version = current_version(conn)
+    for number, description, upgrade in MIGRATIONS:
+        if number <= version:
+            continue
+        with engine.begin() as conn:
+            upgrade(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": number, "d": description, "t": datetime.utcnow()}
+            )
+        print(f"Applied migration {number}: {description}")
+        version = number
+    return version
+
+
+def init_db(engine: Engine = default_engine) -> int:
+    """Create missing tables, then bring existing ones up to the current schema."""
+    Base.metadata.create_all(bind=engine)
+    return run_migrations(engine)
@@ -7,6 +7,10 @@ class TextChunk(BaseModel):
     page_number: int
     source_file: str
     type: str = "text"
+    # Source pages of a packed chunk (see services/chunk_planner.py); None = page_number only
+    pages: Optional[List[int]] = None
+    # Part of a split page whose text continues in the next chunk
+    partial: bool = False
 
 # The complete result that we store or send to the LLM
 class ProcessedDocument(BaseModel):
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Text, ForeignKey, DateTime
+from sqlalchemy import Column, String, Integer, Float, Text, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -16,9 +16,10 @@ class Project(Base):
     flashcard_scope = Column(String, default="all_slides")  # all_slides, per_set, per_slide
     flashcard_density = Column(Integer, default=5)  # 1-10 scale
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     files = relationship("File", back_populates="project", cascade="all, delete-orphan")
     flashcards = relationship("Flashcard", back_populates="project", cascade="all, delete-orphan")
+    jobs = relationship("IngestionJob", back_populates="project", cascade="all, delete-orphan")
 
 class File(Base):
     __tablename__ = "files"
@@ -28,19 +29,91 @@ class File(Base):
     mime_type = Column(String)
     size = Column(Integer)
     category = Column(String, default="lecture_notes")  # lecture_notes or extended_info
-    project_id = Column(String, ForeignKey("projects.id"))
+    content_hash = Column(String, ForeignKey("blobs.sha256"), nullable=True, index=True)  # SHA-256 of the content
+    project_id = Column(String, ForeignKey("projects.id"), index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     project = relationship("Project", back_populates="files")
+    jobs = relationship("IngestionJob", back_populates="file", cascade="all, delete-orphan")
+
+class Blob(Base):
+    """Content-addressed upload, shared by all File rows with the same SHA-256."""
+    __tablename__ = "blobs"
+    sha256 = Column(String, primary_key=True)
+    stored_path = Column(String)
+    size = Column(Integer)
+    ref_count = Column(Integer, default=0)  # number of File rows pointing at this blob
+    created_at = Column(DateTime, default=datetime.utcnow)
 
 class Flashcard(Base):
     __tablename__ = "flashcards"
+    # project_id lookups use the leftmost column of the composite indexes
+    __table_args__ = (
+        Index("ix_flashcards_project_id_level", "project_id", "level"),
+        Index("ix_flashcards_project_id_updated_at", "project_id", "updated_at"),
+        Index("ix_flashcards_project_id_created_at_id", "project_id", "created_at", "id"),
+        Index("ix_flashcards_project_id_due_at", "project_id", "due_at"),
+    )
     id = Column(String, primary_key=True, default=_uuid)
     question = Column(Text)
     answer = Column(Text)
     level = Column(Integer, default=0)
     important = Column(Integer, default=0)
     review_count = Column(Integer, default=0)
+    # Spaced-repetition state (see services/scheduler.py)
+    due_at = Column(DateTime, default=datetime.utcnow)
+    interval_days = Column(Float, default=0.0)
+    ease = Column(Float, default=2.5)
+    repetitions = Column(Integer, default=0)  # consecutive successful reviews
     project_id = Column(String, ForeignKey("projects.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    project = relationship("Project", back_populates="flashcards")
+    reviews = relationship("ReviewLog", back_populates="flashcard", cascade="all, delete-orphan")
+
+class ReviewLog(Base):
+    """Append-only history of study reviews (one row per answered card)."""
+    __tablename__ = "review_log"
+    id = Column(String, primary_key=True, default=_uuid)
+    card_id = Column(String, ForeignKey("flashcards.id"), index=True)
+    project_id = Column(String, ForeignKey("projects.id"), index=True)
+    level = Column(Integer)
+    reviewed_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    flashcard = relationship("Flashcard", back_populates="reviews")
+
+class PageText(Base):
+    """
+    Extracted page text, the content of the `page_texts_fts` search index.
+
+    Keyed by the blob hash (or the file id for files stored before content
+    addressing), so content shared by several files is indexed once.
+    """
+    __tablename__ = "page_texts"
+    __table_args__ = (
+        Index("ix_page_texts_doc_key_page_number", "doc_key", "page_number"),
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    doc_key = Column(String, nullable=False)
+    page_number = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+    id = Column(String, primary_key=True, default=_uuid)
+    project_id = Column(String, ForeignKey("projects.id"), index=True)
+    file_id = Column(String, ForeignKey("files.id"), index=True)
+    status = Column(String, default="queued", index=True)  # queued, running, done, failed
+    provider = Column(String, default="lmstudio")
+    lmstudio_url = Column(String, nullable=True)
+    use_llm_cache = Column(Integer, default=1)  # 0 = bypass the LLM response cache
+    total_pages = Column(Integer, default=0)
+    pages_done = Column(Integer, default=0)
+    last_page = Column(Integer, default=0)  # highest page number whose cards are committed
+    cards_created = Column(Integer, default=0)
+    errors = Column(Text, default="[]")  # JSON list of error messages
+    attempts = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    project = relationship("Project", back_populates="flashcards")
\ No newline at end of file
+    finished_at = Column(DateTime, nullable=True)
+    project = relationship("Project", back_populates="jobs")
+    file = relationship("File", back_populates="jobs")
@@ -4,31 +4,15 @@ from sqlalchemy.orm import Session
 from typing import List
 from pydantic import BaseModel, Field
 from typing import Optional
-import shutil
 import os
 from models.db import get_db
-from models.tables import Project as ProjectORM, File as FileORM, Flashcard as FlashcardORM
-from services.extractor import ContentExtractor
-from services.card_generator import CardGenerator
+from models.tables import Project as ProjectORM, File as FileORM, IngestionJob
+from services.jobs import worker, build_generator, job_priority
+from services.retrieval import retrieval
+from services.storage import store_blob, release_file_content, remove_files, extracted_paths
 
 router = APIRouter(tags=["files"])
 
-# Upload directories
-UPLOAD_DIR = "uploads"
-LECTURE_NOTES_DIR = os.path.join(UPLOAD_DIR, "lecture_notes")
-EXTENDED_INFO_DIR = os.path.join(UPLOAD_DIR, "extended_info")
-EXTRACTED_DIR = os.path.join(UPLOAD_DIR, "extracted")
-EXTRACTED_LECTURE_DIR = os.path.join(EXTRACTED_DIR, "lecture_notes")
-EXTRACTED_EXTENDED_DIR = os.path.join(EXTRACTED_DIR, "extended_info")
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-os.makedirs(LECTURE_NOTES_DIR, exist_ok=True)
-os.makedirs(EXTENDED_INFO_DIR, exist_ok=True)
-os.makedirs(EXTRACTED_DIR, exist_ok=True)
-os.makedirs(EXTRACTED_LECTURE_DIR, exist_ok=True)
-os.makedirs(EXTRACTED_EXTENDED_DIR, exist_ok=True)
-
-extractor = ContentExtractor()
-
 class FileMeta(BaseModel):
     id: str
     original_filename: str
@@ -45,20 +29,24 @@ async def upload_files(
     category: str = "lecture_notes",
     lmstudio_url: Optional[str] = None,
     openai_api_key: Optional[str] = None,
+    use_cache: bool = True,
     db: Session = Depends(get_db)
 ):
     """
-    Upload and process files for a project
-    - Stores the file on the filesystem in category-specific subdirectory
-    - Extracts text with OCR (PDF/Image)
-    - Stores extraction as JSON and Markdown
-    - Generates flashcards using specified LLM provider
+    Upload files for a project and queue their processing
+    - Stores the file content-addressed (SHA-256); identical content that was
+      already uploaded (to any project) is neither written nor extracted again
+    - Creates one ingestion job per file and returns immediately
+    - The background worker extracts text with OCR (PDF/Image), stores the
+      extraction as JSON and Markdown and generates flashcards using the
+      specified LLM provider; poll `GET /jobs/{job_id}` for progress
     
     Query parameters:
     - provider: "lmstudio" (default) or "openai"
     - openai_api_key: Required if provider is "openai"
     - category: "lecture_notes" (default) or "extended_info"
     - lmstudio_url: Optional override for LMStudio base URL (default: http://127.0.0.1:1234/v1)
+    - use_cache: Set to false to bypass the LLM response cache (fresh generations)
     """
     project = db.query(ProjectORM).filter(ProjectORM.id == project_id).first()
     if not project:
@@ -67,89 +55,40 @@ async def upload_files(
     category = category or "lecture_notes"
     if category not in ("lecture_notes", "extended_info"):
         raise HTTPException(status_code=400, detail="Invalid category")
-    category_dir = LECTURE_NOTES_DIR if category == "lecture_notes" else EXTENDED_INFO_DIR
     lmstudio_url = lmstudio_url or "http://127.0.0.1:1234/v1"
+    provider = "openai" if provider == "openai" else "lmstudio"
     
-    # Initialize CardGenerator with selected provider
+    # Validate provider settings before accepting any file
     try:
-        if provider == "openai":
-            if not openai_api_key:
-                raise HTTPException(
-                    status_code=400,
-                    detail="openai_api_key is required when using OpenAI provider"
-                )
-            generator = CardGenerator(provider="openai", openai_api_key=openai_api_key)
-        else:
-            generator = CardGenerator(provider="lmstudio", lmstudio_url=lmstudio_url)
+        build_generator(provider=provider, lmstudio_url=lmstudio_url, openai_api_key=openai_api_key)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
     results = []
     for f in files:
-        safe_filename = f"{project_id}_{f.filename}"
-        file_path = os.path.join(category_dir, safe_filename)
-        
         try:
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(f.file, buffer)
-            
-            size = os.path.getsize(file_path)
+            blob = store_blob(db, f.file, f.filename)
             file_record = FileORM(
                 original_filename=f.filename,
-                stored_path=file_path,
+                stored_path=blob.stored_path,
                 mime_type=f.content_type,
-                size=size,
+                size=blob.size,
                 category=category,
+                content_hash=blob.sha256,
                 project_id=project_id
             )
             db.add(file_record)
-            db.commit()
-            db.refresh(file_record)
-            
-            # Extract text from PDF/image
-            processed = extractor.process_file(file_path, f.filename)
-            
-            # Save as JSON (segregated by category)
-            target_extracted_dir = EXTRACTED_LECTURE_DIR if file_record.category == "lecture_notes" else EXTRACTED_EXTENDED_DIR
-            extracted_json_path = os.path.join(target_extracted_dir, f"{file_record.id}.json")
-            with open(extracted_json_path, "w", encoding="utf-8") as jf:
-                jf.write(processed.json())
-            
-            # Save as Markdown (better for LLM processing)
-            extracted_md_path = os.path.join(target_extracted_dir, f"{file_record.id}.md")
-            md_lines = [f"# {processed.filename}\n", f"**Total Pages:** {processed.total_pages}\n\n"]
-            for chunk in processed.chunks:
-                md_lines.append(f"## Page {chunk.page_number}\n\n{chunk.text}\n\n---\n\n")
-            with open(extracted_md_path, "w", encoding="utf-8") as mf:
-                mf.writelines(md_lines)
-            
-            # Generate flashcards automatically
-            generated_cards = generator.generate_cards_from_document(
-                document=processed,
-                cards_per_chunk=3,
-                difficulty_level=0
+            db.flush()
+            job = IngestionJob(
+                project_id=project_id,
+                file_id=file_record.id,
+                provider=provider,
+                lmstudio_url=lmstudio_url if provider == "lmstudio" else None,
+                use_llm_cache=1 if use_cache else 0
             )
-            
-            # Save generated cards to database
-            cards_saved = []
-            for card in generated_cards:
-                flashcard = FlashcardORM(
-                    question=card.question,
-                    answer=card.answer,
-                    level=card.level,
-                    important=0,
-                    review_count=0,
-                    project_id=project_id
-                )
-                db.add(flashcard)
-                db.commit()
-                db.refresh(flashcard)
-                cards_saved.append({
-                    "id": flashcard.id,
-                    "question": flashcard.question,
-                    "answer": flashcard.answer,
-                    "level": flashcard.level
-                })
+            db.add(job)
+            db.commit()
+            worker.enqueue(job.id, openai_api_key=openai_api_key, priority=job_priority(category))
             
             results.append({
                 "file": {
@@ -159,13 +98,13 @@ async def upload_files(
                     "size": file_record.size,
                     "category": file_record.category
                 },
-                "processed": processed.dict(),
-                "generated_cards": cards_saved,
-                "cards_count": len(cards_saved)
+                "job_id": job.id,
+                "status": job.status
             })
         
         except Exception as e:
-            print(f"Error processing {f.filename}: {e}")
+            db.rollback()
+            print(f"Error storing {f.filename}: {e}")
             continue
     
     return results
@@ -201,14 +140,15 @@ def delete_file(project_id: str, file_id: str, db: Session = Depends(get_db)):
     if not file_obj:
         raise HTTPException(status_code=404, detail="File not found")
     
-    try:
-        if os.path.exists(file_obj.stored_path):
-            os.remove(file_obj.stored_path)
-    except Exception as e:
-        print(f"Error deleting file from filesystem: {e}")
-    
+    category = file_obj.category
+    # Shared content is only removed once no other file references it
+    released = release_file_content(db, file_obj)
     db.delete(file_obj)
     db.commit()
+    remove_files(released)
+    if category == "extended_info":
+        # Its passages must no longer enrich prompts
+        retrieval.invalidate(project_id)
     return {"status": "success"}
 
 
@@ -236,21 +176,19 @@ def get_file_raw(file_id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/files/{file_id}/extracted")
-def get_file_extracted(file_id: str, format: str = "json"):
+def get_file_extracted(file_id: str, format: str = "json", db: Session = Depends(get_db)):
     """
     Retrieve extracted text of a file
     - format=json: Structured JSON with pages
     - format=md: Markdown format for LLM processing
     """
-    ext = "json" if format == "json" else "md"
-    # Try lecture_notes first, then extended_info
-    candidates = [
-        os.path.join(EXTRACTED_LECTURE_DIR, f"{file_id}.{ext}"),
-        os.path.join(EXTRACTED_EXTENDED_DIR, f"{file_id}.{ext}")
-    ]
-    extracted_path = next((p for p in candidates if os.path.exists(p)), None)
+    file_obj = db.query(FileORM).filter(FileORM.id == file_id).first()
+    if not file_obj:
+        raise HTTPException(status_code=404, detail="File not found")
+    json_path, md_path = extracted_paths(file_obj)
+    extracted_path = json_path if format == "json" else md_path
     
-    if not extracted_path:
+    if not os.path.exists(extracted_path):
         raise HTTPException(status_code=404, detail="Extraction file not found")
     
     with open(extracted_path, "r", encoding="utf-8") as f:
@@ -1,9 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 from pydantic import BaseModel
+from datetime import datetime, timezone
+import base64
+import hashlib
+import uuid
+from sqlalchemy import insert, func, or_, and_
 from models.db import get_db
-from models.tables import Project as ProjectORM, Flashcard as FlashcardORM
+from models.tables import Project as ProjectORM, Flashcard as FlashcardORM, ReviewLog
+from services.flashcard_store import bulk_create_flashcards
+from services.dedup import DEDUP_THRESHOLD, find_duplicate_groups, merge_duplicates
+from services.scheduler import apply_review
 
 router = APIRouter(tags=["flashcards"])
 
@@ -17,11 +26,20 @@ class Flashcard(FlashcardBase):
     important: int = 0
     review_count: int = 0
 
+class FlashcardLevel(BaseModel):
+    """Projection returned by GET /flashcards?fields=levels."""
+    id: str
+    level: Optional[int] = 0
+    review_count: int = 0
+
 class FlashcardCreate(BaseModel):
     question: str
     answer: str
     level: Optional[int] = 0
 
+class FlashcardBatchCreate(BaseModel):
+    cards: List[FlashcardCreate]
+
 class FlashcardUpdate(BaseModel):
     question: Optional[str] = None
     answer: Optional[str] = None
@@ -33,24 +51,115 @@ class FlashcardLevelUpdate(BaseModel):
     level: Optional[int] = None
     review_count: Optional[int] = None
 
+class ReviewEvent(BaseModel):
+    card_id: str
+    level: int
+    reviewed_at: Optional[datetime] = None
+
+class ReviewBatch(BaseModel):
+    reviews: List[ReviewEvent]
+
+class ReviewBatchResult(BaseModel):
+    applied: int
+    unknown_card_ids: List[str] = []
+
+class DuplicateCard(BaseModel):
+    id: str
+    similarity: float
+
+class DuplicateGroup(BaseModel):
+    keep: str
+    duplicates: List[DuplicateCard]
+
+class DedupeResult(BaseModel):
+    groups: List[DuplicateGroup]
+    removed: int
+    dry_run: bool
+
+
+def _encode_cursor(created_at: datetime, card_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{card_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
 
-@router.get("/projects/{project_id}/flashcards", response_model=List[Flashcard])
-def get_flashcards(project_id: str, db: Session = Depends(get_db)):
-    """Retrieve all flashcards for a project"""
+def _decode_cursor(cursor: str):
+    try:
+        created_at, card_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(created_at), card_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/projects/{project_id}/flashcards", response_model=Union[List[Flashcard], List[FlashcardLevel]])
+def get_flashcards(
+    project_id: str,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=5000),
+    cursor: Optional[str] = None,
+    fields: str = "full",
+    db: Session = Depends(get_db)
+):
+    """
+    Retrieve flashcards for a project, ordered by (created_at, id)
+    - limit/cursor: keyset pagination; the next cursor is sent in the X-Next-Cursor header
+    - fields=levels: lightweight projection with id, level and review_count only
+    - Sends a strong ETag; If-None-Match with an unchanged deck returns 304 Not Modified
+    """
+    if fields not in ("full", "levels"):
+        raise HTTPException(status_code=400, detail="Invalid fields")
     project = db.query(ProjectORM).filter(ProjectORM.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    items = db.query(FlashcardORM).filter(FlashcardORM.project_id == project_id).all()
-    return [
-        Flashcard(
-            id=i.id,
-            question=i.question,
-            answer=i.answer,
-            level=i.level,
-            important=i.important if i.important is not None else 0,
-            review_count=i.review_count if i.review_count is not None else 0
-        ) for i in items
-    ]
+    
+    # Every create/update bumps max(updated_at), every delete changes the count
+    latest, count = db.query(
+        func.max(FlashcardORM.updated_at), func.count(FlashcardORM.id)
+    ).filter(FlashcardORM.project_id == project_id).one()
+    version = f"{project_id}|{latest.isoformat() if latest else ''}|{count}|{limit}|{cursor}|{fields}"
+    etag = '"' + hashlib.sha256(version.encode("utf-8")).hexdigest()[:32] + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    
+    if fields == "levels":
+        columns = (FlashcardORM.id, FlashcardORM.level, FlashcardORM.review_count, FlashcardORM.created_at)
+    else:
+        columns = (
+            FlashcardORM.id, FlashcardORM.level, FlashcardORM.review_count, FlashcardORM.created_at,
+            FlashcardORM.question, FlashcardORM.answer, FlashcardORM.important
+        )
+    q = db.query(*columns).filter(FlashcardORM.project_id == project_id)
+    if cursor:
+        after_created, after_id = _decode_cursor(cursor)
+        q = q.filter(or_(
+            FlashcardORM.created_at > after_created,
+            and_(FlashcardORM.created_at == after_created, FlashcardORM.id > after_id)
+        ))
+    q = q.order_by(FlashcardORM.created_at, FlashcardORM.id)
+    if limit is not None:
+        q = q.limit(limit)
+    rows = q.all()
+    
+    if limit is not None and len(rows) == limit:
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1].created_at, rows[-1].id)
+    
+    if fields == "levels":
+        content = [
+            {"id": r.id, "level": r.level, "review_count": r.review_count or 0}
+            for r in rows
+        ]
+    else:
+        content = [
+            {
+                "id": r.id,
+                "question": r.question,
+                "answer": r.answer,
+                "level": r.level,
+                "important": r.important if r.important is not None else 0,
+                "review_count": r.review_count if r.review_count is not None else 0
+            } for r in rows
+        ]
+    return JSONResponse(content=content, headers=headers)
 
 
 @router.post("/projects/{project_id}/flashcards", response_model=Flashcard)
@@ -81,6 +190,52 @@ def create_flashcard(project_id: str, card: FlashcardCreate, db: Session = Depen
     )
 
 
+@router.post("/projects/{project_id}/flashcards:batch", response_model=List[Flashcard])
+def create_flashcards_batch(project_id: str, batch: FlashcardBatchCreate, db: Session = Depends(get_db)):
+    """Create many flashcards in a single transaction (imports, generators)"""
+    project = db.query(ProjectORM).filter(ProjectORM.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    rows = bulk_create_flashcards(db, project_id, batch.cards)
+    db.commit()
+    return [
+        Flashcard(
+            id=r["id"],
+            question=r["question"],
+            answer=r["answer"],
+            level=r["level"],
+            important=r["important"],
+            review_count=r["review_count"]
+        ) for r in rows
+    ]
+
+
+@router.post("/projects/{project_id}/flashcards:dedupe", response_model=DedupeResult)
+def dedupe_flashcards(
+    project_id: str,
+    dry_run: bool = Query(False, description="Only report the duplicate groups"),
+    threshold: float = Query(DEDUP_THRESHOLD, ge=0.5, le=1.0, description="Minimum card (question + answer) similarity"),
+    db: Session = Depends(get_db)
+):
+    """
+    Merge near-duplicate flashcards of a project
+    - Cards are grouped by question + answer similarity (MinHash/LSH)
+    - Each group keeps its most reviewed card (then important, then oldest)
+    - The keeper takes over the review history, review counts and the important flag
+    """
+    project = db.query(ProjectORM).filter(ProjectORM.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    groups = find_duplicate_groups(db, project_id, threshold)
+    removed = 0
+    if not dry_run and groups:
+        removed = merge_duplicates(db, project_id, groups)
+        db.commit()
+    return DedupeResult(groups=groups, removed=removed, dry_run=dry_run)
+
+
 @router.patch("/projects/{project_id}/flashcards/{card_id}", response_model=Flashcard)
 def update_flashcard(project_id: str, card_id: str, updates: FlashcardUpdate, db: Session = Depends(get_db)):
     """Update flashcard (question, answer, level, important, review count)"""
@@ -131,7 +286,7 @@ def delete_flashcard(project_id: str, card_id: str, db: Session = Depends(get_db
 
 @router.post("/projects/{project_id}/flashcards/{card_id}/level", response_model=Flashcard)
 def update_flashcard_level(project_id: str, card_id: str, level_data: FlashcardLevelUpdate, db: Session = Depends(get_db)):
-    """Update flashcard level and increment review count"""
+    """Update flashcard level, increment review count and reschedule the card"""
     obj = db.query(FlashcardORM).filter(
         FlashcardORM.id == card_id,
         FlashcardORM.project_id == project_id
@@ -141,12 +296,14 @@ def update_flashcard_level(project_id: str, card_id: str, level_data: FlashcardL
         raise HTTPException(status_code=404, detail="Card not found")
     
     if level_data.level is not None:
-        obj.level = level_data.level
+        # Sets level, counts the review and schedules the next one
+        apply_review(obj, level_data.level)
+        db.add(ReviewLog(card_id=obj.id, project_id=project_id, level=level_data.level))
+    elif level_data.review_count is None:
+        obj.review_count = (obj.review_count or 0) + 1
     
     if level_data.review_count is not None:
         obj.review_count = level_data.review_count
-    else:
-        obj.review_count = (obj.review_count or 0) + 1
     
     db.commit()
     db.refresh(obj)
@@ -159,3 +316,55 @@ def update_flashcard_level(project_id: str, card_id: str, level_data: FlashcardL
         important=obj.important if obj.important is not None else 0,
         review_count=obj.review_count if obj.review_count is not None else 0
     )
+
+
+@router.post("/projects/{project_id}/reviews:batch", response_model=ReviewBatchResult)
+def sync_reviews(project_id: str, batch: ReviewBatch, db: Session = Depends(get_db)):
+    """
+    Apply a batch of study reviews in one transaction
+    - Sets each card's level, increments its review_count and reschedules it (in reviewed_at order)
+    - Appends every event to the review log
+    - Events for unknown cards are skipped and reported
+    """
+    project = db.query(ProjectORM).filter(ProjectORM.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    now = datetime.utcnow()
+    for e in batch.reviews:
+        # Stored as naive UTC like all other timestamps
+        if e.reviewed_at is None:
+            e.reviewed_at = now
+        elif e.reviewed_at.tzinfo is not None:
+            e.reviewed_at = e.reviewed_at.astimezone(timezone.utc).replace(tzinfo=None)
+    events = sorted(batch.reviews, key=lambda e: e.reviewed_at)
+    card_ids = {e.card_id for e in events}
+    cards = {
+        c.id: c for c in db.query(FlashcardORM).filter(
+            FlashcardORM.project_id == project_id,
+            FlashcardORM.id.in_(card_ids)
+        )
+    } if card_ids else {}
+    
+    log_rows = []
+    for e in events:
+        card = cards.get(e.card_id)
+        if card is None:
+            continue
+        apply_review(card, e.level, e.reviewed_at)
+        log_rows.append({
+            "id": str(uuid.uuid4()),
+            "card_id": card.id,
+            "project_id": project_id,
+            "level": e.level,
+            "reviewed_at": e.reviewed_at,
+            "created_at": now
+        })
+    if log_rows:
+        db.execute(insert(ReviewLog), log_rows)
+    db.commit()
+    
+    return ReviewBatchResult(
+        applied=len(log_rows),
+        unknown_card_ids=sorted(card_ids - set(cards))
+    )
@@ -0,0 +1,236 @@
+from fastapi import APIRouter, HTTPException, Depends, Request, Header, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+from datetime import datetime
+import asyncio
+import json
+from models.db import get_db, SessionLocal
+from models.tables import Project as ProjectORM, IngestionJob
+from services.events import job_events
+from services.jobs import job_priority, job_snapshot, worker
+
+# Seconds between SSE keep-alive comments (keeps proxies from closing idle streams)
+SSE_KEEPALIVE_SECONDS = 15
+
+router = APIRouter(tags=["jobs"])
+
+class JobStatus(BaseModel):
+    id: str
+    project_id: str
+    file_id: Optional[str] = None
+    status: str
+    total_pages: int = 0
+    pages_done: int = 0
+    last_page: int = 0
+    cards_created: int = 0
+    errors: List[str] = []
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+def _to_status(job: IngestionJob) -> JobStatus:
+    return JobStatus(
+        id=job.id,
+        project_id=job.project_id,
+        file_id=job.file_id,
+        status=job.status,
+        total_pages=job.total_pages or 0,
+        pages_done=job.pages_done or 0,
+        last_page=job.last_page or 0,
+        cards_created=job.cards_created or 0,
+        errors=json.loads(job.errors or "[]"),
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+        finished_at=job.finished_at
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+def get_job(job_id: str, db: Session = Depends(get_db)):
+    """Retrieve progress of an ingestion job (pages done, cards created, errors)"""
+    job = db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _to_status(job)
+
+
+@router.post("/jobs/{job_id}/retry", response_model=JobStatus)
+def retry_job(job_id: str, openai_api_key: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Queue a failed job again; it continues after its last committed page
+    - openai_api_key: Required for OpenAI jobs (keys are not stored)
+    """
+    job = db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != "failed":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}, only failed jobs can be retried")
+    if job.provider == "openai" and not openai_api_key:
+        raise HTTPException(status_code=400, detail="openai_api_key is required to retry an OpenAI job")
+    job.status = "queued"
+    job.finished_at = None
+    db.commit()
+    # The failed run's events (its "done" above all) must not be replayed to new subscribers
+    job_events.clear(job.id)
+    worker.enqueue(job.id, openai_api_key, priority=job_priority(job.file.category if job.file else None))
+    return _to_status(job)
+
+
+def _load_snapshot(job_id: str) -> Optional[dict]:
+    db = SessionLocal()
+    try:
+        job = db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+        return job_snapshot(job) if job else None
+    finally:
+        db.close()
+
+
+def _sse(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request, last_event_id: Optional[int] = Header(None)):
+    """
+    Server-Sent Events stream of an ingestion job
+    - progress: job status and page/card counts (sent first, then after every chunk)
+    - card: a generated card as soon as the LLM finished writing it
+    - done: final status; the stream ends afterwards
+    """
+    # Subscribe before reading the current state, so no event falls in between
+    queue, backlog = job_events.subscribe(job_id, after=last_event_id or 0)
+    snapshot = await run_in_threadpool(_load_snapshot, job_id)
+    if snapshot is None:
+        job_events.unsubscribe(job_id, queue)
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        try:
+            yield _sse("progress", snapshot)
+            if snapshot["status"] in ("done", "failed"):
+                yield _sse("done", snapshot)
+                return
+            for event_id, event, data in backlog:
+                yield _sse(event, data, event_id)
+                if event == "done":
+                    return
+            while True:
+                try:
+                    _, event_id, event, data = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(event, data, event_id)
+                if event == "done":
+                    return
+        finally:
+            job_events.unsubscribe(job_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _load_project_snapshots(project_id: str, job_ids: Optional[List[str]]) -> Optional[Dict[str, dict]]:
+    """Snapshots of the given jobs of a project (default: its unfinished jobs); None if there is no such project."""
+    db = SessionLocal()
+    try:
+        if not db.query(ProjectORM.id).filter(ProjectORM.id == project_id).first():
+            return None
+        q = db.query(IngestionJob).filter(IngestionJob.project_id == project_id)
+        if job_ids is not None:
+            q = q.filter(IngestionJob.id.in_(job_ids))
+        else:
+            q = q.filter(IngestionJob.status.in_(("queued", "running")))
+        return {job.id: job_snapshot(job) for job in q.order_by(IngestionJob.created_at).all()}
+    finally:
+        db.close()
+
+
+@router.get("/projects/{project_id}/jobs/events")
+async def stream_project_job_events(
+    project_id: str,
+    request: Request,
+    job_ids: Optional[str] = Query(None, description="Comma-separated job ids (default: the project's unfinished jobs)")
+):
+    """
+    Server-Sent Events stream of several ingestion jobs of a project over one connection
+    (browsers allow only ~6 connections per origin, one stream per file would block the rest)
+    - progress, card, done: as for /jobs/{id}/events, every payload carries its `job_id`
+    - a progress (and, if finished, done) event per job is sent first, then the jobs' history
+    - the stream ends when all jobs are done; reconnecting starts over with fresh progress
+    """
+    requested = [j for j in job_ids.split(",") if j] if job_ids else None
+    queue: asyncio.Queue = asyncio.Queue()
+    # Subscribe before reading the current state, so no event falls in between
+    backlogs = {job_id: job_events.subscribe(job_id, q=queue)[1] for job_id in requested or ()}
+    snapshots = await run_in_threadpool(_load_project_snapshots, project_id, requested)
+    if snapshots is None:
+        for job_id in backlogs:
+            job_events.unsubscribe(job_id, queue)
+        raise HTTPException(status_code=404, detail="Project not found")
+    for job_id in snapshots:
+        if job_id not in backlogs:
+            backlogs[job_id] = job_events.subscribe(job_id, q=queue)[1]
+    subscribed = list(backlogs)
+
+    async def events():
+        pending = set(snapshots)
+        try:
+            for job_id, snapshot in snapshots.items():
+                yield _sse("progress", {**snapshot, "job_id": job_id})
+                if snapshot["status"] in ("done", "failed"):
+                    yield _sse("done", {**snapshot, "job_id": job_id})
+                    pending.discard(job_id)
+            for job_id in list(pending):
+                for _, event, data in backlogs[job_id]:
+                    yield _sse(event, {**data, "job_id": job_id})
+                    if event == "done":
+                        pending.discard(job_id)
+                        break
+            while pending:
+                try:
+                    job_id, _, event, data = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                if job_id not in pending:
+                    continue
+                yield _sse(event, {**data, "job_id": job_id})
+                if event == "done":
+                    pending.discard(job_id)
+        finally:
+            for job_id in subscribed:
+                job_events.unsubscribe(job_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/projects/{project_id}/jobs", response_model=List[JobStatus])
+def list_jobs(project_id: str, db: Session = Depends(get_db)):
+    """List all ingestion jobs of a project, newest first"""
+    project = db.query(ProjectORM).filter(ProjectORM.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    jobs = (
+        db.query(IngestionJob)
+        .filter(IngestionJob.project_id == project_id)
+        .order_by(IngestionJob.created_at.desc())
+        .all()
+    )
+    return [_to_status(j) for j in jobs]
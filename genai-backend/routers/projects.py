@@ -1,11 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from typing import List
 from pydantic import BaseModel, Field
 from typing import Optional
-import os
 from models.db import get_db
 from models.tables import Project as ProjectORM, Flashcard as FlashcardORM
+from services.storage import release_file_content, remove_files
+from services.retrieval import retrieval
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
@@ -29,22 +31,54 @@ class ProjectUpdate(ProjectBase):
     pass
 
 
+# Allowed values for the `sort` query parameter of the project listing
+PROJECT_SORT_COLUMNS = {
+    "updated_at": ProjectORM.updated_at,
+    "created_at": ProjectORM.created_at,
+    "title": ProjectORM.title,
+}
+
+
 @router.get("", response_model=List[Project])
-def get_projects(db: Session = Depends(get_db)):
-    """Retrieve all projects"""
-    items = db.query(ProjectORM).all()
-    result = []
-    for p in items:
-        card_count = db.query(FlashcardORM).filter(FlashcardORM.project_id == p.id).count()
-        result.append(Project(
+def get_projects(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    sort: str = "-updated_at",
+    db: Session = Depends(get_db)
+):
+    """
+    Retrieve projects with their card counts in a single query
+    - limit/offset: optional pagination (total count in the X-Total-Count header)
+    - sort: updated_at, created_at or title; prefix with "-" for descending (default: -updated_at)
+    """
+    column = PROJECT_SORT_COLUMNS.get(sort.lstrip("-"))
+    if column is None:
+        raise HTTPException(status_code=400, detail="Invalid sort")
+    order = column.desc() if sort.startswith("-") else column.asc()
+    
+    # Correlated count: evaluated only for the returned page of projects
+    card_count = (
+        select(func.count(FlashcardORM.id))
+        .where(FlashcardORM.project_id == ProjectORM.id)
+        .correlate(ProjectORM)
+        .scalar_subquery()
+    )
+    q = db.query(ProjectORM, card_count).order_by(order, ProjectORM.id)
+    if limit is not None:
+        q = q.limit(limit).offset(offset)
+        response.headers["X-Total-Count"] = str(db.query(func.count(ProjectORM.id)).scalar())
+    
+    return [
+        Project(
             id=p.id, 
             title=p.title, 
             description=p.description, 
-            cardCount=card_count,
+            cardCount=count or 0,
             flashcard_scope=p.flashcard_scope or "all_slides",
             flashcard_density=p.flashcard_density or 5
-        ))
-    return result
+        ) for p, count in q.all()
+    ]
 
 
 @router.post("", response_model=Project)
@@ -113,26 +147,12 @@ def delete_project(project_id: str, db: Session = Depends(get_db)):
     obj = db.query(ProjectORM).filter(ProjectORM.id == project_id).first()
     if not obj:
         raise HTTPException(status_code=404, detail="Project not found")
-    # Remove files from filesystem (raw + extracted)
-    try:
-        upload_dir = "uploads"
-        extracted_dir = os.path.join(upload_dir, "extracted")
-        for f in list(obj.files or []):
-            if f.stored_path and os.path.exists(f.stored_path):
-                try:
-                    os.remove(f.stored_path)
-                except Exception as e:
-                    print(f"Warning: failed to remove file {f.stored_path}: {e}")
-            # Remove extracted artifacts (.md and .json if present)
-            for ext in (".md", ".json"):
-                extracted_path = os.path.join(extracted_dir, f"{f.id}{ext}")
-                if os.path.exists(extracted_path):
-                    try:
-                        os.remove(extracted_path)
-                    except Exception as e:
-                        print(f"Warning: failed to remove extracted file {extracted_path}: {e}")
-    except Exception as e:
-        print(f"Warning during filesystem cleanup: {e}")
+    # Release file contents (raw + extracted); content shared with other projects is kept
+    released = []
+    for f in list(obj.files or []):
+        released.extend(release_file_content(db, f))
     db.delete(obj)
     db.commit()
+    remove_files(released)
+    retrieval.invalidate(project_id)
     return {"status": "success"}
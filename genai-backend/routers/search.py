@@ -0,0 +1,47 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List
+from pydantic import BaseModel
+from models.db import get_db
+from models.tables import Project as ProjectORM
+from services.search import search_project
+
+router = APIRouter(tags=["search"])
+
+class CardHit(BaseModel):
+    id: str
+    question: str
+    answer: str
+    level: int = 0
+    question_highlight: str
+    answer_highlight: str
+    score: float
+
+class PageHit(BaseModel):
+    file_id: str
+    filename: str
+    page_number: int
+    snippet: str
+    score: float
+
+class SearchResults(BaseModel):
+    cards: List[CardHit] = []
+    pages: List[PageHit] = []
+
+
+@router.get("/projects/{project_id}/search", response_model=SearchResults)
+def search(
+    project_id: str,
+    q: str = Query(..., max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Full-text search over the project's flashcards and extracted pages
+    - Ranked with BM25; highlights and snippets mark matches with <mark>…</mark> (text is not HTML-escaped)
+    - All words must match
+    """
+    project = db.query(ProjectORM.id).filter(ProjectORM.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return search_project(db, project_id, q, limit)
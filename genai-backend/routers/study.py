@@ -0,0 +1,56 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from pydantic import BaseModel
+from datetime import datetime
+from models.db import get_db
+from models.tables import Project as ProjectORM, Flashcard as FlashcardORM
+
+router = APIRouter(tags=["study"])
+
+class StudyCard(BaseModel):
+    id: str
+    question: Optional[str] = None
+    answer: Optional[str] = None
+    level: int = 0
+    important: int = 0
+    review_count: int = 0
+    due_at: Optional[datetime] = None
+    interval_days: float = 0.0
+    ease: float = 2.5
+
+
+@router.get("/projects/{project_id}/study/next", response_model=List[StudyCard])
+def get_next_cards(
+    project_id: str,
+    n: int = Query(20, ge=1, le=500),
+    ahead: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Next cards to study, most overdue first
+    - Served from the (project_id, due_at) index, so only n rows are read
+    - ahead=true also returns cards that are not due yet (cramming)
+    """
+    project = db.query(ProjectORM.id).filter(ProjectORM.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    q = db.query(FlashcardORM).filter(FlashcardORM.project_id == project_id)
+    if not ahead:
+        q = q.filter(FlashcardORM.due_at <= datetime.utcnow())
+    cards = q.order_by(FlashcardORM.due_at).limit(n).all()
+    
+    return [
+        StudyCard(
+            id=c.id,
+            question=c.question,
+            answer=c.answer,
+            level=c.level or 0,
+            important=c.important or 0,
+            review_count=c.review_count or 0,
+            due_at=c.due_at,
+            interval_days=c.interval_days or 0.0,
+            ease=c.ease or 2.5
+        ) for c in cards
+    ]
@@ -0,0 +1,35 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from services.llm_cache import llm_cache
+from services.llm_clients import provider_clients
+from services.metrics import metrics
+
+# Content type of the Prometheus text exposition format
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+router = APIRouter(prefix="/api", tags=["system"])
+
+
+@router.get("/llm-cache")
+def get_llm_cache_stats():
+    """LLM response cache statistics (entries, size, hits, misses, evictions)"""
+    return llm_cache.stats()
+
+
+@router.delete("/llm-cache")
+def clear_llm_cache():
+    """Remove all cached LLM responses"""
+    llm_cache.clear()
+    return {"status": "success"}
+
+
+@router.get("/llm-clients")
+def get_llm_client_stats():
+    """Pooled LLM provider clients with request and connection reuse counts"""
+    return provider_clients.stats()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Extraction, LLM and database metrics in Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type=METRICS_CONTENT_TYPE)
@@ -1,10 +1,55 @@
 import json
 from turtle import mode
+import os
+import queue
+import threading
 import requests
-from typing import List, Optional, Literal, Any
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+from typing import List, Optional, Literal, Any, Callable, Iterable, Iterator, Tuple
 from enum import Enum
 from models.schemas import ProcessedDocument, TextChunk
 from pydantic import BaseModel
+from services.chunk_planner import CHUNK_TOKEN_BUDGET, chunk_pages, estimate_tokens, plan_chunks
+from services.llm_cache import llm_cache
+from services.llm_clients import ProviderUnavailableError, provider_clients
+from services.metrics import (
+    generated_cards_per_chunk,
+    llm_completion_tokens,
+    llm_parse_failures,
+    llm_prompt_tokens,
+    llm_request_errors,
+    llm_request_seconds,
+)
+from services.stream_parser import IncrementalArrayParser
+
+# Request settings per provider (also part of the LLM cache key)
+LMSTUDIO_MODEL = "local-model"  # LMStudio typically uses this name
+LMSTUDIO_TEMPERATURE = 0.3
+OPENAI_TEMPERATURE = 0.7
+
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+
+# Extracted chunks buffered between the extraction and generation stage
+PIPELINE_QUEUE_SIZE = 4
+
+# "fused" plans, filters and writes the cards of a chunk in one LLM call;
+# "two_step" plans concepts first and writes their cards in a second call
+GENERATION_MODE = os.getenv("GENERATION_MODE", "fused")
+# Hard filter for planned concepts (applied locally in every mode)
+MIN_CONCEPT_CONFIDENCE = 0.6
+
+# Stream completions when a caller wants cards as soon as they are written
+LLM_STREAMING = os.getenv("LLM_STREAMING", "1") != "0"
+
+# Ceiling of chunks in flight per generator (0 = the provider client's maximum);
+# below it, the client's adaptive limit decides how many run
+GENERATION_MAX_CONCURRENCY = int(os.getenv("GENERATION_MAX_CONCURRENCY", "0"))
+
+# Concepts planned per source page of a chunk, and per chunk at most
+MAX_CONCEPTS_PER_PAGE = 6
+MAX_CONCEPTS_PER_CHUNK = 12
 
 
 class PlannedConcept(BaseModel):
@@ -37,7 +82,11 @@ class CardGenerator:
         #lmstudio_url: str = "http://172.28.112.1:1234/v1",
         lmstudio_url: str = "http://127.0.0.1:1234/v1",
         openai_api_key: Optional[str] = None,
-        openai_model: str = "gpt-4.1-nano"
+        openai_model: str = "gpt-4.1-nano",
+        max_concurrency: Optional[int] = None,
+        use_cache: bool = True,
+        chunk_token_budget: int = CHUNK_TOKEN_BUDGET,
+        mode: Literal["direct", "two_step", "fused"] = GENERATION_MODE
     ):
         """
         Initialize the CardGenerator with specified LLM provider.
@@ -47,6 +96,12 @@ class CardGenerator:
             lmstudio_url: The base URL for LMStudio API (default: local instance)
             openai_api_key: API key for OpenAI (required if provider is "openai")
             openai_model: Model name to use with OpenAI (default: gpt-3.5-turbo)
+            max_concurrency: Ceiling of chunks in flight (default: GENERATION_MAX_CONCURRENCY,
+                else the provider client's maximum); below it, the client's adaptive
+                limit decides how many chunks are in flight
+            use_cache: Serve repeated prompts from the persistent LLM response cache
+            chunk_token_budget: Pack pages into chunks of about this many tokens (0 = one chunk per page)
+            mode: Generation mode used for documents/chunks (see generate_cards_from_text)
         
         Raises:
             ValueError: If provider is "openai" but no API key is provided
@@ -54,14 +109,23 @@ class CardGenerator:
         self.provider = LLMProvider(provider)
         self.openai_api_key = openai_api_key
         self.openai_model = openai_model
+        self.use_cache = use_cache
+        self.chunk_token_budget = chunk_token_budget
+        self.mode = mode
+        # Token usage of the provider calls made by this generator (cache hits excluded)
+        self.usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self._usage_lock = threading.Lock()
         
         if self.provider == LLMProvider.LMSTUDIO:
             self.lmstudio_url = lmstudio_url
             self.lmstudio_endpoint = f"{lmstudio_url}/chat/completions"
+            self.client = provider_clients.get(self.provider.value, lmstudio_url)
         elif self.provider == LLMProvider.OPENAI:
             if not openai_api_key:
                 raise ValueError("OpenAI API key is required when using OpenAI provider")
-            self.openai_endpoint = "https://api.openai.com/v1/chat/completions"
+            self.openai_endpoint = f"{OPENAI_BASE_URL}/chat/completions"
+            self.client = provider_clients.get(self.provider.value, OPENAI_BASE_URL, openai_api_key)
+        self.max_concurrency = max(1, max_concurrency or GENERATION_MAX_CONCURRENCY or self.client.max_concurrency)
     
     def generate_cards_from_document(
         self, 
@@ -82,22 +146,178 @@ class CardGenerator:
         """
         all_cards = []
         
-        for chunk in document.chunks:
-            cards = self.generate_cards_from_text(
-                text=chunk.text,
-                num_cards=cards_per_chunk,
-                difficulty_level=difficulty_level
-            )
+        for _, cards in self.iter_cards_from_chunks(
+            document.chunks,
+            cards_per_chunk=cards_per_chunk,
+            difficulty_level=difficulty_level
+        ):
             all_cards.extend(cards)
         
         return all_cards
+
+    def iter_cards_from_chunks(
+        self,
+        chunks: Iterable[TextChunk],
+        cards_per_chunk: int = 3,
+        difficulty_level: int = 0,
+        queue_size: int = PIPELINE_QUEUE_SIZE,
+        on_card: Optional[Callable[[TextChunk, GeneratedFlashcard], None]] = None,
+        context_for: Optional[Callable[[TextChunk], List[str]]] = None
+    ) -> Iterator[Tuple[TextChunk, List[GeneratedFlashcard]]]:
+        """
+        Pipelined generation: consume chunks from a (lazy) extraction iterator in a
+        background thread and generate cards for each chunk as soon as it arrives.
+
+        The chunk iterator runs through a bounded queue, so extraction of page N+1
+        overlaps with the LLM calls for page N without running arbitrarily far ahead.
+        Pages are packed into chunks of about `chunk_token_budget` tokens first
+        (see services/chunk_planner.py), so short slides share LLM calls.
+        As many chunks are generated at the same time as the provider client's
+        adaptive limit currently allows (at most `max_concurrency`); the
+        plan -> generate calls of one chunk stay sequential and results are
+        yielded in input order.
+
+        Args:
+            chunks: Iterable of TextChunks, e.g. ContentExtractor.iter_chunks()
+            cards_per_chunk: Number of flashcards to generate per text chunk
+            difficulty_level: Difficulty level for generated cards (0-3)
+            queue_size: Maximum number of extracted chunks waiting for generation
+            on_card: Called (from a worker thread) with (chunk, card) as soon as a card
+                is complete in the streamed response, before its chunk is finished
+            context_for: Returns supporting passages for a chunk (e.g. from the
+                project's extended_info files), added to its card-writing prompt
+
+        Yields:
+            (chunk, cards) tuples in input order; `chunk.pages` lists the source pages
+        """
+        buffer: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        done = object()
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    buffer.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for chunk in plan_chunks(chunks, self.chunk_token_budget):
+                    if not put(chunk):
+                        return
+                put(done)
+            except Exception as e:
+                put(e)
+
+        producer = threading.Thread(target=produce, name="chunk-producer", daemon=True)
+        producer.start()
+        pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="llm")
+        inflight: deque = deque()
+        exhausted = False
+
+        def can_submit() -> bool:
+            # Finished chunks waiting for their turn count against the ceiling only
+            running = sum(1 for _, future in inflight if not future.done())
+            return len(inflight) < self.max_concurrency and running < self._window()
+
+        try:
+            while inflight or not exhausted:
+                # Keep the client's current window full: saturating it is what lets
+                # the adaptive limit grow (worker threads are started on demand)
+                while not exhausted and can_submit():
+                    try:
+                        item = buffer.get(timeout=0.05 if inflight else None)
+                    except queue.Empty:
+                        break
+                    if item is done:
+                        exhausted = True
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    future = pool.submit(
+                        self.generate_cards_from_text,
+                        text=item.text,
+                        num_cards=cards_per_chunk,
+                        difficulty_level=difficulty_level,
+                        mode=self.mode,
+                        on_card=partial(on_card, item) if on_card else None,
+                        context=context_for(item) if context_for else None,
+                        max_concepts=min(MAX_CONCEPTS_PER_PAGE * len(chunk_pages(item)), MAX_CONCEPTS_PER_CHUNK)
+                    )
+                    inflight.append((item, future))
+
+                # Yield finished chunks in input order
+                while inflight and inflight[0][1].done():
+                    chunk, future = inflight.popleft()
+                    cards = future.result()
+                    generated_cards_per_chunk.observe(len(cards))
+                    yield chunk, cards
+
+                if inflight and (exhausted or not can_submit()):
+                    # Any finished chunk may free a slot; the window is checked again regularly
+                    running = [future for _, future in inflight if not future.done()]
+                    if running:
+                        wait(running, timeout=0.5, return_when=FIRST_COMPLETED)
+        finally:
+            # Unblock the producer and drop queued work if the consumer stops early
+            stop.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+            producer.join(timeout=1)
     
     
-    def _call_llm(self, prompt: str, max_tokens: int = 2000) -> str:
-        """Route to the configured provider (LMStudio or OpenAI)."""
-        if self.provider == LLMProvider.LMSTUDIO:
-            return self._call_lmstudio(prompt, max_tokens)
-        return self._call_openai(prompt, max_tokens)
+    def _window(self) -> int:
+        """Chunks that may be in flight now: the client's adaptive limit, capped by max_concurrency."""
+        return max(1, min(self.max_concurrency, int(self.client.limiter.limit)))
+
+    def _call_llm(
+        self,
+        prompt: str,
+        max_tokens: int = 2000,
+        on_item: Optional[Callable[[dict], None]] = None,
+        stage: str = "generate",
+        usable: Optional[Callable[[str], bool]] = None
+    ) -> str:
+        """
+        Route to the configured provider (LMStudio or OpenAI), served from the LLM cache when possible.
+
+        With `on_item`, the completion is streamed and every object of its
+        `results`/`cards` array is passed to `on_item` as soon as it is complete.
+        `stage` ("plan", "generate", "fused", "direct") labels the call in the metrics.
+        With `usable`, only responses it accepts are cached (or served from the
+        cache), so a bad or truncated completion is requested again next time.
+        """
+        key = None
+        if self.use_cache and llm_cache.enabled:
+            if self.provider == LLMProvider.LMSTUDIO:
+                model, temperature = LMSTUDIO_MODEL, LMSTUDIO_TEMPERATURE
+            else:
+                model, temperature = self.openai_model, OPENAI_TEMPERATURE
+            key = llm_cache.make_key(self.provider.value, model, temperature, max_tokens, prompt)
+            cached = llm_cache.get(key)
+            if cached is not None and (usable is None or usable(cached)):
+                if on_item is not None:
+                    for item in IncrementalArrayParser().feed(cached):
+                        on_item(item)
+                return cached
+
+        stream_to = on_item if LLM_STREAMING else None
+        labels = {"provider": self.provider.value, "stage": stage}
+        try:
+            with llm_request_seconds.time(**labels):
+                if self.provider == LLMProvider.LMSTUDIO:
+                    response = self._call_lmstudio(prompt, max_tokens, on_item=stream_to, stage=stage)
+                else:
+                    response = self._call_openai(prompt, max_tokens, on_item=stream_to, stage=stage)
+        except Exception:
+            llm_request_errors.inc(**labels)
+            raise
+
+        if key is not None and (usable is None or usable(response)):
+            llm_cache.put(key, response)
+        return response
     
     
     def generate_cards_from_text(
@@ -105,8 +325,10 @@ class CardGenerator:
         text: str,
         num_cards: int = 3,
         difficulty_level: int = 0,
-        mode: Literal["direct", "two_step"] = "two_step",
+        mode: Literal["direct", "two_step", "fused"] = "two_step",
         max_concepts: int = 6,
+        on_card: Optional[Callable[[GeneratedFlashcard], None]] = None,
+        context: Optional[List[str]] = None,
     ) -> List[GeneratedFlashcard]:
         """
         Generate flashcards from a single text string.
@@ -115,12 +337,20 @@ class CardGenerator:
             text: The text content to create flashcards from
             num_cards: Number of flashcards to generate
             difficulty_level: Difficulty level (0=easy, 1=medium, 2=hard, 3=expert)
-            mode: "direct" (legacy, uses num_cards) or "two_step" (uses concepts)
-            max_concepts: When mode="two_step" and no concepts provided, plan up to this many per slide
+            mode: "direct" (legacy, uses num_cards), "two_step" (plan concepts, then
+                write cards: two calls) or "fused" (plan and write in one call)
+            max_concepts: When mode="two_step"/"fused", plan up to this many per slide
+            on_card: Called with each card as soon as it is complete in the streamed
+                response ("two_step"/"fused"); the return value is still the full list
+            context: Supporting passages for the card-writing prompt; cards stay
+                about the slide, the passages only make answers more precise
 
         
         Returns:
-            List of GeneratedFlashcard objects
+            List of GeneratedFlashcard objects (empty if the answer was unusable)
+
+        Raises:
+            ProviderUnavailableError: If the LLM could not be reached after retries
         """
         if not text or not text.strip():
             return []
@@ -128,9 +358,9 @@ class CardGenerator:
         
         if mode == "direct":
             # Create the prompt for LMStudio
-            prompt = self._create_generation_prompt(text, num_cards, difficulty_level)
+            prompt = self._create_generation_prompt(text, num_cards, difficulty_level, context)
             try:
-                response = self._call_llm(prompt)
+                response = self._call_llm(prompt, stage="direct", usable=self._parses("results"))
                 cards = self._parse_cards_response(response)
                 
                 # Set difficulty level
@@ -138,6 +368,9 @@ class CardGenerator:
                 for card in cards:
                     card.level = difficulty_level
                 return cards
+            except ProviderUnavailableError:
+                # Not a bad answer but no answer: the caller must not skip the page
+                raise
             except Exception as e:
                 print(f"Error generating cards (direct): {e}")
                 return []
@@ -146,16 +379,43 @@ class CardGenerator:
             try:
                 planned = self.plan_concepts(text=text, max_concepts=max_concepts)
                 concepts = planned
-                prompt = self._create_concept_cards_prompt(text, concepts, difficulty_level)
-                response = self._call_llm(prompt)
+                prompt = self._create_concept_cards_prompt(text, concepts, difficulty_level, context)
+                response = self._call_llm(
+                    prompt,
+                    on_item=self._card_callback(on_card, self._result_card, difficulty_level),
+                    usable=self._parses("results")
+                )
                 cards = self._parse_cards_response(response)
                 for card in cards:
                     card.level = difficulty_level
                 return cards
+            except ProviderUnavailableError:
+                # Not a bad answer but no answer: the caller must not skip the page
+                raise
             except Exception as e:
                 print(f"Error generating cards (two_step): {e}")
                 return []
 
+        elif mode == "fused":
+            try:
+                prompt = self._create_fused_prompt(text, max_concepts, difficulty_level, context)
+                response = self._call_llm(
+                    prompt,
+                    on_item=self._card_callback(on_card, self._fused_card, difficulty_level),
+                    stage="fused",
+                    usable=self._parses("cards")
+                )
+                cards = self._parse_fused_response(response)
+                for card in cards:
+                    card.level = difficulty_level
+                return cards
+            except ProviderUnavailableError:
+                # Not a bad answer but no answer: the caller must not skip the page
+                raise
+            except Exception as e:
+                print(f"Error generating cards (fused): {e}")
+                return []
+
 
     def plan_concepts(self, text: str, max_concepts: int = 6) -> List[PlannedConcept]:
         """
@@ -210,43 +470,45 @@ Slide text:
 JSON:
 """
 
-        resp = self._call_llm(planning_prompt)
+        resp = self._call_llm(planning_prompt, stage="plan", usable=self._parses("concepts"))
 
         try:
             data = self._extract_json(resp)
-            concepts: List[PlannedConcept] = []
-
-            for c in data.get("concepts", []):
-                try:
-                    pc = PlannedConcept(
-                        id=c["id"],
-                        concept=c["concept"].strip(),
-                        question=c["question"].strip(),
-                        evidence=c["evidence"].strip(),
-                        confidence=float(c.get("confidence", 0.0)),
-                        should_generate=bool(c.get("should_generate", False)),
-                    )
-
-                    # 🔒 HARD FILTER
-                    if pc.should_generate and pc.confidence >= 0.6:
-                        concepts.append(pc)
-
-                except Exception:
-                    continue
-
-            return concepts
+            concepts = [self._planned_concept(c) for c in data.get("concepts", [])]
+            return [pc for pc in concepts if pc is not None]
 
         except Exception as e:
+            llm_parse_failures.inc(stage="plan")
             print(f"Error parsing planning response: {e}")
             print(f"Response: {resp}")
             return []
 
 
+    @staticmethod
+    def _planned_concept(c: dict) -> Optional[PlannedConcept]:
+        """Concept of one planning result object, or None if the hard filter rejects it."""
+        try:
+            pc = PlannedConcept(
+                id=c["id"],
+                concept=c["concept"].strip(),
+                question=c["question"].strip(),
+                evidence=c["evidence"].strip(),
+                confidence=float(c.get("confidence", 0.0)),
+                should_generate=bool(c.get("should_generate", False)),
+            )
+        except Exception:
+            return None
+        # 🔒 HARD FILTER
+        if pc.should_generate and pc.confidence >= MIN_CONCEPT_CONFIDENCE:
+            return pc
+        return None
+
     def _create_concept_cards_prompt(
     self,
     text: str,
     concepts: List[PlannedConcept],
     difficulty_level: int,
+    context: Optional[List[str]] = None,
 ) -> str:
         difficulty_descriptions = {
             0: "easy (basic facts and definitions)",
@@ -265,7 +527,7 @@ JSON:
         return f"""
 You are an expert educational flashcard writer.
 
-Use ONLY the slide text for correctness.
+Use ONLY the slide text{" and the background passages" if context else ""} for correctness.
 Write in the SAME language as the slide text.
 
 For each concept, output exactly ONE result object:
@@ -295,7 +557,7 @@ Return ONLY valid JSON in this exact shape:
     }}
   ]
 }}
-
+{self._context_block(context)}
 Slide text:
 {text}
 
@@ -305,18 +567,168 @@ Concepts:
 JSON:
 """
 
+    def _create_fused_prompt(
+        self,
+        text: str,
+        max_concepts: int,
+        difficulty_level: int,
+        context: Optional[List[str]] = None
+    ) -> str:
+        """Planner and writer prompt in one: concepts with evidence/confidence and their card."""
+        difficulty_descriptions = {
+            0: "easy (basic facts and definitions)",
+            1: "medium (conceptual understanding)",
+            2: "hard (application and analysis)",
+            3: "expert (synthesis and evaluation)"
+        }
+        difficulty = difficulty_descriptions.get(difficulty_level, "medium")
+
+        return f"""
+You are an expert educational flashcard writer.
+
+Task: select up to {max_concepts} flashcard concepts from the slide text and
+write one flashcard for each selected concept.
+
+Only select a concept if the slide contains enough explicit information
+to answer a factual question WITHOUT meta-statements.
+
+For each concept, provide:
+- concept (short label)
+- evidence (exact words from the slide, 5–25 words)
+- confidence (float between 0.0 and 1.0)
+- should_generate (true or false)
+- question and answer (only if should_generate is true)
+
+STRICT RULES:
+- Use ONLY the slide text{" and the background passages" if context else ""} (no external knowledge).
+- No speculation.
+- Write in the SAME language as the slide text.
+- If a concept is only mentioned (name/title without explanation),
+  set should_generate=false.
+
+Reject (should_generate=false) if the content is:
+- personal opinion/interview ("I", "me", "my", "m’", "je")
+- unclear/vague ("this role", "that", "the person at the time")
+- only a name/title without explanation
+- a question about the name or the date of publication.
+
+Never write meta-statements such as:
+- "the text does not provide details"
+- "no information is given"
+- "probably", "likely", "appears to be"
+
+Difficulty: {difficulty}
+
+Return ONLY valid JSON in this exact shape:
+{{
+  "cards": [
+    {{
+      "concept": "...",
+      "evidence": "...",
+      "confidence": 0.0,
+      "should_generate": true,
+      "question": "...",
+      "answer": "..."
+    }}
+  ]
+}}
+{self._context_block(context)}
+Slide text:
+{text}
+
+JSON:
+"""
+
+    @staticmethod
+    def _context_block(context: Optional[List[str]]) -> str:
+        """Prompt section with the supporting passages ("" without passages)."""
+        if not context:
+            return ""
+        passages = "\n\n".join(f"[{i}] {p}" for i, p in enumerate(context, 1))
+        return f"""
+Background passages (from the course's supporting documents; use them only
+to make answers about the slide's concepts more precise, never as a source
+of concepts of their own):
+{passages}
+"""
+
+    def _parse_fused_response(self, response: str) -> List[GeneratedFlashcard]:
+        """Parse a fused response and apply the hard filter locally."""
+        try:
+            data = self._extract_json(response)
+        except Exception as e:
+            llm_parse_failures.inc(stage="fused")
+            print(f"Error parsing fused response: {e}")
+            print(f"Response: {response}")
+            return []
+
+        cards = [self._fused_card(c) for c in data.get("cards", [])]
+        return [card for card in cards if card is not None]
+
+    @staticmethod
+    def _fused_card(c: dict) -> Optional[GeneratedFlashcard]:
+        """Card of one fused result object, or None if the hard filter rejects it."""
+        try:
+            # 🔒 HARD FILTER (same rule as plan_concepts)
+            if not bool(c.get("should_generate", False)):
+                return None
+            if float(c.get("confidence", 0.0)) < MIN_CONCEPT_CONFIDENCE:
+                return None
+            q = str(c.get("question", "")).strip()
+            a = str(c.get("answer", "")).strip()
+            return GeneratedFlashcard(question=q, answer=a) if q and a else None
+        except Exception:
+            return None
+
+    @staticmethod
+    def _result_card(r: dict) -> Optional[GeneratedFlashcard]:
+        """Card of one two_step result object, or None if it was skipped."""
+        if r.get("status") != "ok":
+            return None
+        q = str(r.get("question", "")).strip()
+        a = str(r.get("answer", "")).strip()
+        return GeneratedFlashcard(question=q, answer=a) if q and a else None
+
+    def _parses(self, key: str) -> Callable[[str], bool]:
+        """Cache check: the response is JSON with a `key` array (an empty one is a valid answer)."""
+        def check(response: str) -> bool:
+            try:
+                data = self._extract_json(response)
+            except Exception:
+                return False
+            return isinstance(data, dict) and isinstance(data.get(key), list)
+
+        return check
+
+    @staticmethod
+    def _card_callback(
+        on_card: Optional[Callable[[GeneratedFlashcard], None]],
+        to_card: Callable[[dict], Optional[GeneratedFlashcard]],
+        difficulty_level: int
+    ) -> Optional[Callable[[dict], None]]:
+        """Turn streamed result objects into on_card calls (None if nobody listens)."""
+        if on_card is None:
+            return None
+
+        def handle(item: dict) -> None:
+            card = to_card(item)
+            if card is None:
+                return
+            card.level = difficulty_level
+            try:
+                on_card(card)
+            except Exception as e:
+                print(f"Error in on_card callback: {e}")
+
+        return handle
+
     def _parse_cards_response(self, response: str) -> List[GeneratedFlashcard]:
         try:
             data = self._extract_json(response)
-            cards: List[GeneratedFlashcard] = []
-            for r in data.get("results", []):
-                if r.get("status") == "ok":
-                    q = str(r.get("question", "")).strip()
-                    a = str(r.get("answer", "")).strip()
-                    if q and a:
-                        cards.append(GeneratedFlashcard(question=q, answer=a))
-            return cards
+            cards = [self._result_card(r) for r in data.get("results", [])]
+            return [card for card in cards if card is not None]
         except Exception as e:
+            llm_parse_failures.inc(stage="generate")
             print(f"Error parsing response: {e}")
             print(f"Response: {response}")
             return []
@@ -336,7 +748,8 @@ JSON:
         self,
         text: str,
         num_cards: int,
-        difficulty_level: int
+        difficulty_level: int,
+        context: Optional[List[str]] = None
     ) -> str:
         """Create a prompt for LMStudio to generate flashcards."""
         
@@ -352,7 +765,7 @@ JSON:
         prompt = f"""You are an expert at creating educational flashcards. 
         
 Based on the following text, create exactly {num_cards} flashcards with {difficulty} questions and answers.
-
+{self._context_block(context)}
 TEXT:
 {text}
 
@@ -385,13 +798,72 @@ JSON Output:"""
         
         return prompt
     
-    def _call_lmstudio(self, prompt: str, max_tokens: int = 2000) -> str:
+    def _record_usage(self, prompt: str, response: str, usage: Optional[dict], stage: str = "generate") -> None:
+        """
+        Add the token usage of a provider call (estimated if the provider sends none).
+
+        Only provider-reported counts go to the token metrics.
+        """
+        usage = usage or {}
+        labels = {"provider": self.provider.value, "stage": stage}
+        if usage.get("prompt_tokens"):
+            llm_prompt_tokens.observe(usage["prompt_tokens"], **labels)
+        if usage.get("completion_tokens"):
+            llm_completion_tokens.observe(usage["completion_tokens"], **labels)
+        prompt_tokens = usage.get("prompt_tokens") or estimate_tokens(prompt)
+        completion_tokens = usage.get("completion_tokens") or estimate_tokens(response or "")
+        with self._usage_lock:
+            self.usage["calls"] += 1
+            self.usage["prompt_tokens"] += prompt_tokens
+            self.usage["completion_tokens"] += completion_tokens
+
+    def _stream_completion(self, payload: dict, prompt: str, on_item: Callable[[dict], None], stage: str = "generate") -> str:
+        """Stream a completion, passing each completed array object to on_item; returns the full text."""
+        parser = IncrementalArrayParser()
+        parts: List[str] = []
+        usage = None
+        emitted = 0
+        try:
+            for chunk in self.client.chat_completion_stream(payload):
+                if chunk.get("usage"):
+                    usage = chunk["usage"]
+                choices = chunk.get("choices") or []
+                delta = (choices[0].get("delta") or {}).get("content") if choices else None
+                if not delta:
+                    continue
+                parts.append(delta)
+                for item in parser.feed(delta):
+                    emitted += 1
+                    on_item(item)
+        except requests.RequestException as e:
+            # The stream broke midway: fetch the whole completion again (with retries)
+            # and only pass on the items not seen yet
+            print(f"Streamed completion interrupted ({e}), retrying without streaming")
+            result = self.client.chat_completion({k: v for k, v in payload.items() if k != "stream_options"})
+            content = result["choices"][0]["message"]["content"]
+            for item in IncrementalArrayParser().feed(content)[emitted:]:
+                on_item(item)
+            self._record_usage(prompt, content, result.get("usage"), stage)
+            return content
+        content = "".join(parts)
+        self._record_usage(prompt, content, usage, stage)
+        return content
+
+    def _call_lmstudio(
+        self,
+        prompt: str,
+        max_tokens: int = 2000,
+        on_item: Optional[Callable[[dict], None]] = None,
+        stage: str = "generate"
+    ) -> str:
         """
         Make a request to LMStudio API.
         
         Args:
             prompt: The prompt to send to the model
             max_tokens: Maximum tokens in the response
+            on_item: Stream the response and pass each completed result object to it
+            stage: Pipeline stage, for the metrics
         
         Returns:
             The model's response text
@@ -400,35 +872,41 @@ JSON Output:"""
             requests.RequestException: If the API call fails
         """
         payload = {
-            "model": "local-model",  # LMStudio typically uses this name
+            "model": LMSTUDIO_MODEL,
             "messages": [
                 {
                     "role": "user",
                     "content": prompt
                 }
             ],
-            "temperature": 0.3,
+            "temperature": LMSTUDIO_TEMPERATURE,
             "max_tokens": max_tokens,
             "stream": False
         }
         
-        response = requests.post(
-            self.lmstudio_endpoint,
-            json=payload,
-            timeout=60
-        )
-        response.raise_for_status()
-        
-        result = response.json()
-        return result["choices"][0]["message"]["content"]
+        if on_item is not None:
+            return self._stream_completion(payload, prompt, on_item, stage)
+        # Pooled keep-alive session shared by all generators for this endpoint
+        result = self.client.chat_completion(payload)
+        content = result["choices"][0]["message"]["content"]
+        self._record_usage(prompt, content, result.get("usage"), stage)
+        return content
     
-    def _call_openai(self, prompt: str, max_tokens: int = 2000) -> str:
+    def _call_openai(
+        self,
+        prompt: str,
+        max_tokens: int = 2000,
+        on_item: Optional[Callable[[dict], None]] = None,
+        stage: str = "generate"
+    ) -> str:
         """
         Make a request to OpenAI API.
         
         Args:
             prompt: The prompt to send to the model
             max_tokens: Maximum tokens in the response
+            on_item: Stream the response and pass each completed result object to it
+            stage: Pipeline stage, for the metrics
         
         Returns:
             The model's response text
@@ -436,11 +914,6 @@ JSON Output:"""
         Raises:
             requests.RequestException: If the API call fails
         """
-        headers = {
-            "Authorization": f"Bearer {self.openai_api_key}",
-            "Content-Type": "application/json"
-        }
-        
         payload = {
             "model": self.openai_model,
             "messages": [
@@ -449,20 +922,18 @@ JSON Output:"""
                     "content": prompt
                 }
             ],
-            "temperature": 0.7,
+            "temperature": OPENAI_TEMPERATURE,
             "max_tokens": max_tokens
         }
         
-        response = requests.post(
-            self.openai_endpoint,
-            json=payload,
-            headers=headers,
-            timeout=60
-        )
-        response.raise_for_status()
-        
-        result = response.json()
-        return result["choices"][0]["message"]["content"]
+        if on_item is not None:
+            payload["stream_options"] = {"include_usage": True}
+            return self._stream_completion(payload, prompt, on_item, stage)
+        # The registry client carries the Authorization header for this key
+        result = self.client.chat_completion(payload)
+        content = result["choices"][0]["message"]["content"]
+        self._record_usage(prompt, content, result.get("usage"), stage)
+        return content
     
     def _parse_response(self, response: str) -> List[GeneratedFlashcard]:
         """
@@ -499,6 +970,7 @@ JSON Output:"""
             
             return cards
         except (json.JSONDecodeError, ValueError, KeyError) as e:
+            llm_parse_failures.inc(stage="direct")
             print(f"Error parsing response: {e}")
             print(f"Response: {response}")
             return []
@@ -0,0 +1,130 @@
+import math
+import os
+import re
+from typing import Iterable, Iterator, List
+
+from models.schemas import TextChunk
+
+# Target size of one LLM input chunk; 0 disables packing (one chunk per page)
+CHUNK_TOKEN_BUDGET = int(os.getenv("CHUNK_TOKEN_BUDGET", "1200"))
+# Upper bound of pages merged into one chunk, so a run of near-empty slides
+# still gets a reasonable number of cards
+CHUNK_MAX_PAGES = int(os.getenv("CHUNK_MAX_PAGES", "6"))
+# Rough chars-per-token ratio of English/German text for GPT-style tokenizers
+CHARS_PER_TOKEN = 4
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (no tokenizer dependency); good enough for budgeting."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def chunk_pages(chunk: TextChunk) -> List[int]:
+    """Pages a chunk was built from (a plain extracted chunk covers its own page)."""
+    return chunk.pages or [chunk.page_number]
+
+
+def split_text(text: str, budget: int, separators=("\n\n", "\n", " ")) -> List[str]:
+    """Split text into pieces within the budget: at paragraphs, then lines, then words."""
+    if estimate_tokens(text) <= budget:
+        return [text]
+    if not separators:
+        size = budget * CHARS_PER_TOKEN
+        return [text[i:i + size] for i in range(0, len(text), size)]
+    separator = separators[0]
+    parts = _PARAGRAPH_RE.split(text) if separator == "\n\n" else text.split(separator)
+    if len(parts) < 2:
+        return split_text(text, budget, separators[1:])
+
+    pieces: List[str] = []
+    current = ""
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+        if estimate_tokens(part) > budget:
+            # A single paragraph (line, word) over budget: split it further
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.extend(split_text(part, budget, separators[1:]))
+            continue
+        candidate = f"{current}{separator}{part}" if current else part
+        if current and estimate_tokens(candidate) > budget:
+            pieces.append(current)
+            current = part
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def plan_chunks(
+    chunks: Iterable[TextChunk],
+    token_budget: int = CHUNK_TOKEN_BUDGET,
+    max_pages: int = CHUNK_MAX_PAGES
+) -> Iterator[TextChunk]:
+    """
+    Repack extracted page chunks into LLM-sized chunks, lazily and in page order.
+
+    - Adjacent short pages are merged while the estimated size stays within
+      `token_budget` (and at most `max_pages` pages per chunk)
+    - Pages above the budget are split at paragraph boundaries; all parts but the
+      last are marked `partial`; jobs commit a page's cards only with its last part
+    - Every chunk keeps its provenance: `pages` lists the source pages and
+      `page_number` is the first of them
+
+    Args:
+        chunks: Page chunks in page order, e.g. ContentExtractor.iter_chunks()
+        token_budget: Target tokens per chunk; 0 passes the chunks through unchanged
+        max_pages: Maximum number of pages merged into one chunk
+
+    Yields:
+        Packed TextChunks
+    """
+    if token_budget <= 0:
+        yield from chunks
+        return
+
+    pending: List[TextChunk] = []
+    pending_tokens = 0
+
+    def flush() -> TextChunk:
+        first = pending[0]
+        return TextChunk(
+            text="\n\n".join(c.text for c in pending),
+            page_number=first.page_number,
+            source_file=first.source_file,
+            type=first.type,
+            pages=[p for c in pending for p in chunk_pages(c)],
+        )
+
+    for chunk in chunks:
+        tokens = estimate_tokens(chunk.text)
+        if tokens > token_budget:
+            if pending:
+                yield flush()
+                pending, pending_tokens = [], 0
+            parts = split_text(chunk.text, token_budget)
+            for i, part in enumerate(parts):
+                yield TextChunk(
+                    text=part,
+                    page_number=chunk.page_number,
+                    source_file=chunk.source_file,
+                    type=chunk.type,
+                    pages=chunk_pages(chunk),
+                    partial=i < len(parts) - 1,
+                )
+            continue
+
+        if pending and (pending_tokens + tokens > token_budget or len(pending) >= max_pages):
+            yield flush()
+            pending, pending_tokens = [], 0
+        pending.append(chunk)
+        pending_tokens += tokens
+
+    if pending:
+        yield flush()
@@ -0,0 +1,235 @@
+import os
+import re
+import unicodedata
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models.tables import Flashcard as FlashcardORM, ReviewLog
+
+# Screen generated cards against the project's deck before they are stored
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "1") != "0"
+# Estimated Jaccard similarity of the question + answer shingles from which cards count as
+# duplicates; questions alone are too close for cards on different concepts
+# ("the reward function" / "the value function" of one topic)
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.9"))
+# Character shingle length; short enough for one-line questions and answers
+SHINGLE_SIZE = 5
+# 16 bands x 8 rows: pairs with similarity ~0.7 and above collide in at least one band
+NUM_PERM = 128
+LSH_BANDS = 16
+
+# Shingle hashes permuted per batch: bounds the (shingles x NUM_PERM) matrix to ~16 MB
+SIGNATURE_BATCH_SHINGLES = 16384
+
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Fixed seed: signatures are comparable across processes and runs
+_rng = np.random.RandomState(1)
+# Multiply-shift permutations of 32-bit hashes: the high 32 bits of (a * x + b) mod 2^64, a odd
+_PERM_A = _rng.randint(0, 1 << 63, size=NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_PERM_B = _rng.randint(0, 1 << 63, size=NUM_PERM, dtype=np.uint64)
+_SHIFT = np.uint64(32)
+
+_NON_WORD_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return _NON_WORD_RE.sub(" ", text).strip()
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """32-bit hashes of the distinct character shingles of a normalized text."""
+    text = normalize(text)
+    if not text:
+        return np.empty(0, dtype=np.uint64)
+    if len(text) <= size:
+        shingles = {text}
+    else:
+        shingles = {text[i:i + size] for i in range(len(text) - size + 1)}
+    return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+
+def card_text(question: str, answer: str) -> str:
+    """The text a card is compared by: its question and its answer."""
+    return f"{question or ''} {answer or ''}"
+
+
+def minhash_signatures(texts: Sequence[str]) -> np.ndarray:
+    """
+    MinHash signatures of many texts, vectorized over batches of texts.
+
+    The shingle hashes of a batch are permuted at once and reduced per text
+    with np.minimum.reduceat.
+
+    Returns:
+        uint64 array of shape (len(texts), NUM_PERM); rows of texts without
+        shingles are all _MAX_HASH (they match nothing)
+    """
+    signatures = np.full((len(texts), NUM_PERM), _MAX_HASH, dtype=np.uint64)
+    hashes = [shingle_hashes(t) for t in texts]
+    rows = [i for i, h in enumerate(hashes) if len(h)]
+    start = 0
+    while start < len(rows):
+        end, size = start, 0
+        while end < len(rows) and (end == start or size + len(hashes[rows[end]]) <= SIGNATURE_BATCH_SHINGLES):
+            size += len(hashes[rows[end]])
+            end += 1
+        batch = rows[start:end]
+        flat = np.concatenate([hashes[i] for i in batch])
+        offsets = np.cumsum([0] + [len(hashes[i]) for i in batch[:-1]])
+        # uint64 arithmetic wraps around, which is the mod 2^64 of the scheme
+        permuted = (flat[:, None] * _PERM_A + _PERM_B) >> _SHIFT
+        signatures[batch] = np.minimum.reduceat(permuted, offsets, axis=0)
+        start = end
+    return signatures
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(a == b))
+
+
+class NearDuplicateIndex:
+    """
+    LSH index over MinHash signatures of cards (question and answer).
+
+    Each signature is cut into LSH_BANDS bands; cards sharing any band land in
+    the same bucket, so a query only compares against a few candidates instead
+    of the whole deck. Candidates are confirmed with the full signature.
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, bands: int = LSH_BANDS):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self._buckets: Dict[Tuple[int, bytes], List[str]] = defaultdict(list)
+        self._signatures: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, key: str, signature: np.ndarray) -> None:
+        if key in self._signatures or int(signature[0]) == int(_MAX_HASH):
+            return
+        self._signatures[key] = signature
+        for band_key in self._band_keys(signature):
+            self._buckets[band_key].append(key)
+
+    def query(self, signature: np.ndarray) -> List[Tuple[str, float]]:
+        """Indexed keys at or above the threshold, most similar first."""
+        if int(signature[0]) == int(_MAX_HASH):
+            return []
+        candidates = set()
+        for band_key in self._band_keys(signature):
+            candidates.update(self._buckets.get(band_key, ()))
+        matches = [(key, similarity(signature, self._signatures[key])) for key in candidates]
+        return sorted((m for m in matches if m[1] >= self.threshold), key=lambda m: -m[1])
+
+    @classmethod
+    def for_project(cls, db: Session, project_id: str, threshold: float = DEDUP_THRESHOLD) -> "NearDuplicateIndex":
+        """Index of all cards of a project (signatures computed in one batch)."""
+        rows = (
+            db.query(FlashcardORM.id, FlashcardORM.question, FlashcardORM.answer)
+            .filter(FlashcardORM.project_id == project_id)
+            .all()
+        )
+        index = cls(threshold)
+        for (card_id, _, _), signature in zip(rows, minhash_signatures([card_text(q, a) for _, q, a in rows])):
+            index.add(card_id, signature)
+        return index
+
+
+def screen_cards(index: NearDuplicateIndex, cards: Iterable) -> Tuple[list, int]:
+    """
+    Drop cards that nearly duplicate an indexed card or an earlier
+    card of the same batch; the kept cards are added to the index.
+
+    Returns:
+        (kept cards, number of dropped duplicates)
+    """
+    cards = list(cards)
+    signatures = minhash_signatures([card_text(card.question, card.answer) for card in cards])
+    kept = []
+    for card, signature in zip(cards, signatures):
+        if index.query(signature):
+            continue
+        index.add(f"new:{len(index)}", signature)
+        kept.append(card)
+    return kept, len(cards) - len(kept)
+
+
+def find_duplicate_groups(db: Session, project_id: str, threshold: float = DEDUP_THRESHOLD) -> List[dict]:
+    """
+    Group a project's near-duplicate cards.
+
+    Cards are visited best first (most reviewed, important, oldest); a card that
+    matches an earlier keeper joins its group, otherwise it becomes a keeper.
+
+    Returns:
+        [{"keep": card_id, "duplicates": [{"id": ..., "similarity": ...}]}]
+    """
+    cards = (
+        db.query(FlashcardORM.id, FlashcardORM.question, FlashcardORM.answer)
+        .filter(FlashcardORM.project_id == project_id)
+        .order_by(
+            FlashcardORM.review_count.desc(),
+            FlashcardORM.important.desc(),
+            FlashcardORM.created_at,
+            FlashcardORM.id,
+        )
+        .all()
+    )
+    signatures = minhash_signatures([card_text(q, a) for _, q, a in cards])
+    index = NearDuplicateIndex(threshold)
+    groups: Dict[str, List[dict]] = {}
+    for (card_id, _, _), signature in zip(cards, signatures):
+        matches = index.query(signature)
+        if matches:
+            keeper, score = matches[0]
+            groups[keeper].append({"id": card_id, "similarity": round(score, 3)})
+        else:
+            index.add(card_id, signature)
+            groups[card_id] = []
+    return [{"keep": keep, "duplicates": dups} for keep, dups in groups.items() if dups]
+
+
+def merge_duplicates(db: Session, project_id: str, groups: List[dict]) -> int:
+    """
+    Fold each group into its keeper: review history and review counts move to the
+    keeper, `important` is kept if any card had it, the duplicates are deleted.
+    The caller commits.
+
+    Returns:
+        Number of deleted cards
+    """
+    removed = 0
+    for group in groups:
+        keeper = db.query(FlashcardORM).filter(
+            FlashcardORM.id == group["keep"], FlashcardORM.project_id == project_id
+        ).first()
+        duplicate_ids = [d["id"] for d in group["duplicates"]]
+        if keeper is None or not duplicate_ids:
+            continue
+        duplicates = db.query(FlashcardORM).filter(
+            FlashcardORM.id.in_(duplicate_ids), FlashcardORM.project_id == project_id
+        ).all()
+        for card in duplicates:
+            keeper.review_count = (keeper.review_count or 0) + (card.review_count or 0)
+            keeper.important = max(keeper.important or 0, card.important or 0)
+        db.query(ReviewLog).filter(ReviewLog.card_id.in_(duplicate_ids)).update(
+            {ReviewLog.card_id: keeper.id}, synchronize_session=False
+        )
+        removed += db.query(FlashcardORM).filter(
+            FlashcardORM.id.in_(duplicate_ids), FlashcardORM.project_id == project_id
+        ).delete(synchronize_session=False)
+    return removed
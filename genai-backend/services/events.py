@@ -0,0 +1,93 @@
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+# Recent events kept per job, replayed to clients that connect late
+EVENT_HISTORY_SIZE = 200
+# Jobs whose history is kept (oldest are dropped first)
+MAX_TRACKED_JOBS = 100
+
+Event = Tuple[int, str, dict]
+# What subscriber queues receive: (job_id, event_id, event, data)
+QueuedEvent = Tuple[str, int, str, dict]
+
+
+class JobEventBroker:
+    """
+    In-process publish/subscribe for ingestion job events (cards, progress, done).
+
+    Worker threads publish, async SSE handlers subscribe: every subscriber owns
+    an asyncio.Queue that is filled thread-safely on its event loop. One queue
+    can follow several jobs (one connection for a whole upload). Each job
+    keeps a short history, so a client connecting right after the upload still
+    receives the first cards.
+    """
+
+    def __init__(self, history_size: int = EVENT_HISTORY_SIZE, max_jobs: int = MAX_TRACKED_JOBS):
+        self.history_size = history_size
+        self.max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._history: "OrderedDict[str, Deque[Event]]" = OrderedDict()
+        self._next_id: Dict[str, int] = {}
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+    def publish(self, job_id: str, event: str, data: dict) -> None:
+        """Publish an event for a job (callable from any thread)."""
+        with self._lock:
+            event_id = self._next_id.get(job_id, 0) + 1
+            self._next_id[job_id] = event_id
+            history = self._history.get(job_id)
+            if history is None:
+                history = deque(maxlen=self.history_size)
+                self._history[job_id] = history
+                # Only the history goes: event ids of a job never restart, or a
+                # client resuming with Last-Event-ID would miss the new events
+                while len(self._history) > self.max_jobs:
+                    self._history.popitem(last=False)
+            item = (event_id, event, data)
+            history.append(item)
+            subscribers = list(self._subscribers.get(job_id, ()))
+        for loop, q in subscribers:
+            try:
+                loop.call_soon_threadsafe(q.put_nowait, (job_id, *item))
+            except RuntimeError:
+                # Event loop already closed
+                pass
+
+    def subscribe(self, job_id: str, after: int = 0, q: Optional[asyncio.Queue] = None) -> Tuple[asyncio.Queue, List[Event]]:
+        """
+        Register the calling event loop for a job's events.
+
+        Args:
+            q: Queue to add the job's events to (e.g. one shared by several jobs);
+                a new one by default
+
+        Returns:
+            (queue for new QueuedEvents, history events with id > after)
+        """
+        q = q if q is not None else asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers.setdefault(job_id, []).append((loop, q))
+            backlog = [e for e in self._history.get(job_id, ()) if e[0] > after]
+        return q, backlog
+
+    def clear(self, job_id: str) -> None:
+        """
+        Forget a job's history (e.g. before it runs again), so late subscribers
+        are not replayed the previous run. Event ids keep increasing.
+        """
+        with self._lock:
+            self._history.pop(job_id, None)
+
+    def unsubscribe(self, job_id: str, q: asyncio.Queue) -> None:
+        with self._lock:
+            subscribers = [s for s in self._subscribers.get(job_id, []) if s[1] is not q]
+            if subscribers:
+                self._subscribers[job_id] = subscribers
+            else:
+                self._subscribers.pop(job_id, None)
+
+
+job_events = JobEventBroker()
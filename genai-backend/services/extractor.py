@@ -1,62 +1,271 @@
 import fitz  # PyMuPDF
-import pytesseract
 from PIL import Image
 import io
+import os
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
 from models.schemas import ProcessedDocument, TextChunk
+from services.metrics import extraction_page_seconds
+from services.ocr import OCR_BATCH_PAGES, ImageHashCache, dhash, ocr_engines, render_page
+
+# Number of processes used for PDF extraction (0 or 1 = sequential, in-process)
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "0"))
+# Documents with fewer pages are always extracted in-process
+MIN_PAGES_FOR_POOL = 8
+# Page ranges per worker, more than one so that slow (OCR) ranges are balanced out
+SHARDS_PER_WORKER = 4
+
+# OCR of the embedded images of pages that have a text layer (diagrams, screenshots)
+REGION_OCR_ENABLED = os.getenv("REGION_OCR_ENABLED", "1") != "0"
+# Images must cover at least this share of the page, and more of it than the text blocks
+REGION_OCR_MIN_IMAGE_AREA = float(os.getenv("REGION_OCR_MIN_IMAGE_AREA", "0.2"))
+# Smaller images (icons, logos, bullets) are never OCR'd
+REGION_OCR_MIN_REGION_AREA = float(os.getenv("REGION_OCR_MIN_REGION_AREA", "0.05"))
+# Regions are rendered sharper than whole pages: diagram labels are small
+REGION_OCR_DPI = int(os.getenv("REGION_OCR_DPI", "150"))
+
+
+def _page_chunk(text: str, page_num: int, filename: str) -> Optional[TextChunk]:
+    if not text.strip():
+        return None
+    return TextChunk(
+        text=text.strip(),
+        page_number=page_num + 1,
+        source_file=filename,
+        type="pdf_content"
+    )
+
+
+def _image_rects(page, xrefs: bool = False) -> List[Tuple[int, fitz.Rect]]:
+    """(xref, visible bbox) of the images drawn on a page; xref 0 unless `xrefs` is set."""
+    rects = []
+    for info in page.get_image_info(xrefs=xrefs):
+        rect = fitz.Rect(info["bbox"]) & page.rect
+        if not rect.is_empty:
+            rects.append((info.get("xref", 0), rect))
+    return rects
+
+
+def _image_regions(page, seen: ImageHashCache) -> List[Image.Image]:
+    """
+    Rendered embedded images of a text page that are worth OCR'ing.
+
+    Only pages whose images cover a large part of the page, and more of it
+    than the text blocks, qualify; of those, images that are big enough and
+    not seen before in the document (same xref, or a close perceptual hash) are rendered.
+    """
+    if not page.get_images():
+        return []
+    page_area = page.rect.get_area()
+    image_area = min(page_area, sum(rect.get_area() for _, rect in _image_rects(page)))
+    if image_area < REGION_OCR_MIN_IMAGE_AREA * page_area:
+        return []
+    text_area = sum(
+        (fitz.Rect(block[:4]) & page.rect).get_area()
+        for block in page.get_text("blocks") if block[6] == 0
+    )
+    if text_area >= image_area:
+        return []
+
+    images = []
+    # Resolving xrefs hashes the image data, so it is only done for qualifying pages
+    for xref, rect in _image_rects(page, xrefs=True):
+        if rect.get_area() < REGION_OCR_MIN_REGION_AREA * page_area or seen.seen_xref(xref):
+            continue
+        image = render_page(page, REGION_OCR_DPI, clip=rect)
+        image_hash = dhash(image)
+        repeated = seen.seen_image(image_hash, image.size)
+        seen.add(xref, image_hash, image.size)
+        if not repeated:
+            images.append(image)
+    return images
+
+
+def _ocr_pages(scanned: List[Tuple[int, Image.Image, float]], filename: str, record) -> Iterator[TextChunk]:
+    """Recognize a run of rendered pages in one OCR call and yield their chunks in page order."""
+    if not scanned:
+        return
+    started = time.perf_counter()
+    with ocr_engines.borrow() as engine:
+        texts = engine.images_to_strings([image for _, image, _ in scanned])
+    # The batch time is shared equally by its pages
+    per_page = (time.perf_counter() - started) / len(scanned)
+    for (page_num, _, render_seconds), text in zip(scanned, texts):
+        record("ocr", render_seconds + per_page)
+        chunk = _page_chunk(text, page_num, filename)
+        if chunk is not None:
+            yield chunk
+
+
+def _iter_page_range(
+    file_path: str,
+    filename: str,
+    start: int,
+    end: int,
+    timings: Optional[List[Tuple[str, float]]] = None,
+    ocr_batch_pages: int = OCR_BATCH_PAGES
+) -> Iterator[TextChunk]:
+    """
+    Yield the chunks of pages [start, end) of a PDF in page order.
+
+    Pages with a text layer are yielded as soon as they are read; large embedded
+    images on them are OCR'd region by region (see _image_regions) and their text
+    appended. Pages without a text layer are rendered and OCR'd together with the
+    following scanned pages (up to `ocr_batch_pages`), so a scanned document does
+    not pay the OCR start-up per page.
+
+    Page timings go to the extraction metrics, or are appended to `timings`
+    as (method, seconds) when running in a worker process.
+    """
+    def record(method: str, elapsed: float) -> None:
+        if timings is None:
+            extraction_page_seconds.observe(elapsed, method=method)
+        else:
+            timings.append((method, elapsed))
+
+    scanned: List[Tuple[int, Image.Image, float]] = []
+    seen_images = ImageHashCache()
+    with fitz.open(file_path) as doc:
+        for page_num in range(start, end):
+            started = time.perf_counter()
+            page = doc[page_num]
+            text = page.get_text()
+            if not text.strip():
+                # No text layer: render now, OCR with the rest of the run
+                scanned.append((page_num, render_page(page), time.perf_counter() - started))
+                if len(scanned) >= max(1, ocr_batch_pages):
+                    yield from _ocr_pages(scanned, filename, record)
+                    scanned = []
+                continue
+            regions = _image_regions(page, seen_images) if REGION_OCR_ENABLED else []
+            if regions:
+                try:
+                    with ocr_engines.borrow() as engine:
+                        region_texts = [t.strip() for t in engine.images_to_strings(regions)]
+                    text = "\n\n".join([text.strip()] + [t for t in region_texts if t])
+                except Exception as e:
+                    # Region text is extra: the page keeps its text layer
+                    print(f"Warning: region OCR failed on page {page_num + 1} of {filename}: {e}")
+                    regions = []
+            elapsed = time.perf_counter() - started
+            # Earlier scanned pages first, chunks stay in page order
+            yield from _ocr_pages(scanned, filename, record)
+            scanned = []
+            record("regions" if regions else "text", elapsed)
+            yield _page_chunk(text, page_num, filename)
+        yield from _ocr_pages(scanned, filename, record)
+
+
+def _extract_page_range(file_path: str, filename: str, start: int, end: int) -> Tuple[List[TextChunk], List[Tuple[str, float]]]:
+    """
+    Extract pages [start, end) of a PDF. Runs in a worker process with its own document handle.
+
+    Returns the chunks and the page timings, which the parent process records.
+    """
+    timings: List[Tuple[str, float]] = []
+    chunks = list(_iter_page_range(file_path, filename, start, end, timings))
+    return chunks, timings
+
+
+def _page_ranges(total_pages: int, num_shards: int) -> List[Tuple[int, int]]:
+    """Split [0, total_pages) into at most num_shards contiguous ranges."""
+    size = max(1, -(-total_pages // max(1, num_shards)))
+    return [(start, min(start + size, total_pages)) for start in range(0, total_pages, size)]
+
 
 class ContentExtractor:
+    def __init__(self, workers: int = EXTRACTION_WORKERS):
+        """
+        Args:
+            workers: Number of processes for PDF extraction; 0 or 1 extracts sequentially
+        """
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # "spawn" because the extractor is used from threads (background jobs)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def close(self) -> None:
+        """Shut down the worker processes (if any)."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
     def process_file(self, file_path: str, filename: str) -> ProcessedDocument:
         """Depends on file type, process the file and extract text chunks."""
-        ext = filename.split('.')[-1].lower()
+        return ProcessedDocument(
+            filename=filename,
+            total_pages=self.page_count(file_path, filename),
+            chunks=list(self.iter_chunks(file_path, filename))
+        )
+
+    def page_count(self, file_path: str, filename: str) -> int:
+        """Number of pages of a supported file (images count as one page)."""
+        if self._file_type(filename) == 'pdf':
+            with fitz.open(file_path) as doc:
+                return len(doc)
+        return 1
 
+    def iter_chunks(self, file_path: str, filename: str) -> Iterator[TextChunk]:
+        """
+        Extract a file lazily, yielding its text chunks in page order as soon as
+        each page is done, so that consumers can start before the whole file is extracted.
+        """
+        if self._file_type(filename) == 'pdf':
+            yield from self._iter_pdf(file_path, filename)
+        else:
+            yield from self._extract_image(file_path, filename).chunks
+
+    def _file_type(self, filename: str) -> str:
+        ext = filename.split('.')[-1].lower()
         if ext == 'pdf':
-            return self._extract_pdf(file_path, filename)
+            return 'pdf'
         elif ext in ['jpg', 'jpeg', 'png', 'webp']:
-            return self._extract_image(file_path, filename)
+            return 'image'
         else:
             raise ValueError(f"Unsupported file type: {ext}")
-        
-    def _extract_pdf(self, file_path: str, filename: str) -> ProcessedDocument:
-        doc = fitz.open(file_path)
-        chunks = []
 
-        for page_num, page in enumerate(doc):
-            # trying to extract text directly
-            text = page.get_text()
+    def _iter_pdf(self, file_path: str, filename: str) -> Iterator[TextChunk]:
+        total_pages = self.page_count(file_path, filename)
 
-            # If no text found, use OCR
-            if not text.strip():
-                # Render page to an image
-                pix = page.get_pixmap()
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                text = pytesseract.image_to_string(img) #lang='deu+eng'
-
-            if text.strip():
-                chunks.append(TextChunk(
-                    text=text.strip(),
-                    page_number=page_num + 1,
-                    source_file=filename,
-                    type="pdf_content"
-                ))
+        if self.workers > 1 and total_pages >= MIN_PAGES_FOR_POOL:
+            # Shard page ranges across processes, map() yields them in page order
+            ranges = _page_ranges(total_pages, self.workers * SHARDS_PER_WORKER)
+            results = self._get_pool().map(
+                _extract_page_range,
+                [file_path] * len(ranges),
+                [filename] * len(ranges),
+                [start for start, _ in ranges],
+                [end for _, end in ranges],
+            )
+            for shard, timings in results:
+                for method, elapsed in timings:
+                    extraction_page_seconds.observe(elapsed, method=method)
+                yield from shard
+        else:
+            yield from _iter_page_range(file_path, filename, 0, total_pages)
 
-        return ProcessedDocument(
-            filename=filename,
-            total_pages=len(doc),
-            chunks=chunks
-        )
-    
     def _extract_image(self, file_path: str, filename: str) -> ProcessedDocument:
         # Open image and perform OCR
         try:
             image = Image.open(file_path)
-            text = pytesseract.image_to_string(image) #lang='deu+eng'
+            with extraction_page_seconds.time(method="ocr"), ocr_engines.borrow() as engine:
+                text = engine.image_to_string(image)
 
             chunks = [TextChunk(
                 text=text.strip(),
                 page_number=1,
                 source_file=filename,
                 type="image_ocr"
-            )] 
+            )]
 
             return ProcessedDocument(
                 filename=filename,
@@ -69,4 +278,4 @@ class ContentExtractor:
                 filename=filename,
                 total_pages=1,
                 chunks=[]
-            )
\ No newline at end of file
+            )
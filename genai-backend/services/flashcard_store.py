@@ -0,0 +1,66 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models.tables import Flashcard as FlashcardORM
+
+# Rows per INSERT statement (and per transaction when committing in batches)
+FLASHCARD_BATCH_SIZE = int(os.getenv("FLASHCARD_BATCH_SIZE", "500"))
+
+
+def bulk_create_flashcards(
+    db: Session,
+    project_id: str,
+    cards: Iterable,
+    batch_size: int = FLASHCARD_BATCH_SIZE,
+    commit: bool = False
+) -> List[dict]:
+    """
+    Insert many flashcards with executemany INSERTs instead of one ORM add/commit/refresh per card.
+
+    IDs and timestamps are generated client-side, so no SELECT is needed afterwards.
+    created_at increases by one microsecond per card, so listings ordered by
+    (created_at, id) keep the input order.
+
+    Args:
+        db: Database session
+        project_id: Project the cards belong to
+        cards: Objects with question, answer and optional level attributes
+        batch_size: Rows per INSERT statement
+        commit: Commit after every batch; otherwise the caller commits (one transaction)
+
+    Returns:
+        The inserted rows as dicts
+    """
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "question": card.question,
+            "answer": card.answer,
+            "level": _level(card),
+            "important": 0,
+            "review_count": 0,
+            "project_id": project_id,
+            "created_at": now + timedelta(microseconds=i),
+            "updated_at": now + timedelta(microseconds=i),
+            # New cards are due right away, in input order
+            "due_at": now + timedelta(microseconds=i),
+        }
+        for i, card in enumerate(cards)
+    ]
+    batch_size = max(1, batch_size)
+    for start in range(0, len(rows), batch_size):
+        db.execute(insert(FlashcardORM), rows[start:start + batch_size])
+        if commit:
+            db.commit()
+    return rows
+
+
+def _level(card) -> int:
+    level: Optional[int] = getattr(card, "level", None)
+    return level if level is not None else 0
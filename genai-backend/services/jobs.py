@@ -0,0 +1,298 @@
+import itertools
+import json
+import os
+import queue
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from models.db import SessionLocal
+from models.schemas import ProcessedDocument
+from models.tables import IngestionJob
+from services.extractor import ContentExtractor
+from services.ocr import ocr_engines
+from services.card_generator import CardGenerator
+from services.chunk_planner import chunk_pages
+from services.llm_clients import ProviderUnavailableError
+from services.events import job_events
+from services.storage import content_key, extracted_paths, save_extraction
+from services.search import index_pages
+from services.flashcard_store import bulk_create_flashcards
+from services.dedup import DEDUP_ENABLED, NearDuplicateIndex, screen_cards
+from services.retrieval import RETRIEVAL_ENABLED, retrieval
+from services.metrics import duplicate_cards_skipped
+
+# Number of jobs processed in parallel (each job runs its pages sequentially)
+INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", "1"))
+
+# Queue priorities (lower runs first): extended_info files are indexed for
+# retrieval before the lecture files of the same upload need their passages
+PRIORITY_STOP = -1
+PRIORITY_EXTENDED_INFO = 0
+PRIORITY_LECTURE_NOTES = 1
+
+
+def job_priority(category: Optional[str]) -> int:
+    return PRIORITY_EXTENDED_INFO if category == "extended_info" else PRIORITY_LECTURE_NOTES
+
+
+def build_generator(
+    provider: str = "lmstudio",
+    lmstudio_url: Optional[str] = None,
+    openai_api_key: Optional[str] = None,
+    use_cache: bool = True,
+) -> CardGenerator:
+    """
+    Create a CardGenerator for the given provider settings.
+
+    Raises:
+        ValueError: If the provider settings are invalid (e.g. OpenAI without key)
+    """
+    if provider == "openai":
+        if not openai_api_key:
+            raise ValueError("openai_api_key is required when using OpenAI provider")
+        return CardGenerator(provider="openai", openai_api_key=openai_api_key, use_cache=use_cache)
+    return CardGenerator(provider="lmstudio", lmstudio_url=lmstudio_url or "http://127.0.0.1:1234/v1", use_cache=use_cache)
+
+
+def job_snapshot(job: IngestionJob) -> dict:
+    """JSON-serializable progress of a job."""
+    return {
+        "id": job.id,
+        "status": job.status,
+        "total_pages": job.total_pages or 0,
+        "pages_done": job.pages_done or 0,
+        "last_page": job.last_page or 0,
+        "cards_created": job.cards_created or 0,
+        "errors": json.loads(job.errors or "[]"),
+    }
+
+
+class IngestionWorker:
+    """
+    Background worker that extracts uploaded files and generates their flashcards.
+
+    The database is the source of truth: every job is an `IngestionJob` row and
+    the cards of each page are committed together with the job progress. After a
+    crash, jobs that were running are queued again and continue after the last
+    committed page.
+    """
+
+    def __init__(self, num_threads: int = INGESTION_WORKERS):
+        self.num_threads = max(1, num_threads)
+        self.extractor = ContentExtractor()
+        # (priority, sequence, job_id); FIFO within a priority
+        self._queue: "queue.PriorityQueue[Tuple[int, int, Optional[str]]]" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._threads = []
+        # API keys are only kept in memory, never written to the database
+        self._secrets: Dict[str, str] = {}
+
+    def start(self) -> None:
+        """Recover unfinished jobs and start the worker threads."""
+        if self._threads:
+            return
+        db = SessionLocal()
+        try:
+            pending = (
+                db.query(IngestionJob)
+                .filter(IngestionJob.status.in_(("queued", "running")))
+                .order_by(IngestionJob.created_at)
+                .all()
+            )
+            for job in pending:
+                job.status = "queued"
+            pending_ids = [(job.id, job_priority(job.file.category if job.file else None)) for job in pending]
+            db.commit()
+        finally:
+            db.close()
+
+        for job_id, priority in pending_ids:
+            self._put(priority, job_id)
+
+        for i in range(self.num_threads):
+            t = threading.Thread(target=self._loop, name=f"ingestion-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self) -> None:
+        """Signal the worker threads to exit after their current job."""
+        for _ in self._threads:
+            self._put(PRIORITY_STOP, None)
+        for t in self._threads:
+            t.join(timeout=5)
+        self._threads = []
+        self.extractor.close()
+        # Warm Tesseract instances are shared by all jobs; end them with the worker
+        ocr_engines.close()
+
+    def enqueue(self, job_id: str, openai_api_key: Optional[str] = None, priority: int = PRIORITY_LECTURE_NOTES) -> None:
+        """Schedule an already committed job for processing (see job_priority)."""
+        if openai_api_key:
+            self._secrets[job_id] = openai_api_key
+        self._put(priority, job_id)
+
+    def _put(self, priority: int, job_id: Optional[str]) -> None:
+        self._queue.put((priority, next(self._sequence), job_id))
+
+    def _loop(self) -> None:
+        while True:
+            _, _, job_id = self._queue.get()
+            if job_id is None:
+                break
+            try:
+                self.run_job(job_id)
+            except Exception as e:
+                print(f"Ingestion job {job_id} crashed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def run_job(self, job_id: str) -> None:
+        """Process a single job, resuming after its last committed page."""
+        db = SessionLocal()
+        try:
+            job = db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+            if not job or job.status in ("done", "failed"):
+                return
+            job.status = "running"
+            job.attempts = (job.attempts or 0) + 1
+            db.commit()
+            self._publish(job)
+
+            try:
+                if job.provider == "openai" and job.id not in self._secrets:
+                    raise ValueError("OpenAI API key is no longer available (server restarted), please upload again")
+                generator = build_generator(
+                    provider=job.provider,
+                    lmstudio_url=job.lmstudio_url,
+                    openai_api_key=self._secrets.get(job.id),
+                    use_cache=bool(job.use_llm_cache),
+                )
+                file_record = job.file
+                if not file_record:
+                    raise ValueError("File was deleted")
+
+                json_path, md_path = extracted_paths(file_record)
+                extracted = []
+                if os.path.exists(json_path):
+                    # Resumed job or content extracted before (any project): reuse it
+                    stored = ProcessedDocument.parse_file(json_path)
+                    total_pages, chunks = stored.total_pages, stored.chunks
+                    pages = stored.chunks
+                else:
+                    total_pages = self.extractor.page_count(file_record.stored_path, file_record.original_filename)
+                    chunks = self._collect(
+                        self.extractor.iter_chunks(file_record.stored_path, file_record.original_filename),
+                        extracted
+                    )
+                    pages = extracted
+                job.total_pages = total_pages
+                db.commit()
+                self._publish(job)
+
+                context_for = None
+                if file_record.category == "extended_info":
+                    # Supporting material: extracted and made retrievable before its
+                    # own cards are generated, so lecture jobs behind it can use it
+                    if not os.path.exists(json_path):
+                        chunks = pages = list(chunks)
+                        save_extraction(
+                            ProcessedDocument(filename=file_record.original_filename, total_pages=total_pages, chunks=extracted),
+                            json_path,
+                            md_path
+                        )
+                    index_pages(db, content_key(file_record), pages)
+                    db.commit()
+                    retrieval.add_document(job.project_id, content_key(file_record), pages)
+                elif RETRIEVAL_ENABLED:
+                    # Lecture chunks get the best matching passages of the project's extended_info files
+                    project_id = job.project_id
+                    context_for = lambda chunk: retrieval.context(project_id, chunk.text)
+
+                def on_card(chunk, card):
+                    # Streamed preview; the card is stored with the rest of its chunk
+                    job_events.publish(job_id, "card", {
+                        "pages": chunk_pages(chunk),
+                        "question": card.question,
+                        "answer": card.answer,
+                    })
+
+                # Cards already in the deck (earlier files, overlapping slides) are not stored again
+                duplicates = NearDuplicateIndex.for_project(db, job.project_id) if DEDUP_ENABLED else None
+
+                # Extraction streams into generation (packed into token-budget chunks);
+                # pages committed before a crash are skipped
+                last_page = job.last_page or 0
+                pending = (chunk for chunk in chunks if chunk.page_number > last_page)
+                # Cards of the leading parts of a split page, committed with its last part
+                held = []
+                for chunk, cards in generator.iter_cards_from_chunks(
+                    pending, cards_per_chunk=3, difficulty_level=0, on_card=on_card, context_for=context_for
+                ):
+                    if duplicates is not None:
+                        cards, skipped = screen_cards(duplicates, cards)
+                        duplicate_cards_skipped.inc(skipped)
+                    if chunk.partial:
+                        # A resumed job starts again at this page, so nothing of it
+                        # may be committed before the page is finished
+                        held.extend(cards)
+                        continue
+                    cards, held = held + cards, []
+                    # Cards and progress of a chunk (all its pages) are committed in one transaction
+                    bulk_create_flashcards(db, job.project_id, cards)
+                    job.last_page = max(chunk_pages(chunk))
+                    job.pages_done = job.last_page
+                    job.cards_created = (job.cards_created or 0) + len(cards)
+                    db.commit()
+                    self._publish(job)
+
+                if not os.path.exists(json_path):
+                    save_extraction(
+                        ProcessedDocument(filename=file_record.original_filename, total_pages=total_pages, chunks=extracted),
+                        json_path,
+                        md_path
+                    )
+                # Page text becomes searchable; a no-op if this content is indexed already
+                index_pages(db, content_key(file_record), pages)
+
+                job.pages_done = total_pages
+                job.status = "done"
+            except ProviderUnavailableError as e:
+                # Committed pages are kept; POST /jobs/{id}/retry continues after them
+                db.rollback()
+                print(f"LLM provider unavailable for job {job.id}: {e}")
+                self._add_error(job, f"LLM provider unavailable after page {job.last_page or 0}: {e}")
+                job.status = "failed"
+            except Exception as e:
+                db.rollback()
+                print(f"Error processing job {job.id}: {e}")
+                self._add_error(job, str(e))
+                job.status = "failed"
+
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            self._publish(job, "done")
+            self._secrets.pop(job.id, None)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _collect(chunks, into: list):
+        """Pass chunks through while keeping a copy for the stored extraction."""
+        for chunk in chunks:
+            into.append(chunk)
+            yield chunk
+
+    @staticmethod
+    def _publish(job: IngestionJob, event: str = "progress") -> None:
+        """Push the job's progress to SSE subscribers (GET /jobs/{id}/events)."""
+        job_events.publish(job.id, event, job_snapshot(job))
+
+    @staticmethod
+    def _add_error(job: IngestionJob, message: str) -> None:
+        errors = json.loads(job.errors or "[]")
+        errors.append(message)
+        job.errors = json.dumps(errors)
+
+
+worker = IngestionWorker()
@@ -0,0 +1,463 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from collections import OrderedDict
+from typing import Iterator, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Connections kept alive per client (should cover the provider's concurrency)
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "16"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "60"))
+
+# Adaptive concurrency: start at the provider default, grow up to LLM_MAX_CONCURRENCY
+DEFAULT_CONCURRENCY = {
+    "lmstudio": int(os.getenv("LMSTUDIO_CONCURRENCY", "2")),
+    "openai": int(os.getenv("OPENAI_CONCURRENCY", "8")),
+}
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", str(LLM_POOL_SIZE)))
+# Latency (EWMA) above this multiple of the unloaded latency counts as overload
+LLM_LATENCY_TOLERANCE = float(os.getenv("LLM_LATENCY_TOLERANCE", "2.0"))
+
+# Retries of transient errors (429, 5xx, timeouts, connection errors)
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "30"))
+# Retries may add at most this fraction to the request volume (plus a small reserve)
+LLM_RETRY_BUDGET_RATIO = float(os.getenv("LLM_RETRY_BUDGET_RATIO", "0.2"))
+LLM_RETRY_BUDGET_RESERVE = 10.0
+
+# Circuit breaker: open after this many consecutive failures, probe again after the cooldown
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+# Longest wait for the half-open probe's outcome before failing fast
+LLM_BREAKER_PROBE_WAIT = float(os.getenv("LLM_BREAKER_PROBE_WAIT", str(LLM_CONNECT_TIMEOUT + LLM_READ_TIMEOUT)))
+
+# Clients kept by the registry; the least recently used one is closed beyond this
+LLM_MAX_CLIENTS = int(os.getenv("LLM_MAX_CLIENTS", "32"))
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class ProviderUnavailableError(Exception):
+    """
+    The provider failed after all retries, or its circuit breaker is open.
+
+    Raised instead of the last transport error, so callers can stop (and record
+    the failure) rather than treat the request as an empty answer.
+    """
+
+
+def _retry_after_seconds(response: Optional[requests.Response]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), if any."""
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for one provider endpoint.
+
+    The limit grows by about one per round trip while requests use it fully and
+    latency stays near the unloaded baseline, and halves on a 429/timeout or when
+    the latency EWMA exceeds LLM_LATENCY_TOLERANCE x baseline (at most once per
+    round trip).
+    """
+
+    def __init__(self, initial: int, maximum: int = LLM_MAX_CONCURRENCY, tolerance: float = LLM_LATENCY_TOLERANCE):
+        self.maximum = max(1, maximum)
+        self.limit = float(min(max(1, initial), self.maximum))
+        self.tolerance = tolerance
+        self.in_flight = 0
+        self.latency_ewma: Optional[float] = None
+        self.baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def on_success(self, latency: float) -> None:
+        with self._cond:
+            saturated = self.in_flight >= int(self.limit)
+            self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+            # Unloaded latency: the lowest EWMA seen; follows slower models only while
+            # the limit is not saturated (no queueing that could inflate it)
+            if self.baseline is None or self.latency_ewma < self.baseline:
+                self.baseline = self.latency_ewma
+            elif not saturated:
+                self.baseline = 0.95 * self.baseline + 0.05 * self.latency_ewma
+            if self.latency_ewma > self.tolerance * self.baseline:
+                self._decrease()
+            elif saturated:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def on_overload(self) -> None:
+        with self._cond:
+            self._decrease()
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < max(1.0, self.latency_ewma or 0.0):
+            return
+        self._last_decrease = now
+        self.limit = max(1.0, self.limit / 2)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "latency_ewma": self.latency_ewma,
+                "latency_baseline": self.baseline,
+            }
+
+
+class RetryBudget:
+    """Token bucket: every request deposits `ratio` tokens (its retries do not), every retry withdraws one."""
+
+    def __init__(self, ratio: float = LLM_RETRY_BUDGET_RATIO, reserve: float = LLM_RETRY_BUDGET_RESERVE):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.balance = reserve
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.balance = min(self.reserve, self.balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.balance < 1.0:
+                return False
+            self.balance -= 1.0
+            return True
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `threshold` consecutive failures; open fails fast until the
+    cooldown has passed, then one probe request is let through (half-open) while
+    the other callers wait for its outcome, at most `probe_wait` seconds.
+    """
+
+    def __init__(
+        self,
+        threshold: int = LLM_BREAKER_THRESHOLD,
+        cooldown: float = LLM_BREAKER_COOLDOWN,
+        probe_wait: float = LLM_BREAKER_PROBE_WAIT
+    ):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.probe_wait = probe_wait
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._cond = threading.Condition()
+
+    def allow(self) -> bool:
+        """Whether a request may go out; False when open, or when the probe takes too long."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.state != "half_open", timeout=self.probe_wait):
+                return False
+            if self.state == "closed":
+                return True
+            if time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._cond:
+            self.state = "closed"
+            self.failures = 0
+            self._cond.notify_all()
+
+    def record_failure(self) -> None:
+        with self._cond:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+            self._cond.notify_all()
+
+
+class ProviderClient:
+    """
+    HTTP client for one OpenAI-compatible endpoint (LMStudio or OpenAI).
+
+    Holds a pooled `requests.Session`, so consecutive calls reuse keep-alive
+    connections instead of paying a new TCP/TLS handshake each time.
+
+    Every request goes through the endpoint's controller: an AIMD concurrency
+    limit shared by all generators, retries of transient errors with jittered
+    exponential backoff (honouring Retry-After) within a retry budget, and a
+    circuit breaker that fails fast while the endpoint is down.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        base_url: str,
+        api_key: Optional[str] = None,
+        pool_size: int = LLM_POOL_SIZE,
+        connect_timeout: float = LLM_CONNECT_TIMEOUT,
+        read_timeout: float = LLM_READ_TIMEOUT,
+        max_retries: int = LLM_MAX_RETRIES
+    ):
+        self.provider = provider
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Content-Type"] = "application/json"
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+        self._adapter = adapter
+        self.max_retries = max_retries
+        self.limiter = AdaptiveLimiter(DEFAULT_CONCURRENCY.get(provider, 2), min(LLM_MAX_CONCURRENCY, pool_size))
+        self.retry_budget = RetryBudget()
+        self.breaker = CircuitBreaker()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+
+    @property
+    def max_concurrency(self) -> int:
+        """Upper bound of the adaptive limit (callers need no more requests in flight)."""
+        return self.limiter.maximum
+
+    def chat_completion(self, payload: dict) -> dict:
+        """
+        POST /chat/completions and return the decoded JSON response.
+
+        Raises:
+            ProviderUnavailableError: If transient errors persist or the circuit is open
+            requests.RequestException: On a non-retryable error (e.g. 400, 401)
+        """
+        response, _ = self._send(payload)
+        try:
+            return response.json()
+        finally:
+            response.close()
+            self.limiter.release()
+
+    def chat_completion_stream(self, payload: dict) -> Iterator[dict]:
+        """
+        POST /chat/completions with "stream": true and yield the decoded
+        server-sent chunks as they arrive (the read timeout applies per chunk,
+        not to the whole completion).
+
+        Only establishing the stream is retried; an error after the first
+        chunk is raised as is. The adaptive limit sees the latency of the whole
+        completion once the stream is finished (time to the headers says
+        nothing about decoding load).
+
+        Raises:
+            ProviderUnavailableError: If transient errors persist or the circuit is open
+            requests.RequestException: On a non-retryable error or a broken stream
+        """
+        response, started = self._send({**payload, "stream": True}, stream=True)
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                yield json.loads(data)
+            self.limiter.on_success(time.perf_counter() - started)
+        except GeneratorExit:
+            raise
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            response.close()
+            self.limiter.release()
+
+    def _send(self, payload: dict, stream: bool = False) -> Tuple[requests.Response, float]:
+        """
+        POST with retries; returns a successful response while holding a limiter
+        slot, which the caller releases once the body is consumed, and the
+        perf_counter() start of the successful attempt.
+
+        Streams report their latency to the limiter themselves, when the body is done.
+        """
+        # Deposited up front: failing requests earn their share of retries too
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise ProviderUnavailableError(f"{self.provider} at {self.base_url} is unavailable (circuit open)")
+            self.limiter.acquire()
+            with self._lock:
+                self.requests += 1
+            started = time.perf_counter()
+            response = None
+            try:
+                response = self.session.post(
+                    f"{self.base_url}/chat/completions",
+                    json=payload,
+                    timeout=self.timeout,
+                    stream=stream
+                )
+                if response.status_code not in RETRYABLE_STATUS:
+                    response.raise_for_status()
+                    if not stream:
+                        self.limiter.on_success(time.perf_counter() - started)
+                    self.breaker.record_success()
+                    return response, started
+                error: Exception = requests.HTTPError(f"{response.status_code} from {self.base_url}", response=response)
+            except requests.HTTPError:
+                # Not retryable (4xx): the endpoint itself is healthy
+                self.breaker.record_success()
+                self._failed(response)
+                raise
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            except Exception:
+                # Also settles a half-open probe, so waiting callers are not stuck
+                self.breaker.record_failure()
+                self._failed(response)
+                raise
+
+            # Transient failure: back off, shrink the limit, maybe retry
+            overloaded = isinstance(error, requests.Timeout) or (response is not None and response.status_code == 429)
+            if overloaded:
+                self.limiter.on_overload()
+            if response is None or response.status_code != 429:
+                # A 429 means the provider is up, just busy
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            retry_after = _retry_after_seconds(response)
+            self._failed(response)
+
+            attempt += 1
+            if attempt > self.max_retries:
+                raise ProviderUnavailableError(
+                    f"{self.provider} at {self.base_url} failed after {attempt} attempts: {error}"
+                ) from error
+            if not self.retry_budget.withdraw():
+                raise ProviderUnavailableError(
+                    f"{self.provider} at {self.base_url}: retry budget exhausted ({error})"
+                ) from error
+            with self._lock:
+                self.retries += 1
+            time.sleep(self._backoff(attempt, retry_after))
+
+    def _failed(self, response: Optional[requests.Response]) -> None:
+        with self._lock:
+            self.errors += 1
+        if response is not None:
+            response.close()
+        self.limiter.release()
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter exponential backoff; a Retry-After from the server takes precedence."""
+        if retry_after is not None:
+            return min(retry_after, LLM_BACKOFF_MAX) + random.uniform(0, LLM_BACKOFF_BASE)
+        return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+
+    def stats(self) -> dict:
+        """Request and connection counts; reused = requests served on an existing connection."""
+        connections = 0
+        pool_requests = 0
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                connections += pool.num_connections
+                pool_requests += pool.num_requests
+        return {
+            "provider": self.provider,
+            "base_url": self.base_url,
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "circuit": self.breaker.state,
+            **self.limiter.stats(),
+            "connections_opened": connections,
+            "connections_reused": max(0, pool_requests - connections),
+        }
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class ProviderClientRegistry:
+    """
+    Process-wide registry of provider clients keyed by provider, base URL and credentials.
+
+    Holds at most `max_clients`; the least recently used client is closed when
+    another one is needed (per-user API keys would otherwise accumulate sessions).
+    """
+
+    def __init__(self, max_clients: int = LLM_MAX_CLIENTS):
+        self.max_clients = max(1, max_clients)
+        self._clients: "OrderedDict[Tuple[str, str, str], ProviderClient]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, provider: str, base_url: str, api_key: Optional[str] = None) -> ProviderClient:
+        # Only a digest of the key is kept as registry key
+        key_digest = hashlib.sha256(api_key.encode("utf-8")).hexdigest() if api_key else ""
+        key = (provider, base_url.rstrip("/"), key_digest)
+        evicted = []
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = ProviderClient(provider, base_url, api_key)
+                self._clients[key] = client
+                while len(self._clients) > self.max_clients:
+                    evicted.append(self._clients.popitem(last=False)[1])
+            else:
+                self._clients.move_to_end(key)
+        # A generator still holding an evicted client keeps working: a closed
+        # session opens new connections on its next request
+        for old in evicted:
+            old.close()
+        return client
+
+    def stats(self) -> list:
+        with self._lock:
+            clients = list(self._clients.values())
+        return [c.stats() for c in clients]
+
+    def close(self) -> None:
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+
+
+provider_clients = ProviderClientRegistry()
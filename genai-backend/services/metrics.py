@@ -0,0 +1,245 @@
+import bisect
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+# Latency buckets (seconds) for in-process work: page extraction, DB commits
+FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Latency buckets (seconds) for LLM calls, local models can take minutes
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+CARD_BUCKETS = (0, 1, 2, 3, 4, 6, 8, 12, 16, 24)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count (one series per label combination)."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in values]
+
+
+class Histogram(_Metric):
+    """Bucketed observations with sum and count, as in the Prometheus text format."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Iterable[float] = FAST_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0]
+                self._series[key] = series
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, **labels: str) -> "_Timer":
+        """Context manager observing the elapsed wall time of its block."""
+        return _Timer(self, labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        lines = []
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics in the Prometheus text exposition format (GET /api/metrics).
+
+    Deliberately dependency-free: counters and histograms are plain dicts
+    behind a lock, cheap enough to update on every page and LLM call.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Iterable[float] = FAST_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+extraction_page_seconds = metrics.histogram(
+    "flashcards_extraction_page_seconds",
+    "Time to extract one page, by method (text layer or OCR)",
+    ["method"],
+)
+llm_request_seconds = metrics.histogram(
+    "flashcards_llm_request_seconds",
+    "Latency of LLM provider calls (cache hits excluded)",
+    ["provider", "stage"],
+    buckets=LLM_BUCKETS,
+)
+llm_request_errors = metrics.counter(
+    "flashcards_llm_request_errors_total",
+    "LLM provider calls that raised",
+    ["provider", "stage"],
+)
+llm_prompt_tokens = metrics.histogram(
+    "flashcards_llm_prompt_tokens",
+    "Prompt tokens per LLM call, as reported in the provider usage field",
+    ["provider", "stage"],
+    buckets=TOKEN_BUCKETS,
+)
+llm_completion_tokens = metrics.histogram(
+    "flashcards_llm_completion_tokens",
+    "Completion tokens per LLM call, as reported in the provider usage field",
+    ["provider", "stage"],
+    buckets=TOKEN_BUCKETS,
+)
+llm_parse_failures = metrics.counter(
+    "flashcards_llm_parse_failures_total",
+    "LLM responses without parseable JSON",
+    ["stage"],
+)
+generated_cards_per_chunk = metrics.histogram(
+    "flashcards_cards_per_chunk",
+    "Cards generated per LLM chunk",
+    buckets=CARD_BUCKETS,
+)
+duplicate_cards_skipped = metrics.counter(
+    "flashcards_duplicates_skipped_total",
+    "Generated cards dropped as near-duplicates of the project's deck",
+)
+retrieval_query_seconds = metrics.histogram(
+    "flashcards_retrieval_query_seconds",
+    "Latency of BM25 queries for supporting passages",
+    buckets=(0.0001, 0.00025, 0.0005) + FAST_BUCKETS,
+)
+db_commit_seconds = metrics.histogram(
+    "flashcards_db_commit_seconds",
+    "Duration of Session.commit() including the flush",
+)
+
+
+def track_commit_latency(session_factory) -> None:
+    """Observe the commit latency of every session created by `session_factory`."""
+    if event.contains(session_factory, "before_commit", _commit_started):
+        return
+    event.listen(session_factory, "before_commit", _commit_started)
+    event.listen(session_factory, "after_commit", _commit_finished)
+    event.listen(session_factory, "after_rollback", _commit_aborted)
+
+
+def _commit_started(session) -> None:
+    session.info["commit_started"] = time.perf_counter()
+
+
+def _commit_finished(session) -> None:
+    started: Optional[float] = session.info.pop("commit_started", None)
+    if started is not None:
+        db_commit_seconds.observe(time.perf_counter() - started)
+
+
+def _commit_aborted(session) -> None:
+    session.info.pop("commit_started", None)
@@ -0,0 +1,224 @@
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import fitz  # PyMuPDF
+import numpy as np
+import pytesseract
+from PIL import Image
+
+try:
+    import tesserocr
+except ImportError:  # optional, needs libtesseract
+    tesserocr = None
+
+# "auto" uses tesserocr when it is installed, otherwise pytesseract
+OCR_ENGINE = os.getenv("OCR_ENGINE", "auto")
+# Tesseract language(s), e.g. "deu+eng" (the traineddata must be installed)
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+# Resolution scanned PDF pages are rendered at (72 = PyMuPDF's default)
+OCR_DPI = int(os.getenv("OCR_DPI", "72"))
+# Consecutive scanned pages recognized together (1 = page by page)
+OCR_BATCH_PAGES = int(os.getenv("OCR_BATCH_PAGES", "8"))
+# Idle engines kept warm per engine and language (about one per extraction thread)
+OCR_POOL_SIZE = int(os.getenv("OCR_POOL_SIZE", "4"))
+
+# Side of the difference hash grid: 32 x 32 = 1024 bits, fine enough to tell apart
+# screenshots with the same layout (code, terminals, tables)
+DHASH_SIZE = 32
+# Embedded images of similar size whose hashes differ in at most this many bits are repeats
+DHASH_MAX_DISTANCE = int(os.getenv("DHASH_MAX_DISTANCE", "2"))
+# Repeats differ in width and height by at most this share
+DHASH_MAX_SIZE_RATIO = 0.1
+
+# Tesseract ends the text of every image with this separator (its page_separator default)
+PAGE_SEPARATOR = "\f"
+
+
+class PytesseractEngine:
+    """
+    Tesseract through its command line (pytesseract): one process per call.
+
+    A batch is passed as a list file, so a run of pages costs one process
+    start and one model load instead of one per page.
+    """
+
+    name = "pytesseract"
+
+    def __init__(self, lang: str = OCR_LANG):
+        self.lang = lang
+
+    def image_to_string(self, image: Image.Image) -> str:
+        return pytesseract.image_to_string(image, lang=self.lang)
+
+    def images_to_strings(self, images: Sequence[Image.Image]) -> List[str]:
+        if len(images) <= 1:
+            return [self.image_to_string(image) for image in images]
+        with tempfile.TemporaryDirectory(prefix="ocr_batch_") as tmp:
+            paths = []
+            for i, image in enumerate(images):
+                path = os.path.join(tmp, f"page{i:04d}.png")
+                image.save(path)
+                paths.append(path)
+            list_path = os.path.join(tmp, "pages.txt")
+            with open(list_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(paths) + "\n")
+            output = pytesseract.image_to_string(list_path, lang=self.lang)
+        texts = output.split(PAGE_SEPARATOR)
+        if len(texts) == len(images) + 1 and not texts[-1].strip():
+            texts.pop()
+        if len(texts) != len(images):
+            # Page boundaries are lost (e.g. an unreadable image): recognize one by one
+            print(f"Warning: batched OCR returned {len(texts)} pages for {len(images)} images, retrying page by page")
+            return [self.image_to_string(image) for image in images]
+        return texts
+
+    def close(self) -> None:
+        pass
+
+
+class TesserocrEngine:
+    """
+    In-process Tesseract (tesserocr): the API instance, with its language
+    model loaded once, is reused for every image (see EnginePool).
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, lang: str = OCR_LANG):
+        if tesserocr is None:
+            raise RuntimeError("OCR_ENGINE=tesserocr but the tesserocr package is not installed")
+        self.lang = lang
+        self._api = tesserocr.PyTessBaseAPI(lang=lang)
+
+    def image_to_string(self, image: Image.Image) -> str:
+        self._api.SetImage(image)
+        return self._api.GetUTF8Text()
+
+    def images_to_strings(self, images: Sequence[Image.Image]) -> List[str]:
+        return [self.image_to_string(image) for image in images]
+
+    def close(self) -> None:
+        self._api.End()
+
+
+class EnginePool:
+    """
+    Warm OCR engines of the process, lent to one caller at a time.
+
+    Tesseract API instances are not thread-safe, but they need not stay with
+    the thread that created them: extraction runs in a new thread for every
+    job, so engines are borrowed per OCR call and returned with their
+    language model still loaded. Up to `max_idle` engines per (engine, lang)
+    are kept; close() ends them (IngestionWorker.stop()).
+    """
+
+    def __init__(self, max_idle: int = OCR_POOL_SIZE):
+        self.max_idle = max(1, max_idle)
+        self.created = 0
+        self._idle: Dict[Tuple[str, str], List] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def borrow(self, name: Optional[str] = None, lang: Optional[str] = None) -> Iterator:
+        """The engine for (name, lang), exclusively for the `with` block."""
+        key = _engine_key(name, lang)
+        with self._lock:
+            idle = self._idle.get(key)
+            engine = idle.pop() if idle else None
+        if engine is None:
+            engine = _create_engine(*key)
+            with self._lock:
+                self.created += 1
+        try:
+            yield engine
+        finally:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                keep = len(idle) < self.max_idle
+                if keep:
+                    idle.append(engine)
+            if not keep:
+                engine.close()
+
+    def close(self) -> None:
+        """End all idle engines; engines still borrowed are kept when they come back."""
+        with self._lock:
+            engines = [engine for idle in self._idle.values() for engine in idle]
+            self._idle.clear()
+        for engine in engines:
+            engine.close()
+
+
+def _engine_key(name: Optional[str], lang: Optional[str]) -> Tuple[str, str]:
+    name = name or OCR_ENGINE
+    if name == "auto":
+        name = TesserocrEngine.name if tesserocr is not None else PytesseractEngine.name
+    return name, lang or OCR_LANG
+
+
+def _create_engine(name: str, lang: str):
+    if name == TesserocrEngine.name:
+        return TesserocrEngine(lang)
+    if name == PytesseractEngine.name:
+        return PytesseractEngine(lang)
+    raise ValueError(f"Unknown OCR engine: {name}")
+
+
+# Shared by the ingestion threads; every extraction worker process has its own
+ocr_engines = EnginePool()
+
+
+def render_page(page, dpi: int = OCR_DPI, clip=None) -> Image.Image:
+    """Render a PDF page, or the `clip` rectangle of it, for OCR (grayscale: Tesseract binarizes it anyway)."""
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, clip=clip)
+    return Image.frombytes("L", (pix.width, pix.height), pix.samples)
+
+
+def dhash(image: Image.Image, size: int = DHASH_SIZE) -> int:
+    """
+    Difference hash of `size` x `size` bits: the image shrunk to (size + 1) x size
+    grayscale, one bit per horizontally adjacent pixel pair. Robust to scaling
+    and recompression.
+    """
+    pixels = np.asarray(image.convert("L").resize((size + 1, size), Image.BILINEAR), dtype=np.int16)
+    return int.from_bytes(np.packbits(pixels[:, :-1] > pixels[:, 1:]).tobytes(), "big")
+
+
+def _similar_size(a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+    return all(abs(x - y) <= DHASH_MAX_SIZE_RATIO * max(x, y) for x, y in zip(a, b))
+
+
+class ImageHashCache:
+    """
+    Images already seen in a document, by PDF object (xref) and rendered pixels.
+
+    Logos, headers and figures repeated on every slide are recognized once;
+    later occurrences, re-embedded or not, are found here and skipped: an
+    image repeats one of similar size whose hash is at most `max_distance`
+    bits away.
+    """
+
+    def __init__(self, max_distance: int = DHASH_MAX_DISTANCE, max_entries: int = 1024):
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.xrefs = set()
+        self._entries: List[Tuple[int, Tuple[int, int]]] = []
+
+    def seen_xref(self, xref: int) -> bool:
+        # xref 0 = inline image, no identity to go by
+        return xref > 0 and xref in self.xrefs
+
+    def seen_image(self, image_hash: int, size: Tuple[int, int]) -> bool:
+        return any(
+            _similar_size(size, s) and bin(image_hash ^ h).count("1") <= self.max_distance
+            for h, s in self._entries
+        )
+
+    def add(self, xref: int, image_hash: int, size: Tuple[int, int]) -> None:
+        if xref > 0:
+            self.xrefs.add(xref)
+        if len(self._entries) < self.max_entries:
+            self._entries.append((image_hash, size))
@@ -0,0 +1,219 @@
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+import numpy as np
+from sqlalchemy import func
+
+from models.db import SessionLocal
+from models.tables import File as FileORM, PageText
+from services.chunk_planner import estimate_tokens, split_text
+from services.metrics import retrieval_query_seconds
+
+# Enrich lecture prompts with passages of the project's extended_info files
+RETRIEVAL_ENABLED = os.getenv("RETRIEVAL_ENABLED", "1") != "0"
+# Passages added to one prompt at most, and their total size
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "3"))
+RETRIEVAL_TOKEN_BUDGET = int(os.getenv("RETRIEVAL_TOKEN_BUDGET", "400"))
+# Size of the indexed passages (pages are split at paragraphs, then lines)
+RETRIEVAL_PASSAGE_TOKENS = int(os.getenv("RETRIEVAL_PASSAGE_TOKENS", "150"))
+# Project indexes kept in memory (least recently used are dropped and rebuilt on demand)
+RETRIEVAL_CACHED_PROJECTS = int(os.getenv("RETRIEVAL_CACHED_PROJECTS", "16"))
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# A slide is queried with its rarest terms only; they carry almost all of the score
+MAX_QUERY_TERMS = 64
+
+_TOKEN_RE = re.compile(r"\w\w+", re.UNICODE)
+_EMPTY = np.empty(0, dtype=np.int32)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+class Passage(NamedTuple):
+    """Indexed piece of an extended_info page."""
+    doc_key: str
+    page_number: int
+    text: str
+
+
+class PassageIndex:
+    """
+    BM25 index over the passages of a project's extended_info documents.
+
+    Postings are NumPy arrays per term (passage ids and term frequencies), so
+    a query scores all matching passages with a few vectorized operations per
+    query term. Documents are added incrementally: only the new passages are
+    tokenized and only the postings of their terms are extended.
+    """
+
+    def __init__(self, passage_tokens: int = RETRIEVAL_PASSAGE_TOKENS):
+        self.passage_tokens = passage_tokens
+        self.passages: List[Passage] = []
+        self.doc_keys = set()
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._lengths = np.empty(0, dtype=np.float32)
+        self._lock = threading.Lock()
+        # Set once the project's stored documents are loaded
+        self.ready = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self.passages)
+
+    def add_document(self, doc_key: str, pages: Iterable) -> int:
+        """
+        Split a document's pages into passages and index them (once per doc_key).
+
+        Args:
+            doc_key: Content key of the document (see services/storage.content_key)
+            pages: Objects with text and page_number, e.g. TextChunks or PageText rows
+
+        Returns:
+            Number of added passages
+        """
+        with self._lock:
+            if doc_key in self.doc_keys:
+                return 0
+            self.doc_keys.add(doc_key)
+            first_id = len(self.passages)
+            new_postings: Dict[str, Tuple[List[int], List[int]]] = {}
+            lengths = []
+            for page in pages:
+                for text in split_text(page.text or "", self.passage_tokens):
+                    tokens = tokenize(text)
+                    if not tokens:
+                        continue
+                    passage_id = first_id + len(lengths)
+                    self.passages.append(Passage(doc_key, page.page_number, text))
+                    lengths.append(len(tokens))
+                    for term, tf in Counter(tokens).items():
+                        ids, tfs = new_postings.setdefault(term, ([], []))
+                        ids.append(passage_id)
+                        tfs.append(tf)
+            for term, (ids, tfs) in new_postings.items():
+                old_ids, old_tfs = self._postings.get(term, (_EMPTY, _EMPTY))
+                self._postings[term] = (
+                    np.concatenate((old_ids, np.asarray(ids, dtype=np.int32))),
+                    np.concatenate((old_tfs, np.asarray(tfs, dtype=np.int32))),
+                )
+            self._lengths = np.concatenate((self._lengths, np.asarray(lengths, dtype=np.float32)))
+            return len(lengths)
+
+    def search(self, text: str, k: int = RETRIEVAL_TOP_K) -> List[Tuple[Passage, float]]:
+        """Top-k passages for a text by BM25, best first (only passages sharing a term)."""
+        with retrieval_query_seconds.time(), self._lock:
+            n = len(self.passages)
+            if not n or k <= 0:
+                return []
+            postings = [self._postings[t] for t in set(tokenize(text)) if t in self._postings]
+            if not postings:
+                return []
+            # Rarest terms first (shortest posting lists)
+            postings.sort(key=lambda p: len(p[0]))
+            postings = postings[:MAX_QUERY_TERMS]
+
+            lengths = self._lengths
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / lengths.mean())
+            scores = np.zeros(n, dtype=np.float32)
+            for ids, tfs in postings:
+                df = len(ids)
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                scores[ids] += idf * tfs * (BM25_K1 + 1) / (tfs + norm[ids])
+
+            hits = np.flatnonzero(scores)
+            if len(hits) > k:
+                hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+            hits = hits[np.argsort(-scores[hits], kind="stable")]
+            return [(self.passages[i], float(scores[i])) for i in hits]
+
+    def context(self, text: str, k: int = RETRIEVAL_TOP_K, token_budget: int = RETRIEVAL_TOKEN_BUDGET) -> List[str]:
+        """Texts of the best passages for a prompt, in rank order within the token budget."""
+        selected = []
+        remaining = token_budget
+        for passage, _ in self.search(text, k):
+            size = estimate_tokens(passage.text)
+            if size > remaining:
+                continue
+            selected.append(passage.text)
+            remaining -= size
+        return selected
+
+
+class ProjectRetrieval:
+    """
+    Passage indexes per project, built lazily from the indexed page text
+    (PageText) of the project's extended_info files and kept for the most
+    recently used projects.
+    """
+
+    def __init__(self, max_projects: int = RETRIEVAL_CACHED_PROJECTS):
+        self.max_projects = max(1, max_projects)
+        self._indexes: "OrderedDict[str, PassageIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, project_id: str) -> PassageIndex:
+        with self._lock:
+            index = self._indexes.get(project_id)
+            loading = index is None
+            if loading:
+                # Registered before loading, so documents added meanwhile are not lost
+                index = PassageIndex()
+                self._indexes[project_id] = index
+                while len(self._indexes) > self.max_projects:
+                    self._indexes.popitem(last=False)
+            else:
+                self._indexes.move_to_end(project_id)
+        if loading:
+            try:
+                self._load(project_id, index)
+            finally:
+                index.ready.set()
+        index.ready.wait()
+        return index
+
+    def add_document(self, project_id: str, doc_key: str, pages: Iterable) -> int:
+        """Index a new extended_info document; a no-op for projects not loaded yet (they load it from PageText)."""
+        with self._lock:
+            index = self._indexes.get(project_id)
+        return index.add_document(doc_key, pages) if index is not None else 0
+
+    def invalidate(self, project_id: str) -> None:
+        """Drop a project's index (extended_info file deleted); rebuilt on the next query."""
+        with self._lock:
+            self._indexes.pop(project_id, None)
+
+    def context(self, project_id: str, text: str) -> List[str]:
+        """Supporting passages for a lecture chunk of a project (see PassageIndex.context)."""
+        return self.get(project_id).context(text)
+
+    @staticmethod
+    def _load(project_id: str, index: PassageIndex) -> None:
+        db = SessionLocal()
+        try:
+            doc_keys = (
+                db.query(func.coalesce(FileORM.content_hash, FileORM.id))
+                .filter(FileORM.project_id == project_id, FileORM.category == "extended_info")
+                .distinct()
+                .all()
+            )
+            for (doc_key,) in doc_keys:
+                pages = (
+                    db.query(PageText)
+                    .filter(PageText.doc_key == doc_key)
+                    .order_by(PageText.page_number)
+                    .all()
+                )
+                index.add_document(doc_key, pages)
+        except Exception as e:
+            print(f"Warning: failed to load retrieval index of project {project_id}: {e}")
+        finally:
+            db.close()
+
+
+retrieval = ProjectRetrieval()
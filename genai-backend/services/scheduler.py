@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from models.tables import Flashcard as FlashcardORM
+
+# Study levels (0=new/again, 1=unsure, 2=know it) as SM-2 answer quality (0-5)
+LEVEL_QUALITY = {0: 1, 1: 3, 2: 5}
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+# A failed card is shown again after this delay
+RELEARN_DELAY = timedelta(minutes=10)
+
+
+def apply_review(card: FlashcardORM, level: int, reviewed_at: Optional[datetime] = None) -> FlashcardORM:
+    """
+    Record a review on a card: set its level, count the review and schedule the
+    next one with the SM-2 algorithm.
+
+    Args:
+        card: Flashcard ORM object (modified in place)
+        level: Level chosen by the learner (0-2)
+        reviewed_at: Time of the review (naive UTC, default: now)
+
+    Returns:
+        The updated card
+    """
+    reviewed_at = reviewed_at or datetime.utcnow()
+    quality = LEVEL_QUALITY.get(level, 1)
+    ease = card.ease or DEFAULT_EASE
+    repetitions = card.repetitions or 0
+    interval = card.interval_days or 0.0
+
+    if quality < 3:
+        repetitions = 0
+        interval = 0.0
+        due_at = reviewed_at + RELEARN_DELAY
+    else:
+        repetitions += 1
+        if repetitions == 1:
+            interval = 1.0
+        elif repetitions == 2:
+            interval = 6.0
+        else:
+            interval = round(interval * ease, 2)
+        due_at = reviewed_at + timedelta(days=interval)
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+    card.level = level
+    card.review_count = (card.review_count or 0) + 1
+    card.repetitions = repetitions
+    card.interval_days = interval
+    card.ease = round(ease, 3)
+    card.due_at = due_at
+    return card
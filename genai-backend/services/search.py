@@ -0,0 +1,167 @@
+import os
+import re
+from typing import Iterable, List, Optional
+
+from sqlalchemy import func, insert, text
+from sqlalchemy.orm import Session
+
+from models.db import SessionLocal
+from models.schemas import ProcessedDocument, TextChunk
+from models.tables import File as FileORM, PageText
+from services.storage import content_key, extracted_paths
+
+# Markers around matched terms in highlights and snippets
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+# Tokens of context around a match in snippets
+SNIPPET_TOKENS = 16
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_CARD_SEARCH = text(
+    "SELECT f.id, f.question, f.answer, f.level,"
+    f" highlight(flashcards_fts, 0, '{SNIPPET_START}', '{SNIPPET_END}') AS question_highlight,"
+    f" highlight(flashcards_fts, 1, '{SNIPPET_START}', '{SNIPPET_END}') AS answer_highlight,"
+    " bm25(flashcards_fts, 1.0, 1.0, 0.0) AS score"
+    " FROM flashcards_fts JOIN flashcards f ON f.rowid = flashcards_fts.rowid"
+    " WHERE flashcards_fts MATCH :query"
+    " ORDER BY score LIMIT :limit"
+)
+
+_PAGE_SEARCH = text(
+    "SELECT p.doc_key, p.page_number,"
+    f" snippet(page_texts_fts, 0, '{SNIPPET_START}', '{SNIPPET_END}', '…', {SNIPPET_TOKENS}) AS snippet,"
+    " bm25(page_texts_fts, 1.0, 0.0) AS score"
+    " FROM page_texts_fts JOIN page_texts p ON p.id = page_texts_fts.rowid"
+    " WHERE page_texts_fts MATCH :query"
+    " ORDER BY score LIMIT :limit"
+)
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace('"', '""') + '"'
+
+
+def fts_query(q: str) -> Optional[str]:
+    """
+    Turn free user input into a safe FTS5 query.
+
+    Every word becomes a quoted token, so FTS5 operators and quotes in the
+    input have no effect; all tokens must match. Returns None if the input has no words.
+    """
+    tokens = _TOKEN_RE.findall(q or "")
+    if not tokens:
+        return None
+    return " ".join(_quote(t) for t in tokens)
+
+
+def is_indexed(db: Session, doc_key: str) -> bool:
+    return db.query(PageText.id).filter(PageText.doc_key == doc_key).first() is not None
+
+
+def index_pages(db: Session, doc_key: str, chunks: Iterable[TextChunk]) -> int:
+    """
+    Add the extracted pages of a document to the search index (once per content).
+    The caller commits. Returns the number of indexed pages.
+    """
+    if is_indexed(db, doc_key):
+        return 0
+    rows = [
+        {"doc_key": doc_key, "page_number": c.page_number, "text": c.text}
+        for c in chunks if c.text
+    ]
+    if rows:
+        db.execute(insert(PageText), rows)
+    return len(rows)
+
+
+def backfill_page_index() -> int:
+    """Index extractions that were stored before the search index existed. Returns the number of documents."""
+    db = SessionLocal()
+    indexed = 0
+    try:
+        missing = (
+            db.query(FileORM)
+            .filter(~db.query(PageText.id).filter(
+                PageText.doc_key == func.coalesce(FileORM.content_hash, FileORM.id)
+            ).exists())
+            .all()
+        )
+        seen = set()
+        for file_record in missing:
+            doc_key = content_key(file_record)
+            json_path, _ = extracted_paths(file_record)
+            if doc_key in seen or not os.path.exists(json_path):
+                continue
+            seen.add(doc_key)
+            try:
+                stored = ProcessedDocument.parse_file(json_path)
+                if index_pages(db, doc_key, stored.chunks):
+                    indexed += 1
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"Warning: failed to index {json_path}: {e}")
+    finally:
+        db.close()
+    if indexed:
+        print(f"Indexed {indexed} stored extractions for search")
+    return indexed
+
+
+def rebuild_card_index() -> None:
+    """
+    Rebuild flashcards_fts from the flashcards table.
+
+    The index is keyed by the implicit rowid of flashcards (its primary key is a
+    string), which a VACUUM may renumber; rebuilding at startup realigns it.
+    """
+    with SessionLocal() as db:
+        db.execute(text("INSERT INTO flashcards_fts(flashcards_fts) VALUES ('rebuild')"))
+        db.commit()
+
+
+def search_project(db: Session, project_id: str, q: str, limit: int = 20) -> dict:
+    """
+    Ranked (BM25) full-text search over the cards and the extracted pages of a project.
+
+    Returns:
+        {"cards": [...], "pages": [...]}, best matches first; cards come with
+        highlighted question/answer, pages with a highlighted snippet
+    """
+    query = fts_query(q)
+    if query is None:
+        return {"cards": [], "pages": []}
+
+    # The project filter is part of the FTS query, so only this project's rows are ranked
+    card_query = f"{{question answer}} : ({query}) AND project_id : {_quote(project_id)}"
+    cards = [
+        {
+            "id": r.id,
+            "question": r.question,
+            "answer": r.answer,
+            "level": r.level or 0,
+            "question_highlight": r.question_highlight,
+            "answer_highlight": r.answer_highlight,
+            "score": round(-r.score, 4),
+        }
+        for r in db.execute(_CARD_SEARCH, {"query": card_query, "limit": limit})
+    ]
+
+    # Page text is shared between files with the same content, so map it back to this project's files
+    files = {}
+    for f in db.query(FileORM.id, FileORM.original_filename, FileORM.content_hash).filter(FileORM.project_id == project_id):
+        files.setdefault(f.content_hash or f.id, f)
+    pages: List[dict] = []
+    if files:
+        page_query = f"text : ({query}) AND doc_key : ({' OR '.join(_quote(k) for k in files)})"
+        for r in db.execute(_PAGE_SEARCH, {"query": page_query, "limit": limit}):
+            f = files[r.doc_key]
+            pages.append({
+                "file_id": f.id,
+                "filename": f.original_filename,
+                "page_number": r.page_number,
+                "snippet": r.snippet,
+                "score": round(-r.score, 4),
+            })
+    return {"cards": cards, "pages": pages}
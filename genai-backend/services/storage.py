@@ -0,0 +1,156 @@
+import hashlib
+import os
+import shutil
+from typing import BinaryIO, Iterable, List, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.schemas import ProcessedDocument
+from models.tables import Blob, File as FileORM, PageText
+
+# Upload directories
+UPLOAD_DIR = "uploads"
+BLOB_DIR = os.path.join(UPLOAD_DIR, "blobs")
+EXTRACTED_DIR = os.path.join(UPLOAD_DIR, "extracted")
+EXTRACTED_BLOB_DIR = os.path.join(EXTRACTED_DIR, "blobs")
+# Per-file layout used before uploads were content-addressed
+LECTURE_NOTES_DIR = os.path.join(UPLOAD_DIR, "lecture_notes")
+EXTENDED_INFO_DIR = os.path.join(UPLOAD_DIR, "extended_info")
+EXTRACTED_LECTURE_DIR = os.path.join(EXTRACTED_DIR, "lecture_notes")
+EXTRACTED_EXTENDED_DIR = os.path.join(EXTRACTED_DIR, "extended_info")
+for _d in (UPLOAD_DIR, BLOB_DIR, EXTRACTED_DIR, EXTRACTED_BLOB_DIR):
+    os.makedirs(_d, exist_ok=True)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_stream(stream: BinaryIO) -> Tuple[str, int]:
+    """Return (sha256 hex digest, size) of a stream, read in chunks."""
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        block = stream.read(HASH_CHUNK_SIZE)
+        if not block:
+            break
+        digest.update(block)
+        size += len(block)
+    return digest.hexdigest(), size
+
+
+def content_key(file_record: FileORM) -> str:
+    """Key of a file's content in the page index: the blob hash, or the file id for legacy files."""
+    return file_record.content_hash or file_record.id
+
+
+def blob_extraction_paths(sha256: str) -> Tuple[str, str]:
+    """Return the (json, md) paths of the shared extraction of a blob."""
+    return (
+        os.path.join(EXTRACTED_BLOB_DIR, f"{sha256}.json"),
+        os.path.join(EXTRACTED_BLOB_DIR, f"{sha256}.md"),
+    )
+
+
+def extracted_paths(file_record: FileORM) -> Tuple[str, str]:
+    """Return the (json, md) paths of the extraction artifacts of a file."""
+    if file_record.content_hash:
+        return blob_extraction_paths(file_record.content_hash)
+    target_dir = EXTRACTED_LECTURE_DIR if file_record.category == "lecture_notes" else EXTRACTED_EXTENDED_DIR
+    return (
+        os.path.join(target_dir, f"{file_record.id}.json"),
+        os.path.join(target_dir, f"{file_record.id}.md"),
+    )
+
+
+def save_extraction(processed: ProcessedDocument, json_path: str, md_path: str) -> None:
+    """
+    Store an extraction as Markdown (better for LLM processing) and JSON.
+
+    The JSON is written last and atomically, because its presence marks the
+    extraction as complete for resumed jobs and later uploads of the same content.
+    """
+    md_lines = [f"# {processed.filename}\n", f"**Total Pages:** {processed.total_pages}\n\n"]
+    for chunk in processed.chunks:
+        md_lines.append(f"## Page {chunk.page_number}\n\n{chunk.text}\n\n---\n\n")
+    tmp_md_path = f"{md_path}.tmp"
+    with open(tmp_md_path, "w", encoding="utf-8") as mf:
+        mf.writelines(md_lines)
+    os.replace(tmp_md_path, md_path)
+
+    tmp_path = f"{json_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as jf:
+        jf.write(processed.json())
+    os.replace(tmp_path, json_path)
+
+
+def store_blob(db: Session, stream: BinaryIO, filename: str) -> Blob:
+    """
+    Store an uploaded stream content-addressed and take a reference on it.
+
+    The stream is hashed first; only content that is not stored yet is written
+    to disk. Must be called before anything else is pending in the session;
+    the caller commits it together with the new File row.
+    """
+    sha256, size = hash_stream(stream)
+    blob = db.query(Blob).filter(Blob.sha256 == sha256).first()
+    if blob is None:
+        ext = os.path.splitext(filename)[1].lower()
+        blob_path = os.path.join(BLOB_DIR, sha256[:2], f"{sha256}{ext}")
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        if not os.path.exists(blob_path):
+            stream.seek(0)
+            tmp_path = f"{blob_path}.tmp"
+            with open(tmp_path, "wb") as buffer:
+                shutil.copyfileobj(stream, buffer)
+            os.replace(tmp_path, blob_path)
+        blob = Blob(sha256=sha256, stored_path=blob_path, size=size, ref_count=0)
+        db.add(blob)
+        try:
+            db.flush()
+        except IntegrityError:
+            # Stored concurrently by another upload
+            db.rollback()
+            blob = db.query(Blob).filter(Blob.sha256 == sha256).first()
+    blob.ref_count = Blob.ref_count + 1
+    db.flush()
+    db.refresh(blob)
+    return blob
+
+
+def release_file_content(db: Session, file_record: FileORM) -> List[str]:
+    """
+    Drop a File's reference on its content; the blob, its extraction and its
+    indexed page text are only removed once no other File (of any project) uses them.
+    Files uploaded before content addressing own their stored_path directly.
+
+    Returns the paths that are no longer referenced. The caller removes them
+    with remove_files() once the session is committed, so a failed commit
+    never leaves rows pointing at deleted files.
+    """
+    paths = []
+    if file_record.content_hash:
+        blob = db.query(Blob).filter(Blob.sha256 == file_record.content_hash).first()
+        if blob is not None:
+            blob.ref_count = Blob.ref_count - 1
+            db.flush()
+            db.refresh(blob)
+            if blob.ref_count <= 0:
+                paths.append(blob.stored_path)
+                paths.extend(blob_extraction_paths(blob.sha256))
+                db.query(PageText).filter(PageText.doc_key == blob.sha256).delete(synchronize_session=False)
+                db.delete(blob)
+    else:
+        paths.append(file_record.stored_path)
+        paths.extend(extracted_paths(file_record))
+        db.query(PageText).filter(PageText.doc_key == file_record.id).delete(synchronize_session=False)
+    return paths
+
+
+def remove_files(paths: Iterable[str]) -> None:
+    """Best-effort removal of released files (see release_file_content)."""
+    for path in paths:
+        try:
+            if path and os.path.exists(path):
+                os.remove(path)
+        except Exception as e:
+            print(f"Warning: failed to remove {path}: {e}")
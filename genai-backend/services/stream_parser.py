@@ -0,0 +1,79 @@
+import json
+import re
+from typing import Iterable, List
+
+_ARRAY_START_RE = re.compile(r'"(?P<key>[A-Za-z_]+)"\s*:\s*\[')
+
+
+class IncrementalArrayParser:
+    """
+    Incremental parser for streamed LLM JSON of the shape {"results": [{...}, {...}]}.
+
+    Text is fed as it arrives; every object of the watched array is returned as
+    soon as its closing brace is received, long before the whole response is
+    valid JSON. Text before the array (e.g. prose or a code fence) is ignored.
+    """
+
+    def __init__(self, keys: Iterable[str] = ("results", "cards")):
+        self.keys = set(keys)
+        self._buffer = ""
+        self._pos = 0
+        self._in_array = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._object_start = -1
+
+    def feed(self, text: str) -> List[dict]:
+        """Add streamed text and return the array objects completed by it."""
+        if self._finished or not text:
+            return []
+        self._buffer += text
+        items: List[dict] = []
+
+        if not self._in_array:
+            for match in _ARRAY_START_RE.finditer(self._buffer, self._pos):
+                if match.group("key") in self.keys:
+                    self._in_array = True
+                    self._pos = match.end()
+                    break
+            else:
+                # Keep scanning from near the end; a key may be split across feeds
+                self._pos = max(self._pos, len(self._buffer) - 32)
+                return items
+
+        buf = self._buffer
+        i = self._pos
+        while i < len(buf):
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 0 and ch == "{":
+                    self._object_start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0 and ch == "]":
+                    self._finished = True
+                    i += 1
+                    break
+                self._depth -= 1
+                if self._depth == 0 and ch == "}" and self._object_start >= 0:
+                    try:
+                        item = json.loads(buf[self._object_start:i + 1])
+                        if isinstance(item, dict):
+                            items.append(item)
+                    except ValueError:
+                        pass
+                    self._object_start = -1
+            i += 1
+        self._pos = i
+        return items
@@ -0,0 +1,30 @@
+import os
+import sys
+import tempfile
+
+# Throw-away databases, set before the app modules create their engines
+_tmp = tempfile.mkdtemp(prefix="genai_tests_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'app.db')}")
+os.environ.setdefault("LLM_CACHE_PATH", os.path.join(_tmp, "llm_cache.db"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from models.db import SessionLocal, engine
+from models.migrations import init_db
+from models.tables import Base
+
+
+@pytest.fixture
+def db():
+    """Session on a freshly migrated database, emptied again after the test."""
+    init_db(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
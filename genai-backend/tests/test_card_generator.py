@@ -0,0 +1,73 @@
+import json
+import threading
+import time
+
+from models.schemas import TextChunk
+from services import card_generator
+from services.card_generator import CardGenerator
+from services.llm_cache import LLMCache
+
+GOOD = json.dumps({"cards": [{
+    "concept": "TD error", "evidence": "the TD error is the difference", "confidence": 0.9,
+    "should_generate": True, "question": "What is the TD error?", "answer": "The difference between estimates.",
+}]})
+TRUNCATED = '{"cards": [{"concept": "TD error", "evidence": "the TD'
+
+
+def _generator(tmp_path, monkeypatch, responses):
+    monkeypatch.setattr(card_generator, "llm_cache", LLMCache(path=str(tmp_path / "cache.db")))
+    generator = CardGenerator(provider="lmstudio", mode="fused")
+    calls = []
+
+    def fake_call(prompt, max_tokens=2000, on_item=None, stage="generate"):
+        calls.append(prompt)
+        return responses[len(calls) - 1]
+
+    monkeypatch.setattr(generator, "_call_lmstudio", fake_call)
+    return generator, calls
+
+
+def test_unparseable_response_is_not_cached(tmp_path, monkeypatch):
+    generator, calls = _generator(tmp_path, monkeypatch, [TRUNCATED, GOOD, GOOD])
+
+    assert generator.generate_cards_from_text("slide", mode="fused") == []
+    first_retry = generator.generate_cards_from_text("slide", mode="fused")
+    second_retry = generator.generate_cards_from_text("slide", mode="fused")
+
+    assert [c.question for c in first_retry] == ["What is the TD error?"]
+    assert second_retry == first_retry
+    # The truncated answer was asked again, the good one came from the cache
+    assert len(calls) == 2
+
+
+def test_empty_plan_is_cached(tmp_path, monkeypatch):
+    generator, calls = _generator(tmp_path, monkeypatch, ['{"concepts": []}'])
+
+    assert generator.plan_concepts("title slide") == []
+    assert generator.plan_concepts("title slide") == []
+    # Nothing to learn on the slide is an answer too
+    assert len(calls) == 1
+
+
+def test_chunks_in_flight_follow_the_adaptive_window(monkeypatch):
+    generator = CardGenerator(provider="lmstudio", max_concurrency=8, chunk_token_budget=0)
+    monkeypatch.setattr(generator.client.limiter, "limit", 3.0)
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def generate(text, **kwargs):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return []
+
+    monkeypatch.setattr(generator, "generate_cards_from_text", generate)
+    chunks = [TextChunk(text=f"page {i}", page_number=i, source_file="a.pdf") for i in range(1, 13)]
+
+    results = list(generator.iter_cards_from_chunks(chunks))
+
+    assert [chunk.page_number for chunk, _ in results] == list(range(1, 13))
+    assert peak[0] == 3
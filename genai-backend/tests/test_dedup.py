@@ -0,0 +1,38 @@
+from services.card_generator import GeneratedFlashcard
+from services.dedup import NearDuplicateIndex, screen_cards
+
+
+def _card(question: str, answer: str) -> GeneratedFlashcard:
+    return GeneratedFlashcard(question=question, answer=answer)
+
+
+def test_near_identical_questions_about_different_concepts_are_kept():
+    reward = _card(
+        "What is the role of the reward function in reinforcement learning?",
+        "It maps each state-action pair to a scalar signal that defines the goal of the agent.",
+    )
+    value = _card(
+        "What is the role of the value function in reinforcement learning?",
+        "It estimates the expected return from a state when following the policy.",
+    )
+
+    kept, skipped = screen_cards(NearDuplicateIndex(), [reward, value])
+
+    assert kept == [reward, value]
+    assert skipped == 0
+
+
+def test_reworded_duplicate_is_dropped():
+    card = _card(
+        "What is the role of the reward function in reinforcement learning?",
+        "It maps each state-action pair to a scalar signal that defines the goal of the agent.",
+    )
+    again = _card(
+        "What is the role of the reward function in reinforcement learning ?",
+        "It maps each state-action pair to a scalar signal that defines the goal of the agent",
+    )
+
+    kept, skipped = screen_cards(NearDuplicateIndex(), [card, again])
+
+    assert kept == [card]
+    assert skipped == 1
@@ -0,0 +1,48 @@
+import io
+
+import fitz
+from PIL import Image, ImageDraw
+
+from services import extractor, ocr
+from services.ocr import EnginePool
+
+
+def _slide_pdf(path: str) -> None:
+    """One page with a short text layer and a screenshot covering most of it."""
+    screenshot = Image.new("RGB", (400, 300), "white")
+    draw = ImageDraw.Draw(screenshot)
+    for y in range(20, 280, 30):
+        draw.rectangle([20, y, 20 + (y * 7) % 350, y + 12], fill="black")
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 60), "Terminal output")
+    page.insert_image(fitz.Rect(50, 100, 550, 700), stream=_png(screenshot))
+    doc.save(path)
+    doc.close()
+
+
+def _png(image: Image.Image) -> bytes:
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class _BrokenEngine:
+    def images_to_strings(self, images):
+        raise RuntimeError("tesseract is not installed")
+
+    def close(self):
+        pass
+
+
+def test_region_ocr_failure_keeps_text_layer(tmp_path, monkeypatch):
+    path = str(tmp_path / "slides.pdf")
+    _slide_pdf(path)
+    monkeypatch.setattr(ocr, "_create_engine", lambda name, lang: _BrokenEngine())
+    monkeypatch.setattr(extractor, "ocr_engines", EnginePool())
+
+    timings = []
+    chunks = list(extractor._iter_page_range(path, "slides.pdf", 0, 1, timings))
+
+    assert [c.text for c in chunks] == ["Terminal output"]
+    assert [method for method, _ in timings] == ["text"]
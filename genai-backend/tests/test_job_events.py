@@ -0,0 +1,87 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from main import app
+from models.tables import File, IngestionJob, Project
+from services.events import JobEventBroker, job_events
+from services.jobs import worker
+
+
+def _backlog(job_id: str):
+    async def subscribe():
+        queue, backlog = job_events.subscribe(job_id)
+        job_events.unsubscribe(job_id, queue)
+        return backlog
+
+    return asyncio.run(subscribe())
+
+
+def test_retry_drops_the_previous_run_from_the_backlog(db, monkeypatch):
+    monkeypatch.setattr(worker, "enqueue", lambda *args, **kwargs: None)
+    project = Project(title="Retry")
+    db.add(project)
+    db.flush()
+    file = File(original_filename="a.pdf", stored_path="a.pdf", project_id=project.id)
+    db.add(file)
+    db.flush()
+    job = IngestionJob(project_id=project.id, file_id=file.id, status="failed")
+    db.add(job)
+    db.commit()
+    job_events.publish(job.id, "done", {"id": job.id, "status": "failed"})
+
+    response = TestClient(app).post(f"/jobs/{job.id}/retry")
+
+    assert response.status_code == 200
+    assert _backlog(job.id) == []
+    job_events.publish(job.id, "progress", {"id": job.id, "status": "running"})
+    # Ids keep counting, so a client's Last-Event-ID of the old run stays below the new events
+    assert [(event_id, event) for event_id, event, _ in _backlog(job.id)] == [(2, "progress")]
+
+
+def _parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_project_stream_follows_several_jobs_on_one_connection(db):
+    project = Project(title="Upload")
+    db.add(project)
+    db.flush()
+    finished = IngestionJob(project_id=project.id, status="done", cards_created=4)
+    running = IngestionJob(project_id=project.id, status="running")
+    db.add_all([finished, running])
+    db.commit()
+    job_events.publish(running.id, "card", {"pages": [1], "question": "Q?", "answer": "A."})
+    job_events.publish(running.id, "done", {"id": running.id, "status": "done", "cards_created": 1})
+
+    with TestClient(app).stream("GET", f"/projects/{project.id}/jobs/events?job_ids={finished.id},{running.id}") as response:
+        body = response.read().decode()
+
+    events = [(event, data["job_id"]) for event, data in _parse_sse(body)]
+    assert events == [
+        ("progress", finished.id),
+        ("done", finished.id),
+        ("progress", running.id),
+        ("card", running.id),
+        ("done", running.id),
+    ]
+
+
+def test_event_ids_survive_history_eviction():
+    broker = JobEventBroker(max_jobs=1)
+    broker.publish("a", "card", {})
+    broker.publish("a", "card", {})
+    broker.publish("b", "card", {})  # drops the history of "a"
+    broker.publish("a", "done", {})
+
+    async def subscribe():
+        queue, backlog = broker.subscribe("a", after=2)
+        broker.unsubscribe("a", queue)
+        return backlog
+
+    assert [(event_id, event) for event_id, event, _ in asyncio.run(subscribe())] == [(3, "done")]
@@ -0,0 +1,64 @@
+from models.schemas import ProcessedDocument, TextChunk
+from models.tables import File, Flashcard, IngestionJob, Project
+from services import jobs
+from services.card_generator import GeneratedFlashcard
+from services.jobs import IngestionWorker
+from services.llm_clients import ProviderUnavailableError
+
+
+class _SplitPageGenerator:
+    """Generates page 1 in two parts; with `fail`, the provider goes down after the first."""
+
+    def __init__(self, fail: bool):
+        self.fail = fail
+
+    def iter_cards_from_chunks(self, chunks, **kwargs):
+        for part, partial in ((1, True), (2, False)):
+            if not partial and self.fail:
+                raise ProviderUnavailableError("lmstudio is down")
+            chunk = TextChunk(text=f"part {part}", page_number=1, source_file="big.pdf", pages=[1], partial=partial)
+            yield chunk, [GeneratedFlashcard(question=f"What is part {part} about?", answer=f"Half {part} of page one.")]
+
+
+def _run_split_page_job(db, tmp_path, monkeypatch, fail: bool) -> IngestionJob:
+    json_path, md_path = str(tmp_path / "big.json"), str(tmp_path / "big.md")
+    document = ProcessedDocument(filename="big.pdf", total_pages=1, chunks=[
+        TextChunk(text="a very long page", page_number=1, source_file="big.pdf"),
+    ])
+    with open(json_path, "w", encoding="utf-8") as f:
+        f.write(document.model_dump_json())
+    monkeypatch.setattr(jobs, "extracted_paths", lambda file_record: (json_path, md_path))
+    monkeypatch.setattr(jobs, "build_generator", lambda **kwargs: _SplitPageGenerator(fail))
+
+    project = Project(title="Split")
+    db.add(project)
+    db.flush()
+    file = File(original_filename="big.pdf", stored_path="big.pdf", project_id=project.id)
+    db.add(file)
+    db.flush()
+    job = IngestionJob(project_id=project.id, file_id=file.id)
+    db.add(job)
+    db.commit()
+
+    IngestionWorker().run_job(job.id)
+
+    db.expire_all()
+    return db.query(IngestionJob).filter(IngestionJob.id == job.id).one()
+
+
+def test_split_page_parts_are_not_committed_before_the_last_part(db, tmp_path, monkeypatch):
+    job = _run_split_page_job(db, tmp_path, monkeypatch, fail=True)
+
+    assert job.status == "failed"
+    assert job.last_page == 0
+    assert job.cards_created == 0
+    assert db.query(Flashcard).filter(Flashcard.project_id == job.project_id).count() == 0
+
+
+def test_split_page_parts_are_committed_with_the_last_part(db, tmp_path, monkeypatch):
+    job = _run_split_page_job(db, tmp_path, monkeypatch, fail=False)
+
+    assert job.status == "done"
+    assert job.last_page == 1
+    assert job.cards_created == 2
+    assert db.query(Flashcard).filter(Flashcard.project_id == job.project_id).count() == 2
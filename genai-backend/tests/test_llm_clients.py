@@ -0,0 +1,75 @@
+import time
+
+from services.llm_clients import CircuitBreaker, ProviderClient, ProviderClientRegistry
+
+
+class _SlowStream:
+    """A streamed completion whose chunks arrive over `seconds` after the headers."""
+
+    status_code = 200
+    headers = {}
+
+    def __init__(self, chunks: int, seconds: float):
+        self.chunks = chunks
+        self.seconds = seconds
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self, decode_unicode=False):
+        for i in range(self.chunks):
+            time.sleep(self.seconds / self.chunks)
+            yield f'data: {{"choices": [{{"delta": {{"content": "{i}"}}}}]}}'
+        yield "data: [DONE]"
+
+    def close(self):
+        pass
+
+
+def test_stream_latency_is_measured_at_completion(monkeypatch):
+    client = ProviderClient("lmstudio", "http://stub.invalid/v1")
+    monkeypatch.setattr(client.session, "post", lambda *args, **kwargs: _SlowStream(5, 0.2))
+
+    chunks = list(client.chat_completion_stream({"messages": []}))
+
+    assert len(chunks) == 5
+    assert client.limiter.latency_ewma >= 0.2
+    assert client.limiter.in_flight == 0
+
+
+def test_every_request_deposits_into_the_retry_budget():
+    client = ProviderClient("lmstudio", "http://stub.invalid/v1", max_retries=0)
+    client.retry_budget.balance = 0.0
+    client.breaker.threshold = 1000
+
+    for _ in range(5):
+        try:
+            client.chat_completion({"messages": []})
+        except Exception:
+            pass
+
+    assert abs(client.retry_budget.balance - 5 * client.retry_budget.ratio) < 1e-9
+
+
+def test_registry_closes_the_least_recently_used_client(monkeypatch):
+    registry = ProviderClientRegistry(max_clients=2)
+    closed = []
+    monkeypatch.setattr(ProviderClient, "close", lambda self: closed.append(self.session.headers["Authorization"]))
+
+    first = registry.get("openai", "http://stub.invalid/v1", "key-1")
+    registry.get("openai", "http://stub.invalid/v1", "key-2")
+    assert registry.get("openai", "http://stub.invalid/v1", "key-1") is first
+    registry.get("openai", "http://stub.invalid/v1", "key-3")
+
+    assert closed == ["Bearer key-2"]
+    assert len(registry.stats()) == 2
+
+
+def test_half_open_wait_gives_up_after_the_probe_wait():
+    breaker = CircuitBreaker(threshold=1, cooldown=0, probe_wait=0.1)
+    breaker.record_failure()
+    assert breaker.allow()  # the probe
+
+    started = time.monotonic()
+    assert not breaker.allow()
+    assert time.monotonic() - started < 1
@@ -0,0 +1,51 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.migrations import init_db
+from models.tables import File, IngestionJob
+
+# Tables as created by the app before content-addressed uploads and the LLM cache
+LEGACY_SCHEMA = [
+    "CREATE TABLE projects (id VARCHAR PRIMARY KEY, title VARCHAR, description TEXT,"
+    " flashcard_scope VARCHAR, flashcard_density INTEGER, created_at DATETIME, updated_at DATETIME)",
+    "CREATE TABLE files (id VARCHAR PRIMARY KEY, original_filename VARCHAR, stored_path VARCHAR,"
+    " mime_type VARCHAR, size INTEGER, category VARCHAR, project_id VARCHAR REFERENCES projects (id),"
+    " created_at DATETIME)",
+    "CREATE TABLE flashcards (id VARCHAR PRIMARY KEY, question TEXT, answer TEXT, level INTEGER,"
+    " important INTEGER, review_count INTEGER, project_id VARCHAR REFERENCES projects (id),"
+    " created_at DATETIME, updated_at DATETIME)",
+    "CREATE TABLE ingestion_jobs (id VARCHAR PRIMARY KEY, project_id VARCHAR REFERENCES projects (id),"
+    " file_id VARCHAR REFERENCES files (id), status VARCHAR, provider VARCHAR, lmstudio_url VARCHAR,"
+    " total_pages INTEGER, pages_done INTEGER, last_page INTEGER, cards_created INTEGER, errors TEXT,"
+    " attempts INTEGER, created_at DATETIME, updated_at DATETIME, finished_at DATETIME)",
+    "INSERT INTO projects (id, title) VALUES ('p1', 'Legacy')",
+    "INSERT INTO files (id, original_filename, stored_path, project_id) VALUES ('f1', 'old.pdf', 'uploads/old.pdf', 'p1')",
+    "INSERT INTO ingestion_jobs (id, project_id, file_id, status) VALUES ('j1', 'p1', 'f1', 'done')",
+]
+
+
+def _legacy_session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.exec_driver_sql(statement)
+    init_db(engine)
+    return sessionmaker(bind=engine)()
+
+
+def test_legacy_files_get_content_hash(tmp_path):
+    db = _legacy_session(tmp_path)
+    try:
+        file = db.query(File).filter(File.id == "f1").one()
+        assert file.content_hash is None
+    finally:
+        db.close()
+
+
+def test_legacy_jobs_keep_using_the_llm_cache(tmp_path):
+    db = _legacy_session(tmp_path)
+    try:
+        job = db.query(IngestionJob).filter(IngestionJob.id == "j1").one()
+        assert job.use_llm_cache == 1
+    finally:
+        db.close()
@@ -0,0 +1,60 @@
+import threading
+
+from PIL import Image, ImageDraw
+
+from services import ocr
+from services.ocr import EnginePool, ImageHashCache, dhash
+
+
+def _terminal(lines):
+    """A terminal screenshot: dark background, one light bar per text line."""
+    image = Image.new("L", (480, 320), 30)
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(lines):
+        draw.text((12, 12 + i * 18), line, fill=220)
+    return image
+
+
+def test_same_layout_screenshots_are_not_repeats():
+    first = _terminal(["$ pip install numpy", "Collecting numpy", "Installing collected packages"])
+    second = _terminal(["$ git status", "On branch main", "nothing to commit, working tree"])
+
+    seen = ImageHashCache()
+    seen.add(0, dhash(first), first.size)
+
+    assert not seen.seen_image(dhash(second), second.size)
+    assert seen.seen_image(dhash(first.convert("RGB")), first.size)
+    # Same picture, very different size on the page
+    small = first.resize((240, 160))
+    assert not seen.seen_image(dhash(small), small.size)
+
+
+class _CountingEngine:
+    closed = 0
+
+    def __init__(self, name, lang):
+        pass
+
+    def close(self):
+        _CountingEngine.closed += 1
+
+
+def test_engines_are_reused_across_threads_and_closed(monkeypatch):
+    monkeypatch.setattr(ocr, "_create_engine", _CountingEngine)
+    pool = EnginePool(max_idle=2)
+    borrowed = []
+
+    def job():
+        with pool.borrow("tesserocr", "eng") as engine:
+            borrowed.append(engine)
+
+    for _ in range(3):
+        # A new thread per job, like the chunk producer of every ingestion job
+        t = threading.Thread(target=job)
+        t.start()
+        t.join()
+
+    assert pool.created == 1
+    assert borrowed[0] is borrowed[1] is borrowed[2]
+    pool.close()
+    assert _CountingEngine.closed == 1
@@ -0,0 +1,54 @@
+from contextlib import contextmanager
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from main import app
+from models.db import engine
+from models.tables import Flashcard, Project
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _add_projects(db, count: int) -> None:
+    for i in range(count):
+        project = Project(title=f"Project {i}")
+        db.add(project)
+        db.flush()
+        db.add_all(Flashcard(question=f"Q{j}", answer="A", project_id=project.id) for j in range(3))
+    db.commit()
+
+
+def _list_queries(client: TestClient):
+    with count_queries() as statements:
+        response = client.get("/projects")
+    assert response.status_code == 200
+    return len(statements), response.json()
+
+
+def test_project_list_query_count_does_not_grow_with_projects(db):
+    # No lifespan: the ingestion worker is not started
+    client = TestClient(app)
+
+    _add_projects(db, 1)
+    one, listed = _list_queries(client)
+    assert [p["cardCount"] for p in listed] == [3]
+
+    _add_projects(db, 19)
+    twenty, listed = _list_queries(client)
+    assert len(listed) == 20
+    assert all(p["cardCount"] == 3 for p in listed)
+
+    assert twenty == one
@@ -0,0 +1,21 @@
+from sqlalchemy import text
+
+from models.tables import Flashcard, Project
+from services.search import rebuild_card_index, search_project
+
+
+def test_card_index_is_realigned_after_rowids_change(db):
+    project = Project(title="RL")
+    db.add(project)
+    db.flush()
+    db.add(Flashcard(question="What is the TD error?", answer="A difference", project_id=project.id))
+    db.commit()
+    # What a VACUUM may do to a table without an INTEGER PRIMARY KEY
+    db.execute(text("UPDATE flashcards SET rowid = rowid + 100"))
+    db.commit()
+    assert search_project(db, project.id, "TD error")["cards"] == []
+
+    rebuild_card_index()
+
+    cards = search_project(db, project.id, "TD error")["cards"]
+    assert [c["question"] for c in cards] == ["What is the TD error?"]
@@ -0,0 +1,30 @@
+import io
+import os
+
+from models.tables import Blob, File, Project
+from services.storage import release_file_content, remove_files, store_blob
+
+
+def test_released_content_is_kept_until_the_commit(db, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    project = Project(title="RL")
+    db.add(project)
+    db.flush()
+    blob = store_blob(db, io.BytesIO(b"%PDF-1.4 slides"), "slides.pdf")
+    record = File(original_filename="slides.pdf", stored_path=blob.stored_path,
+                  content_hash=blob.sha256, project_id=project.id)
+    db.add(record)
+    db.commit()
+
+    released = release_file_content(db, record)
+    assert blob.stored_path in released
+    # A failed commit leaves the blob row and its file in place
+    db.rollback()
+    assert os.path.exists(blob.stored_path)
+    assert db.query(Blob).filter(Blob.sha256 == blob.sha256).one().ref_count == 1
+
+    released = release_file_content(db, record)
+    db.delete(record)
+    db.commit()
+    remove_files(released)
+    assert not os.path.exists(blob.stored_path)
@@ -1,5 +1,5 @@
 import { useState, useCallback } from 'react';
-import { uploadsAPI, projectsAPI } from '../utils/api';
+import { uploadsAPI, projectsAPI, jobsAPI } from '../utils/api';
 import { getProjects, createProject, saveProject } from '../utils/projects';
 import { motion, AnimatePresence } from 'framer-motion';
 
@@ -14,6 +14,8 @@ export default function UploadZone({ onCreated }) {
   const [lectureDropActive, setLectureDropActive] = useState(false);
   const [extendedDropActive, setExtendedDropActive] = useState(false);
   const [errorMessages, setErrorMessages] = useState([]);
+  const [jobProgress, setJobProgress] = useState({});
+  const [liveCards, setLiveCards] = useState([]);
   const [provider, setProvider] = useState('lmstudio');
   const [openaiApiKey, setOpenaiApiKey] = useState('');
   const [showApiKeyInput, setShowApiKeyInput] = useState(false);
@@ -109,15 +111,26 @@ export default function UploadZone({ onCreated }) {
     setUploading(true);
     try {
       const pid = await ensureServerProject();
-      const uploads = [];
       const uploadOptions = { provider, openaiApiKey, lmstudioUrl };
-      if (lectureFiles.length) uploads.push(uploadsAPI.upload(pid, lectureFiles, { ...uploadOptions, category: 'lecture_notes' }));
-      if (extendedFiles.length) uploads.push(uploadsAPI.upload(pid, extendedFiles, { ...uploadOptions, category: 'extended_info' }));
       console.log('📤 Upload started', { projectId: pid, lecture: lectureFiles.length, extended: extendedFiles.length, provider });
-      const resultSets = await Promise.all(uploads);
-      const allResults = resultSets.flat();
-      console.log('✅ Upload finished', allResults);
-      const summary = Array.isArray(allResults) ? allResults.map(r=>`${r.file.original_filename}: ${r.cards_count || 0} cards`).join('\n') : 'n/a';
+      // Extended info first: its jobs are queued ahead, so the lecture prompts can retrieve from it
+      const extendedResults = extendedFiles.length
+        ? await uploadsAPI.upload(pid, extendedFiles, { ...uploadOptions, category: 'extended_info' })
+        : [];
+      const lectureResults = lectureFiles.length
+        ? await uploadsAPI.upload(pid, lectureFiles, { ...uploadOptions, category: 'lecture_notes' })
+        : [];
+      const allResults = [...extendedResults, ...lectureResults];
+      console.log('📥 Upload stored, processing in background', allResults);
+      setJobProgress({});
+      setLiveCards([]);
+      // One multiplexed stream for all files (not one connection per file)
+      const finishedJobs = await jobsAPI.subscribeAll(pid, allResults.map(r => r.job_id), {
+        onProgress: (job) => setJobProgress(p => ({ ...p, [job.id]: job })),
+        onCard: (card) => setLiveCards(c => [card, ...c].slice(0, 5)),
+      });
+      console.log('✅ Upload finished', finishedJobs);
+      const summary = allResults.map((r, i) => `${r.file.original_filename}: ${finishedJobs[i].cards_created || 0} cards${finishedJobs[i].status === 'failed' ? ' (failed)' : ''}`).join('\n');
       alert(`✅ ${totalFiles} file(s) uploaded & processed.\n\n${summary}`);
       setLectureFiles([]);
       setExtendedFiles([]);
@@ -315,6 +328,33 @@ export default function UploadZone({ onCreated }) {
         </motion.div>
       )}
 
+      {uploading && Object.keys(jobProgress).length > 0 && (
+        <motion.div initial={{opacity:0}} animate={{opacity:1}} className="rounded-lg p-4 space-y-2 bg-zinc-100 dark:bg-zinc-800/50 border border-zinc-300 dark:border-zinc-700">
+          {(() => {
+            const jobs = Object.values(jobProgress);
+            const total = jobs.reduce((n, j) => n + (j.total_pages || 0), 0);
+            const done = jobs.reduce((n, j) => n + (j.pages_done || 0), 0);
+            const cards = jobs.reduce((n, j) => n + (j.cards_created || 0), 0);
+            return (
+              <>
+                <div className="flex justify-between text-xs text-zinc-600 dark:text-zinc-300">
+                  <span>Pages {done}{total ? ` / ${total}` : ''}</span>
+                  <span>{cards} cards saved</span>
+                </div>
+                <div className="h-2 rounded bg-zinc-300 dark:bg-zinc-700 overflow-hidden">
+                  <div className="h-full bg-cyan-500 transition-all" style={{ width: `${total ? Math.round(100 * done / total) : 0}%` }} />
+                </div>
+              </>
+            );
+          })()}
+          {liveCards.map((card, i) => (
+            <div key={`${card.question}${i}`} className="text-xs p-2 rounded bg-white dark:bg-zinc-900/50 text-zinc-700 dark:text-zinc-300 truncate">
+              {card.question}
+            </div>
+          ))}
+        </motion.div>
+      )}
+
       {/* Upload Button */}
       <div className="flex gap-3">
         <motion.button 
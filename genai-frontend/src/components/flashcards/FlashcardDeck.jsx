@@ -152,19 +152,40 @@ export default function FlashcardDeck({ projectId }) {
     }
   };
 
-  const updateLevel = async (id, level) => {
-    const card = cards.find(c => c.id === id);
-    const newReviewCount = (card?.reviewCount || 0) + 1;
+  // Study reviews are applied locally right away and synced to the backend in batches
+  const pendingReviews = useRef([]);
+  const REVIEW_BATCH_SIZE = 20;
+  const REVIEW_FLUSH_INTERVAL = 10000;
+
+  const flushReviews = async () => {
+    if (!pendingReviews.current.length) return;
+    const batch = pendingReviews.current;
+    pendingReviews.current = [];
     try {
-      await flashcardsAPI.updateLevel(projectId, id, levelMap[level] ?? 0);
-      const backendCards = await flashcardsAPI.getByProject(projectId);
-      const mapped = backendCards.map(c => ({ id: c.id, front: c.question, back: c.answer, level: levelFromNumber(c.level), reviewCount: c.review_count || 0, createdAt: Date.now(), lastReviewed: null, important: !!(c.important) }));
-      setCards(mapped);
+      await flashcardsAPI.syncReviews(projectId, batch);
     } catch (e) {
-      console.warn('Level update failed', e);
+      console.warn('Review sync failed, retrying later', e);
+      pendingReviews.current = [...batch, ...pendingReviews.current];
     }
   };
 
+  useEffect(() => {
+    const timer = setInterval(flushReviews, REVIEW_FLUSH_INTERVAL);
+    window.addEventListener('beforeunload', flushReviews);
+    return () => {
+      clearInterval(timer);
+      window.removeEventListener('beforeunload', flushReviews);
+      flushReviews();
+    };
+  }, [projectId]);
+
+  const updateLevel = (id, level) => {
+    const now = new Date();
+    setCards(prev => prev.map(c => c.id === id ? { ...c, level, reviewCount: (c.reviewCount || 0) + 1, lastReviewed: now.getTime() } : c));
+    pendingReviews.current.push({ card_id: id, level: levelMap[level] ?? 0, reviewed_at: now.toISOString() });
+    if (pendingReviews.current.length >= REVIEW_BATCH_SIZE) flushReviews();
+  };
+
   const exportCSV = () => {
     if (!cards.length) return alert('No cards available');
     const rows = cards.map(c => [c.front.replace(/"/g,'""'), c.back.replace(/"/g,'""'), c.level, c.reviewCount]);
@@ -495,7 +516,7 @@ export default function FlashcardDeck({ projectId }) {
         <FlashcardStudy 
           cards={studyCards} 
           onUpdateLevel={updateLevel} 
-          onExit={()=>setOverview(true)} 
+          onExit={()=>{ flushReviews(); setOverview(true); }} 
           onEditCurrent={openEdit}
           onDeleteCurrent={(c)=>deleteCard(c.id)}
         />
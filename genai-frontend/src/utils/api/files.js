@@ -8,7 +8,7 @@ export const uploadsAPI = {
    * @param {string} projectId - Project ID
    * @param {Array<File>} files - Array of File objects
    * @param {Object} options - Upload options { provider, openaiApiKey, category, lmstudioUrl }
-   * @returns {Promise<Array>} Array of upload results with file metadata and processed data
+   * @returns {Promise<Array>} Array of upload results with file metadata and the ingestion job_id
    */
   upload: async (projectId, files, options = {}) => {
     const { provider = 'lmstudio', openaiApiKey = '', category = 'lecture_notes', lmstudioUrl = 'http://127.0.0.1:1234/v1' } = options;
@@ -21,6 +21,17 @@ export const flashcardsAPI = {
     body: JSON.stringify(card) 
   }),
 
+  /**
+   * Create many flashcards in one request (single transaction)
+   * @param {string} projectId - Project ID
+   * @param {Array<Object>} cards - [{ question: string, answer: string, level?: number }]
+   * @returns {Promise<Array>} Created flashcards
+   */
+  createBatch: (projectId, cards) => request(`/projects/${projectId}/flashcards:batch`, {
+    method: 'POST',
+    body: JSON.stringify({ cards })
+  }),
+
   /**
    * Update flashcard fields (question, answer, level, important, review_count)
    * @param {string} projectId - Project ID
@@ -57,4 +68,39 @@ export const flashcardsAPI = {
     method: 'POST', 
     body: JSON.stringify({ level }) 
   }),
+
+  /**
+   * Sync a batch of study reviews in one request (applied in one transaction and appended to the review log)
+   * @param {string} projectId - Project ID
+   * @param {Array<Object>} reviews - [{ card_id: string, level: number, reviewed_at: ISO string }]
+   * @returns {Promise<Object>} { applied: number, unknown_card_ids: string[] }
+   */
+  syncReviews: (projectId, reviews) => request(`/projects/${projectId}/reviews:batch`, {
+    method: 'POST',
+    body: JSON.stringify({ reviews }),
+    keepalive: true, // lets the final flush complete while the page unloads
+  }),
+
+  /**
+   * Get the next cards to study, scheduled server-side (most overdue first)
+   * @param {string} projectId - Project ID
+   * @param {number} n - Number of cards (default 20)
+   * @param {boolean} ahead - Also return cards that are not due yet
+   * @returns {Promise<Array>} Cards with due_at, interval_days and ease
+   */
+  getNextDue: (projectId, n = 20, ahead = false) =>
+    request(`/projects/${projectId}/study/next?n=${n}${ahead ? '&ahead=true' : ''}`),
+
+  /**
+   * Merge near-duplicate flashcards (keeps the most reviewed card of each group)
+   * @param {string} projectId - Project ID
+   * @param {boolean} dryRun - Only report the duplicate groups
+   * @param {number} [threshold] - Minimum card (question + answer) similarity (0.5-1, server default 0.9)
+   * @returns {Promise<Object>} { groups: [{ keep, duplicates: [{ id, similarity }] }], removed, dry_run }
+   */
+  dedupe: (projectId, dryRun = false, threshold) => {
+    const params = new URLSearchParams({ dry_run: String(dryRun) });
+    if (threshold !== undefined) params.set('threshold', String(threshold));
+    return request(`/projects/${projectId}/flashcards:dedupe?${params}`, { method: 'POST' });
+  },
 };
@@ -4,6 +4,8 @@ export { BASE_URL, APIError, request } from './base.js';
 export { projectsAPI } from './projects.js';
 export { flashcardsAPI } from './flashcards.js';
 export { uploadsAPI } from './files.js';
+export { jobsAPI } from './jobs.js';
+export { searchAPI } from './search.js';
 
 // Legacy compatibility - keep MOCK_MODE exports
 export const MOCK_MODE = false;
@@ -0,0 +1,128 @@
+// Jobs API - Progress of background file ingestion (extraction + card generation)
+
+import { BASE_URL, request } from './base.js';
+
+export const jobsAPI = {
+  /**
+   * Get the status of an ingestion job
+   * @param {string} jobId - Job ID
+   * @returns {Promise<Object>} { status, total_pages, pages_done, cards_created, errors, ... }
+   */
+  get: (jobId) => request(`/jobs/${jobId}`),
+
+  /**
+   * Get all ingestion jobs of a project (newest first)
+   * @param {string} projectId - Project ID
+   * @returns {Promise<Array>} List of job statuses
+   */
+  getByProject: (projectId) => request(`/projects/${projectId}/jobs`),
+
+  /**
+   * Queue a failed job again; it continues after its last committed page
+   * @param {string} jobId - Job ID
+   * @param {string} [openaiApiKey] - Required for OpenAI jobs (keys are not stored)
+   * @returns {Promise<Object>} Job status
+   */
+  retry: (jobId, openaiApiKey) => {
+    const query = openaiApiKey ? `?openai_api_key=${encodeURIComponent(openaiApiKey)}` : '';
+    return request(`/jobs/${jobId}/retry${query}`, { method: 'POST' });
+  },
+
+  /**
+   * Poll a job until it is finished (status "done" or "failed")
+   * @param {string} jobId - Job ID
+   * @param {Object} options - { interval = 2000, onProgress }
+   * @returns {Promise<Object>} Final job status
+   */
+  waitFor: async (jobId, options = {}) => {
+    const { interval = 2000, onProgress } = options;
+    for (;;) {
+      const job = await jobsAPI.get(jobId);
+      if (onProgress) onProgress(job);
+      if (job.status === 'done' || job.status === 'failed') return job;
+      await new Promise(resolve => setTimeout(resolve, interval));
+    }
+  },
+
+  /**
+   * Follow a job live via server-sent events until it is finished.
+   * Cards arrive as soon as the LLM emits them; falls back to polling
+   * (waitFor) when EventSource is unavailable or the stream breaks.
+   * @param {string} jobId - Job ID
+   * @param {Object} options - { onProgress, onCard }
+   * @returns {Promise<Object>} Final job status
+   */
+  subscribe: (jobId, options = {}) => {
+    const { onProgress, onCard } = options;
+    if (typeof EventSource === 'undefined') return jobsAPI.waitFor(jobId, { onProgress });
+    return new Promise((resolve, reject) => {
+      const source = new EventSource(`${BASE_URL}/jobs/${jobId}/events`);
+      source.addEventListener('progress', (e) => {
+        if (onProgress) onProgress(JSON.parse(e.data));
+      });
+      source.addEventListener('card', (e) => {
+        if (onCard) onCard(JSON.parse(e.data));
+      });
+      source.addEventListener('done', (e) => {
+        source.close();
+        const job = JSON.parse(e.data);
+        if (onProgress) onProgress(job);
+        resolve(job);
+      });
+      source.onerror = () => {
+        // EventSource reconnects on its own while the connection is retryable;
+        // once closed, continue by polling
+        if (source.readyState === EventSource.CLOSED) {
+          jobsAPI.waitFor(jobId, { onProgress }).then(resolve, reject);
+        }
+      };
+    });
+  },
+
+  /**
+   * Follow several jobs of a project live over ONE server-sent events connection
+   * (one EventSource per job would exhaust the browser's ~6 connections per origin
+   * and block uploads and API calls). Falls back to polling like subscribe.
+   * @param {string} projectId - Project ID
+   * @param {string[]} jobIds - Job IDs
+   * @param {Object} options - { onProgress, onCard } (card payloads carry job_id)
+   * @returns {Promise<Object[]>} Final job statuses, in the order of jobIds
+   */
+  subscribeAll: (projectId, jobIds, options = {}) => {
+    const { onProgress, onCard } = options;
+    if (jobIds.length === 0) return Promise.resolve([]);
+    const pollAll = (ids) => Promise.all(ids.map(id => jobsAPI.waitFor(id, { onProgress })));
+    if (typeof EventSource === 'undefined') return pollAll(jobIds);
+    return new Promise((resolve, reject) => {
+      const finished = {};
+      const finish = () => resolve(jobIds.map(id => finished[id]));
+      const query = encodeURIComponent(jobIds.join(','));
+      const source = new EventSource(`${BASE_URL}/projects/${projectId}/jobs/events?job_ids=${query}`);
+      source.addEventListener('progress', (e) => {
+        if (onProgress) onProgress(JSON.parse(e.data));
+      });
+      source.addEventListener('card', (e) => {
+        if (onCard) onCard(JSON.parse(e.data));
+      });
+      source.addEventListener('done', (e) => {
+        const job = JSON.parse(e.data);
+        if (onProgress) onProgress(job);
+        finished[job.job_id] = job;
+        if (jobIds.every(id => finished[id])) {
+          source.close();
+          finish();
+        }
+      });
+      source.onerror = () => {
+        // Reconnects replay progress and history; once closed, poll the unfinished jobs
+        if (source.readyState === EventSource.CLOSED) {
+          const open = jobIds.filter(id => !finished[id]);
+          pollAll(open).then((jobs) => {
+            open.forEach((id, i) => { finished[id] = jobs[i]; });
+            finish();
+          }, reject);
+        }
+      };
+    });
+  },
+};
@@ -0,0 +1,17 @@
+// Search API - Full-text search over a project's flashcards and extracted pages
+
+import { request } from './base.js';
+
+export const searchAPI = {
+  /**
+   * Search a project (BM25 ranked). Matches are wrapped in <mark>…</mark>;
+   * the text is not HTML-escaped, escape it before rendering as HTML.
+   * @param {string} projectId - Project ID
+   * @param {string} q - Search text (all words must match)
+   * @param {number} limit - Max hits per section (default 20)
+   * @returns {Promise<Object>} { cards: [{ id, question, answer, question_highlight, answer_highlight, score }],
+   *                              pages: [{ file_id, filename, page_number, snippet, score }] }
+   */
+  search: (projectId, q, limit = 20) =>
+    request(`/projects/${projectId}/search?q=${encodeURIComponent(q)}&limit=${limit}`),
+};